@@ -2,6 +2,8 @@ import httpx
 from langchain_core.tools import tool
 
 from app.config import settings
+from app.services import resilience
+from app.services.deadline import http_timeout
 
 
 def _headers() -> dict:
@@ -14,9 +16,10 @@ def _url(path: str) -> str:
 
 def _client() -> httpx.AsyncClient:
     """Create HTTP client with configurable TLS verification."""
-    return httpx.AsyncClient(
+    return resilience.client(
+        "argocd",
         verify=settings.argocd_verify_tls,
-        timeout=settings.http_timeout,
+        timeout=http_timeout(),
     )
 
 
@@ -1,26 +1,39 @@
 from app.agents.base import AgentCapability, AgentCard, BaseAgent
-from app.agents.backstage.tools import get_entity_details, list_catalog_entities, search_catalog, trigger_scaffolder_template
+from app.agents.backstage.tools import (
+    get_entity_details,
+    list_catalog_entities,
+    search_catalog,
+    traverse_catalog,
+    trigger_scaffolder_template,
+)
 from app.config import settings
-from app.services.llm import get_llm
+from app.services.llm import cached_system_message, get_llm, select_tools
 
 
 class Agent(BaseAgent):
     def get_card(self) -> AgentCard:
         return AgentCard(name="backstage", description="Manages the Backstage service catalog, entity discovery, and scaffolder templates", capabilities=[
             AgentCapability(name="catalog_management", description="Browse and search the service catalog", tools=["list_catalog_entities", "get_entity_details", "search_catalog"]),
+            AgentCapability(
+                name="dependency_analysis",
+                description="Trace dependencies and ownership across the catalog",
+                tools=["traverse_catalog"],
+            ),
             AgentCapability(name="scaffolding", description="Scaffold new services from templates", tools=["trigger_scaffolder_template"]),
         ])
 
     def get_tools(self):
-        return [list_catalog_entities, get_entity_details, trigger_scaffolder_template, search_catalog]
+        return [
+            list_catalog_entities, get_entity_details, trigger_scaffolder_template, search_catalog,
+            traverse_catalog,
+        ]
 
     async def invoke(self, task: str, context: dict) -> dict:
-        llm = get_llm(settings)
         tools = self.get_tools()
-        llm_with_tools = llm.bind_tools(tools)
-        from langchain_core.messages import HumanMessage, SystemMessage, ToolMessage
-        messages = [SystemMessage(content=self.get_system_prompt()), HumanMessage(content=task)]
-        response = await llm_with_tools.ainvoke(messages)
+        from langchain_core.messages import HumanMessage, ToolMessage
+        system = cached_system_message(settings, self.get_system_prompt())
+        messages = [system, HumanMessage(content=task)]
+        response = await select_tools(settings, "backstage", tools, messages)
         tools_used = []
         if response.tool_calls:
             tool_map = {t.name: t for t in tools}
@@ -31,7 +44,8 @@ class Agent(BaseAgent):
                     tools_used.append(tc["name"])
                     messages.append(response)
                     messages.append(ToolMessage(content=str(result), tool_call_id=tc["id"]))
-            final = await llm_with_tools.ainvoke(messages)
+            synthesis = get_llm(settings, "synthesis", "backstage").bind_tools(tools)
+            final = await synthesis.ainvoke(messages)
             return {"content": final.content, "tools_used": tools_used}
         return {"content": response.content, "tools_used": []}
 
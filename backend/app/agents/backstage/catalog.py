@@ -0,0 +1,234 @@
+"""Local mirror of the Backstage software catalog with in-memory indexes.
+
+The catalog is paged through ``/api/catalog/entities/by-query`` in the background.
+Each entity's ``metadata.etag`` is compared with the mirrored copy, so only added,
+changed or removed entities touch the indexes. Entities are indexed by kind, owner
+and tag, and their ``relations`` form a graph that can be walked in one call
+(e.g. everything that transitively depends on a component, and who owns it).
+If syncs keep failing for ``STALE_AFTER_SYNCS`` intervals the mirror stops
+reporting ready, and the tools query Backstage directly until a sync succeeds.
+"""
+
+import asyncio
+import logging
+import time
+from collections import defaultdict, deque
+
+import httpx
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 500
+STALE_AFTER_SYNCS = 5  # failed sync intervals before the mirror stops serving queries
+
+
+def normalize_ref(ref: str, default_kind: str = "component") -> str:
+    """Return a canonical ``kind:namespace/name`` entity reference (lowercase)."""
+    ref = ref.strip().lower()
+    kind, _, rest = ref.rpartition(":")
+    namespace, _, name = rest.rpartition("/")
+    return f"{kind or default_kind}:{namespace or 'default'}/{name}"
+
+
+def entity_ref(entity: dict) -> str:
+    meta = entity["metadata"]
+    return normalize_ref(f"{entity['kind']}:{meta.get('namespace', 'default')}/{meta['name']}")
+
+
+def summarize(entity: dict) -> dict:
+    meta = entity["metadata"]
+    return {
+        "ref": entity_ref(entity),
+        "name": meta["name"],
+        "kind": entity["kind"],
+        "namespace": meta.get("namespace", "default"),
+        "description": meta.get("description", ""),
+        "owner": entity.get("spec", {}).get("owner", ""),
+    }
+
+
+class CatalogMirror:
+    def __init__(self):
+        self._entities: dict[str, dict] = {}
+        self._by_kind: defaultdict[str, set[str]] = defaultdict(set)
+        self._by_owner: defaultdict[str, set[str]] = defaultdict(set)
+        self._by_tag: defaultdict[str, set[str]] = defaultdict(set)
+        # ref -> {(type, target)}
+        self._relations: defaultdict[str, set[tuple[str, str]]] = defaultdict(set)
+        self._task: asyncio.Task | None = None
+        self._synced_at = 0.0  # monotonic time of the last successful sync
+        self.ready = False
+
+    # -- indexing ---------------------------------------------------------
+
+    def upsert(self, entity: dict):
+        ref = entity_ref(entity)
+        if ref in self._entities:
+            self._unindex(ref)
+        self._entities[ref] = entity
+        self._by_kind[entity["kind"].lower()].add(ref)
+        owner = entity.get("spec", {}).get("owner")
+        if owner:
+            self._by_owner[normalize_ref(owner, default_kind="group")].add(ref)
+        for tag in entity["metadata"].get("tags", []):
+            self._by_tag[tag.lower()].add(ref)
+        for rel in entity.get("relations", []):
+            self._relations[ref].add((rel["type"], normalize_ref(rel["targetRef"])))
+
+    def remove(self, ref: str):
+        if ref in self._entities:
+            self._unindex(ref)
+            del self._entities[ref]
+
+    def _unindex(self, ref: str):
+        entity = self._entities[ref]
+        self._by_kind[entity["kind"].lower()].discard(ref)
+        owner = entity.get("spec", {}).get("owner")
+        if owner:
+            self._by_owner[normalize_ref(owner, default_kind="group")].discard(ref)
+        for tag in entity["metadata"].get("tags", []):
+            self._by_tag[tag.lower()].discard(ref)
+        self._relations.pop(ref, None)
+
+    # -- queries ----------------------------------------------------------
+
+    def get(self, ref: str) -> dict | None:
+        return self._entities.get(normalize_ref(ref))
+
+    def find(
+        self, kind: str = "", owner: str = "", tag: str = "", filters: dict[str, str] | None = None
+    ) -> list[dict]:
+        """Return entities matching all given index filters and dotted-path field filters."""
+        candidates: set[str] | None = None
+        for index, key in (
+            (self._by_kind, kind.lower()),
+            (self._by_owner, owner and normalize_ref(owner, default_kind="group")),
+            (self._by_tag, tag.lower()),
+        ):
+            if key:
+                matched = index.get(key, set())
+                candidates = matched if candidates is None else candidates & matched
+        refs = self._entities.keys() if candidates is None else candidates
+        entities = (self._entities[r] for r in sorted(refs))
+        if filters:
+            entities = (
+                e for e in entities
+                if all(str(_lookup(e, k)).lower() == v.lower() for k, v in filters.items())
+            )
+        return list(entities)
+
+    def search(self, query: str, limit: int = 10) -> list[dict]:
+        terms = query.lower().split()
+        results = []
+        for ref, entity in sorted(self._entities.items()):
+            meta = entity["metadata"]
+            fields = [
+                ref, meta.get("title", ""), meta.get("description", ""), *meta.get("tags", []),
+            ]
+            haystack = " ".join(fields).lower()
+            if all(t in haystack for t in terms):
+                results.append(entity)
+                if len(results) >= limit:
+                    break
+        return results
+
+    def traverse(self, ref: str, relation: str, depth: int = 3) -> list[tuple[int, str]]:
+        """Breadth-first walk along one relation type. Returns (distance, ref) pairs."""
+        start = normalize_ref(ref)
+        seen = {start}
+        queue = deque([(0, start)])
+        found = []
+        while queue:
+            dist, current = queue.popleft()
+            if dist >= depth:
+                continue
+            for rel_type, target in self._relations.get(current, ()):
+                if rel_type == relation and target not in seen:
+                    seen.add(target)
+                    found.append((dist + 1, target))
+                    queue.append((dist + 1, target))
+        return found
+
+    def owners_of(self, ref: str) -> list[str]:
+        relations = self._relations.get(normalize_ref(ref), ())
+        return sorted(t for rel_type, t in relations if rel_type == "ownedBy")
+
+    # -- sync -------------------------------------------------------------
+
+    def start(self):
+        if self._task is None and settings.backstage_url:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        async with httpx.AsyncClient(timeout=settings.http_timeout) as client:
+            while True:
+                try:
+                    await self.sync(client)
+                    self._synced_at = time.monotonic()
+                    self.ready = True
+                except httpx.HTTPError as e:
+                    logger.warning(f"Backstage catalog sync failed: {e}")
+                except Exception:
+                    logger.exception("Backstage catalog sync failed")
+                stale_after = STALE_AFTER_SYNCS * settings.backstage_sync_interval
+                if self.ready and time.monotonic() - self._synced_at > stale_after:
+                    logger.warning(
+                        "Backstage catalog mirror is stale; "
+                        "querying Backstage until a sync succeeds"
+                    )
+                    self.ready = False
+                await asyncio.sleep(settings.backstage_sync_interval)
+
+    async def sync(self, client: httpx.AsyncClient):
+        seen: set[str] = set()
+        changed = 0
+        cursor = None
+        while True:
+            params = {"cursor": cursor} if cursor else {"limit": PAGE_SIZE}
+            resp = await client.get(
+                f"{settings.backstage_url}/api/catalog/entities/by-query", params=params
+            )
+            resp.raise_for_status()
+            data = resp.json()
+            for entity in data.get("items", []):
+                ref = entity_ref(entity)
+                seen.add(ref)
+                current = self._entities.get(ref)
+                etag = entity["metadata"].get("etag")
+                if current is None or current["metadata"].get("etag") != etag:
+                    self.upsert(entity)
+                    changed += 1
+            cursor = data.get("pageInfo", {}).get("nextCursor")
+            if not cursor:
+                break
+        removed = self._entities.keys() - seen
+        for ref in removed:
+            self.remove(ref)
+        if changed or removed:
+            logger.info(
+                f"Backstage catalog mirror: {changed} changed, {len(removed)} removed, "
+                f"{len(self._entities)} total"
+            )
+
+
+def _lookup(entity: dict, path: str):
+    value = entity
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+catalog_mirror = CatalogMirror()
@@ -1,16 +1,27 @@
-import httpx
 from langchain_core.tools import tool
 
+from app.agents.backstage.catalog import catalog_mirror, summarize
 from app.config import settings
+from app.services import resilience
+from app.services.deadline import http_timeout
+
+
+def _parse_filter(filter_query: str) -> dict[str, str]:
+    """Parse a Backstage-style 'key=value,key=value' filter."""
+    pairs = (part.split("=", 1) for part in filter_query.split(",") if "=" in part)
+    return {k.strip(): v.strip() for k, v in pairs}
 
 
 @tool
 async def list_catalog_entities(kind: str = "Component", filter_query: str = "") -> list[dict]:
     """List entities from the Backstage service catalog."""
+    if catalog_mirror.ready:
+        entities = catalog_mirror.find(kind=kind, filters=_parse_filter(filter_query))
+        return [{k: v for k, v in summarize(e).items() if k != "ref"} for e in entities]
     params = {"filter": f"kind={kind}"}
     if filter_query:
         params["filter"] += f",{filter_query}"
-    async with httpx.AsyncClient() as client:
+    async with resilience.client("backstage", timeout=http_timeout()) as client:
         resp = await client.get(f"{settings.backstage_url}/api/catalog/entities", params=params)
         resp.raise_for_status()
         return [{"name": e["metadata"]["name"], "kind": e["kind"], "namespace": e["metadata"].get("namespace", "default"), "description": e["metadata"].get("description", ""), "owner": e.get("spec", {}).get("owner", "")} for e in resp.json()]
@@ -19,17 +30,27 @@ async def list_catalog_entities(kind: str = "Component", filter_query: str = "")
 @tool
 async def get_entity_details(entity_ref: str) -> dict:
     """Get details of a Backstage catalog entity. Format: kind:namespace/name."""
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(f"{settings.backstage_url}/api/catalog/entities/by-name/{entity_ref.replace(':', '/')}")
-        resp.raise_for_status()
-        e = resp.json()
-        return {"name": e["metadata"]["name"], "kind": e["kind"], "description": e["metadata"].get("description", ""), "annotations": e["metadata"].get("annotations", {}), "spec": e.get("spec", {}), "relations": e.get("relations", [])}
+    e = catalog_mirror.get(entity_ref) if catalog_mirror.ready else None
+    if e is None:
+        async with resilience.client("backstage", timeout=http_timeout()) as client:
+            path = entity_ref.replace(':', '/')
+            resp = await client.get(f"{settings.backstage_url}/api/catalog/entities/by-name/{path}")
+            resp.raise_for_status()
+            e = resp.json()
+    return {
+        "name": e["metadata"]["name"],
+        "kind": e["kind"],
+        "description": e["metadata"].get("description", ""),
+        "annotations": e["metadata"].get("annotations", {}),
+        "spec": e.get("spec", {}),
+        "relations": e.get("relations", []),
+    }
 
 
 @tool
 async def trigger_scaffolder_template(template_name: str, parameters: dict) -> dict:
     """Trigger a Backstage scaffolder template to create a new component."""
-    async with httpx.AsyncClient() as client:
+    async with resilience.client("backstage", timeout=http_timeout()) as client:
         resp = await client.post(f"{settings.backstage_url}/api/scaffolder/v2/tasks", json={"templateRef": f"template:default/{template_name}", "values": parameters})
         resp.raise_for_status()
         data = resp.json()
@@ -39,8 +60,42 @@ async def trigger_scaffolder_template(template_name: str, parameters: dict) -> d
 @tool
 async def search_catalog(query: str) -> list[dict]:
     """Full-text search across the Backstage catalog."""
-    async with httpx.AsyncClient() as client:
+    if catalog_mirror.ready:
+        return [
+            {
+                "title": e["metadata"].get("title") or e["metadata"]["name"],
+                "type": e["kind"].lower(),
+                "location": (
+                    f"/catalog/{e['metadata'].get('namespace', 'default')}/"
+                    f"{e['kind'].lower()}/{e['metadata']['name']}"
+                ),
+            }
+            for e in catalog_mirror.search(query)
+        ]
+    async with resilience.client("backstage", timeout=http_timeout()) as client:
         resp = await client.get(f"{settings.backstage_url}/api/search/query", params={"term": query})
         resp.raise_for_status()
         results = resp.json().get("results", [])
         return [{"title": r.get("document", {}).get("title", ""), "type": r.get("type", ""), "location": r.get("document", {}).get("location", "")} for r in results[:10]]
+
+
+@tool
+async def traverse_catalog(entity_ref: str, relation: str = "dependencyOf", depth: int = 3) -> dict:
+    """Walk catalog relations from an entity in one call, reporting each related entity's owners.
+
+    Use relation 'dependencyOf' for what depends on the entity, 'dependsOn' for what it
+    depends on, 'hasPart'/'partOf' for system membership. Format: kind:namespace/name.
+    """
+    if not catalog_mirror.ready:
+        return {"error": "Catalog mirror is still syncing; use get_entity_details instead"}
+    related = []
+    for distance, ref in catalog_mirror.traverse(entity_ref, relation, depth):
+        entity = catalog_mirror.get(ref)
+        related.append({
+            "ref": ref,
+            "distance": distance,
+            "description": entity["metadata"].get("description", "") if entity else "",
+            "owners": catalog_mirror.owners_of(ref),
+        })
+    owners = sorted({o for r in related for o in r["owners"]})
+    return {"entity": entity_ref, "relation": relation, "related": related, "owners": owners}
@@ -7,7 +7,7 @@ from app.agents.flux.tools import (
     suspend_kustomization,
 )
 from app.config import settings
-from app.services.llm import get_llm
+from app.services.llm import cached_system_message, get_llm, select_tools
 
 
 class Agent(BaseAgent):
@@ -25,12 +25,11 @@ class Agent(BaseAgent):
         return [list_kustomizations, reconcile_kustomization, suspend_kustomization, resume_kustomization, get_source_status]
 
     async def invoke(self, task: str, context: dict) -> dict:
-        llm = get_llm(settings)
         tools = self.get_tools()
-        llm_with_tools = llm.bind_tools(tools)
-        from langchain_core.messages import HumanMessage, SystemMessage, ToolMessage
-        messages = [SystemMessage(content=self.get_system_prompt()), HumanMessage(content=task)]
-        response = await llm_with_tools.ainvoke(messages)
+        from langchain_core.messages import HumanMessage, ToolMessage
+        system = cached_system_message(settings, self.get_system_prompt())
+        messages = [system, HumanMessage(content=task)]
+        response = await select_tools(settings, "flux", tools, messages)
         tools_used = []
         if response.tool_calls:
             tool_map = {t.name: t for t in tools}
@@ -41,7 +40,7 @@ class Agent(BaseAgent):
                     tools_used.append(tc["name"])
                     messages.append(response)
                     messages.append(ToolMessage(content=str(result), tool_call_id=tc["id"]))
-            final = await llm_with_tools.ainvoke(messages)
+            final = await get_llm(settings, "synthesis", "flux").bind_tools(tools).ainvoke(messages)
             return {"content": final.content, "tools_used": tools_used}
         return {"content": response.content, "tools_used": []}
 
@@ -1,17 +1,13 @@
-import asyncio
 import json
 
 from langchain_core.tools import tool
 
+from app.services import processes
+
 
 async def _kubectl(args: str) -> str:
-    proc = await asyncio.create_subprocess_shell(
-        f"kubectl {args}",
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE,
-    )
-    stdout, stderr = await proc.communicate()
-    if proc.returncode != 0:
+    returncode, stdout, stderr = await processes.run(f"kubectl {args}")
+    if returncode != 0:
         return f"Error: {stderr.decode()}"
     return stdout.decode()
 
@@ -8,7 +8,7 @@ from app.agents.github.tools import (
     search_code,
 )
 from app.config import settings
-from app.services.llm import get_llm
+from app.services.llm import cached_system_message, get_llm, select_tools
 
 
 class Agent(BaseAgent):
@@ -51,18 +51,16 @@ class Agent(BaseAgent):
         ]
 
     async def invoke(self, task: str, context: dict) -> dict:
-        llm = get_llm(settings)
         tools = self.get_tools()
-        llm_with_tools = llm.bind_tools(tools)
 
-        from langchain_core.messages import HumanMessage, SystemMessage
+        from langchain_core.messages import HumanMessage
 
         messages = [
-            SystemMessage(content=self.get_system_prompt()),
+            cached_system_message(settings, self.get_system_prompt()),
             HumanMessage(content=task),
         ]
 
-        response = await llm_with_tools.ainvoke(messages)
+        response = await select_tools(settings, "github", tools, messages)
         tools_used = []
 
         if response.tool_calls:
@@ -79,7 +77,8 @@ class Agent(BaseAgent):
                         ToolMessage(content=str(result), tool_call_id=tool_call["id"])
                     )
 
-            final_response = await llm_with_tools.ainvoke(messages)
+            synthesis = get_llm(settings, "synthesis", "github").bind_tools(tools)
+            final_response = await synthesis.ainvoke(messages)
             return {"content": final_response.content, "tools_used": tools_used}
 
         return {"content": response.content, "tools_used": []}
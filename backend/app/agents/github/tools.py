@@ -1,7 +1,8 @@
-import httpx
 from langchain_core.tools import tool
 
 from app.config import settings
+from app.services import resilience
+from app.services.deadline import http_timeout
 
 GITHUB_API = "https://api.github.com"
 
@@ -17,7 +18,7 @@ def _headers() -> dict:
 @tool
 async def create_repository(name: str, org: str, description: str = "", private: bool = True) -> dict:
     """Create a new GitHub repository in an organization."""
-    async with httpx.AsyncClient() as client:
+    async with resilience.client("github", timeout=http_timeout()) as client:
         resp = await client.post(
             f"{GITHUB_API}/orgs/{org}/repos",
             headers=_headers(),
@@ -33,7 +34,7 @@ async def create_pull_request(
     repo: str, title: str, body: str, head: str, base: str = "main"
 ) -> dict:
     """Create a pull request on a GitHub repository. Repo format: owner/repo."""
-    async with httpx.AsyncClient() as client:
+    async with resilience.client("github", timeout=http_timeout()) as client:
         resp = await client.post(
             f"{GITHUB_API}/repos/{repo}/pulls",
             headers=_headers(),
@@ -47,7 +48,7 @@ async def create_pull_request(
 @tool
 async def list_repositories(org: str, limit: int = 30) -> list[dict]:
     """List repositories in a GitHub organization."""
-    async with httpx.AsyncClient() as client:
+    async with resilience.client("github", timeout=http_timeout()) as client:
         resp = await client.get(
             f"{GITHUB_API}/orgs/{org}/repos",
             headers=_headers(),
@@ -63,7 +64,7 @@ async def list_repositories(org: str, limit: int = 30) -> list[dict]:
 @tool
 async def create_issue(repo: str, title: str, body: str, labels: list[str] | None = None) -> dict:
     """Create an issue on a GitHub repository. Repo format: owner/repo."""
-    async with httpx.AsyncClient() as client:
+    async with resilience.client("github", timeout=http_timeout()) as client:
         resp = await client.post(
             f"{GITHUB_API}/repos/{repo}/issues",
             headers=_headers(),
@@ -78,7 +79,7 @@ async def create_issue(repo: str, title: str, body: str, labels: list[str] | Non
 async def search_code(query: str, org: str = "") -> list[dict]:
     """Search for code across GitHub repositories."""
     q = f"{query} org:{org}" if org else query
-    async with httpx.AsyncClient() as client:
+    async with resilience.client("github", timeout=http_timeout()) as client:
         resp = await client.get(
             f"{GITHUB_API}/search/code",
             headers=_headers(),
@@ -95,7 +96,7 @@ async def search_code(query: str, org: str = "") -> list[dict]:
 @tool
 async def get_workflow_runs(repo: str, limit: int = 5) -> list[dict]:
     """Get recent GitHub Actions workflow runs for a repository."""
-    async with httpx.AsyncClient() as client:
+    async with resilience.client("github", timeout=http_timeout()) as client:
         resp = await client.get(
             f"{GITHUB_API}/repos/{repo}/actions/runs",
             headers=_headers(),
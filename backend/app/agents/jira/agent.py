@@ -1,26 +1,62 @@
 from app.agents.base import AgentCapability, AgentCard, BaseAgent
-from app.agents.jira.tools import add_comment, create_jira_issue, get_sprint_board, search_issues, update_issue_status
+from app.agents.jira.tools import (
+    add_comment,
+    bulk_add_comment,
+    bulk_create_issues,
+    bulk_transition_issues,
+    create_jira_issue,
+    get_sprint_board,
+    search_issues,
+    update_issue_status,
+)
 from app.config import settings
-from app.services.llm import get_llm
+from app.services.llm import cached_system_message, get_llm, select_tools
 
 
 class Agent(BaseAgent):
     def get_card(self) -> AgentCard:
-        return AgentCard(name="jira", description="Manages Jira issues, sprints, and project tracking", capabilities=[
-            AgentCapability(name="issue_management", description="Create, search, and update Jira issues", tools=["create_jira_issue", "search_issues", "update_issue_status", "add_comment"]),
-            AgentCapability(name="sprint_tracking", description="View sprint boards and progress", tools=["get_sprint_board"]),
-        ])
+        return AgentCard(
+            name="jira",
+            description="Manages Jira issues, sprints, and project tracking",
+            capabilities=[
+                AgentCapability(
+                    name="issue_management",
+                    description="Create, search, and update Jira issues",
+                    tools=[
+                        "create_jira_issue", "search_issues", "update_issue_status", "add_comment"
+                    ],
+                ),
+                AgentCapability(
+                    name="bulk_operations",
+                    description="Create, transition, or comment on many issues in one call",
+                    tools=["bulk_create_issues", "bulk_transition_issues", "bulk_add_comment"],
+                ),
+                AgentCapability(
+                    name="sprint_tracking",
+                    description="View sprint boards and progress",
+                    tools=["get_sprint_board"],
+                ),
+            ],
+        )
 
     def get_tools(self):
-        return [create_jira_issue, search_issues, update_issue_status, get_sprint_board, add_comment]
+        return [
+            create_jira_issue,
+            search_issues,
+            update_issue_status,
+            get_sprint_board,
+            add_comment,
+            bulk_create_issues,
+            bulk_transition_issues,
+            bulk_add_comment,
+        ]
 
     async def invoke(self, task: str, context: dict) -> dict:
-        llm = get_llm(settings)
         tools = self.get_tools()
-        llm_with_tools = llm.bind_tools(tools)
-        from langchain_core.messages import HumanMessage, SystemMessage, ToolMessage
-        messages = [SystemMessage(content=self.get_system_prompt()), HumanMessage(content=task)]
-        response = await llm_with_tools.ainvoke(messages)
+        from langchain_core.messages import HumanMessage, ToolMessage
+        system = cached_system_message(settings, self.get_system_prompt())
+        messages = [system, HumanMessage(content=task)]
+        response = await select_tools(settings, "jira", tools, messages)
         tools_used = []
         if response.tool_calls:
             tool_map = {t.name: t for t in tools}
@@ -31,9 +67,13 @@ class Agent(BaseAgent):
                     tools_used.append(tc["name"])
                     messages.append(response)
                     messages.append(ToolMessage(content=str(result), tool_call_id=tc["id"]))
-            final = await llm_with_tools.ainvoke(messages)
+            final = await get_llm(settings, "synthesis", "jira").bind_tools(tools).ainvoke(messages)
             return {"content": final.content, "tools_used": tools_used}
         return {"content": response.content, "tools_used": []}
 
     def get_system_prompt(self) -> str:
-        return "You are a Jira project management agent. You help manage issues, track sprints, and coordinate work across teams."
+        return (
+            "You are a Jira project management agent. You help manage issues, track sprints, and "
+            "coordinate work across teams. When working with several issues at once, prefer the "
+            "bulk tools over repeated single-issue calls."
+        )
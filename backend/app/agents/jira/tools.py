@@ -1,11 +1,26 @@
+import asyncio
 import base64
+import time
 
 import httpx
 from langchain_core.tools import tool
 
 from app.config import settings
+from app.services import resilience
+from app.services.deadline import http_timeout
 
 JIRA_API = "/rest/api/3"
+BULK_CREATE_CHUNK = 50  # Jira caps /issue/bulk at 50 issues per request
+SEARCH_CHUNK = 100  # issues per key lookup search
+TRANSITION_CACHE_TTL = 3600  # seconds
+KNOWN_STATES = 10_000  # issues whose workflow state is remembered
+
+State = tuple[str, str, str]  # (project key, issue type id, status id)
+
+# state -> (fetched_at, {transition name (lowercase): (transition id, target status id)})
+_transition_cache: dict[State, tuple[float, dict[str, tuple[str, str | None]]]] = {}
+# issue key (upper-case) -> (seen_at, state), so a known issue needs no lookup before a transition
+_issue_state_cache: dict[str, tuple[float, State]] = {}
 
 
 def _headers() -> dict:
@@ -17,13 +32,194 @@ def _url(path: str) -> str:
     return f"{settings.jira_base_url}{JIRA_API}{path}"
 
 
+def _adf(text: str) -> dict:
+    paragraph = {"type": "paragraph", "content": [{"type": "text", "text": text}]}
+    return {"type": "doc", "version": 1, "content": [paragraph]}
+
+
+def _issue_fields(project_key: str, summary: str, description: str, issue_type: str) -> dict:
+    return {
+        "project": {"key": project_key},
+        "summary": summary,
+        "description": _adf(description),
+        "issuetype": {"name": issue_type},
+    }
+
+
+def _project_of(issue_key: str) -> str:
+    return issue_key.rsplit("-", 1)[0].upper()
+
+
+def _state_of(issue: dict) -> State:
+    """The issue's workflow state.
+
+    Transitions, and their IDs, only carry over between issues that share it.
+    """
+    fields = issue["fields"]
+    return _project_of(issue["key"]), fields["issuetype"]["id"], fields["status"]["id"]
+
+
+def _cached_transitions(state: State) -> dict[str, tuple[str, str | None]] | None:
+    fetched_at, transitions = _transition_cache.get(state, (0.0, None))
+    if transitions is None or time.monotonic() - fetched_at > TRANSITION_CACHE_TTL:
+        return None
+    return transitions
+
+
+def _remember_state(issue_key: str, state: State | None):
+    key = issue_key.upper()
+    _issue_state_cache.pop(key, None)
+    if state is None:
+        return
+    _issue_state_cache[key] = (time.monotonic(), state)
+    if len(_issue_state_cache) > KNOWN_STATES:
+        del _issue_state_cache[next(iter(_issue_state_cache))]  # the least recently seen
+
+
+def _known_state(issue_key: str) -> State | None:
+    seen_at, state = _issue_state_cache.get(issue_key.upper(), (0.0, None))
+    return state if time.monotonic() - seen_at <= TRANSITION_CACHE_TTL else None
+
+
+async def _fetch_transitions(
+    client: httpx.AsyncClient, issue_key: str
+) -> tuple[State, dict[str, tuple[str, str | None]]]:
+    """The issue's own transitions and workflow state, in one request; caches both."""
+    resp = await client.get(
+        _url(f"/issue/{issue_key}"),
+        headers=_headers(),
+        params={"fields": "issuetype,status", "expand": "transitions"},
+    )
+    resp.raise_for_status()
+    issue = resp.json()
+    state = _state_of(issue)
+    transitions = {
+        t["name"].lower(): (t["id"], (t.get("to") or {}).get("id"))
+        for t in issue.get("transitions", [])
+    }
+    _transition_cache[state] = (time.monotonic(), transitions)
+    _remember_state(issue_key, state)
+    return state, transitions
+
+
+async def _issue_states(client: httpx.AsyncClient, issue_keys: list[str]) -> dict[str, State]:
+    """Workflow state of each issue, by upper-case key, with one search per SEARCH_CHUNK issues."""
+    states = {}
+    for start in range(0, len(issue_keys), SEARCH_CHUNK):
+        chunk = issue_keys[start:start + SEARCH_CHUNK]
+        resp = await client.post(_url("/search"), headers=_headers(), json={
+            "jql": f"key in ({', '.join(chunk)})",
+            "maxResults": len(chunk),
+            "fields": ["issuetype", "status"],
+            "validateQuery": "warn",  # unknown keys are left out instead of failing the search
+        })
+        resp.raise_for_status()
+        for issue in resp.json().get("issues", []):
+            states[issue["key"]] = _state_of(issue)
+            _remember_state(issue["key"], states[issue["key"]])
+    return states
+
+
+async def _transition_issue(
+    client: httpx.AsyncClient, issue_key: str, transition_name: str, state: State | None = None
+) -> dict:
+    """Transition an issue, reusing the transition IDs cached for its workflow state.
+
+    The state comes from the caller, or from what an earlier lookup, search or
+    transition of this issue showed. The same ID names different transitions in
+    different workflows, so cached IDs are only reused for issues of the same
+    project, issue type and status. If Jira rejects a cached ID (the workflow or
+    the issue changed), both entries are dropped and the issue's own transitions
+    are looked up.
+    """
+    state = state or _known_state(issue_key)
+    transitions = _cached_transitions(state) if state else None
+    cached = transitions is not None
+    if not cached:
+        state, transitions = await _fetch_transitions(client, issue_key)
+    transition_id, target = transitions.get(transition_name.lower(), (None, None))
+    if not transition_id:
+        if cached:
+            _forget(issue_key, state)
+            return await _transition_issue(client, issue_key, transition_name)
+        return {
+            "key": issue_key,
+            "error": f"Transition '{transition_name}' not found",
+            "available": list(transitions),
+        }
+    resp = await client.post(
+        _url(f"/issue/{issue_key}/transitions"),
+        headers=_headers(),
+        json={"transition": {"id": transition_id}},
+    )
+    if resp.status_code == 400 and cached:
+        _forget(issue_key, state)
+        return await _transition_issue(client, issue_key, transition_name)
+    resp.raise_for_status()
+    _remember_state(issue_key, (*state[:2], target) if target else None)
+    return {"key": issue_key, "new_status": transition_name}
+
+
+def _forget(issue_key: str, state: State):
+    _transition_cache.pop(state, None)
+    _remember_state(issue_key, None)
+
+
+async def _bounded_per_item(client: httpx.AsyncClient, keys: list[str], fn) -> list[dict]:
+    """Run fn(client, key) for each key with bounded concurrency, reporting errors per item."""
+    semaphore = asyncio.Semaphore(settings.jira_bulk_concurrency)
+
+    async def run(key: str) -> dict:
+        async with semaphore:
+            try:
+                return await fn(client, key)
+            except Exception as e:  # one bad item must not cancel the others
+                return {"key": key, "error": str(e) or type(e).__name__}
+
+    return await asyncio.gather(*(run(k) for k in keys))
+
+
+async def _create_chunk(
+    client: httpx.AsyncClient, project_key: str, chunk: list[dict]
+) -> list[dict]:
+    """Create up to BULK_CREATE_CHUNK issues in one request: one result per issue, in order."""
+    updates = [
+        {"fields": _issue_fields(
+            project_key, i["summary"], i.get("description", ""), i.get("issue_type", "Task")
+        )}
+        for i in chunk
+    ]
+    try:
+        resp = await client.post(
+            _url("/issue/bulk"), headers=_headers(), json={"issueUpdates": updates}
+        )
+        if resp.status_code not in (200, 201, 400):
+            resp.raise_for_status()
+        data = resp.json()
+    except (httpx.HTTPError, ValueError) as e:
+        return [{"summary": i["summary"], "error": str(e)} for i in chunk]
+    failed = {e["failedElementNumber"]: e.get("elementErrors", {}) for e in data.get("errors", [])}
+    created = iter(data.get("issues", []))
+    results = []
+    for offset, issue in enumerate(chunk):
+        if offset in failed:
+            results.append({"summary": issue["summary"], "error": failed[offset]})
+        elif (created_issue := next(created, None)) is None:
+            error = "Jira did not report this issue as created"
+            results.append({"summary": issue["summary"], "error": error})
+        else:
+            key = created_issue["key"]
+            url = f"{settings.jira_base_url}/browse/{key}"
+            results.append({"summary": issue["summary"], "key": key, "url": url})
+    return results
+
+
 @tool
 async def create_jira_issue(project_key: str, summary: str, description: str, issue_type: str = "Task") -> dict:
     """Create a Jira issue in the specified project."""
-    async with httpx.AsyncClient() as client:
-        resp = await client.post(_url("/issue"), headers=_headers(), json={
-            "fields": {"project": {"key": project_key}, "summary": summary, "description": {"type": "doc", "version": 1, "content": [{"type": "paragraph", "content": [{"type": "text", "text": description}]}]}, "issuetype": {"name": issue_type}},
-        })
+    async with resilience.client("jira", timeout=http_timeout()) as client:
+        fields = _issue_fields(project_key, summary, description, issue_type)
+        resp = await client.post(_url("/issue"), headers=_headers(), json={"fields": fields})
         resp.raise_for_status()
         data = resp.json()
         return {"key": data["key"], "url": f"{settings.jira_base_url}/browse/{data['key']}"}
@@ -32,7 +228,7 @@ async def create_jira_issue(project_key: str, summary: str, description: str, is
 @tool
 async def search_issues(jql_query: str, max_results: int = 10) -> list[dict]:
     """Search Jira issues using JQL query."""
-    async with httpx.AsyncClient() as client:
+    async with resilience.client("jira", timeout=http_timeout()) as client:
         resp = await client.post(_url("/search"), headers=_headers(), json={"jql": jql_query, "maxResults": max_results, "fields": ["summary", "status", "assignee", "priority"]})
         resp.raise_for_status()
         return [{"key": i["key"], "summary": i["fields"]["summary"], "status": i["fields"]["status"]["name"], "assignee": (i["fields"].get("assignee") or {}).get("displayName", "Unassigned")} for i in resp.json().get("issues", [])]
@@ -41,22 +237,14 @@ async def search_issues(jql_query: str, max_results: int = 10) -> list[dict]:
 @tool
 async def update_issue_status(issue_key: str, transition_name: str) -> dict:
     """Transition a Jira issue to a new status."""
-    async with httpx.AsyncClient() as client:
-        trans_resp = await client.get(_url(f"/issue/{issue_key}/transitions"), headers=_headers())
-        trans_resp.raise_for_status()
-        transitions = trans_resp.json().get("transitions", [])
-        transition = next((t for t in transitions if t["name"].lower() == transition_name.lower()), None)
-        if not transition:
-            return {"error": f"Transition '{transition_name}' not found", "available": [t["name"] for t in transitions]}
-        resp = await client.post(_url(f"/issue/{issue_key}/transitions"), headers=_headers(), json={"transition": {"id": transition["id"]}})
-        resp.raise_for_status()
-        return {"key": issue_key, "new_status": transition_name}
+    async with resilience.client("jira", timeout=http_timeout()) as client:
+        return await _transition_issue(client, issue_key, transition_name)
 
 
 @tool
 async def get_sprint_board(board_id: int) -> dict:
     """Get active sprint information for a Jira board."""
-    async with httpx.AsyncClient() as client:
+    async with resilience.client("jira", timeout=http_timeout()) as client:
         resp = await client.get(f"{settings.jira_base_url}/rest/agile/1.0/board/{board_id}/sprint", headers=_headers(), params={"state": "active"})
         resp.raise_for_status()
         sprints = resp.json().get("values", [])
@@ -66,7 +254,75 @@ async def get_sprint_board(board_id: int) -> dict:
 @tool
 async def add_comment(issue_key: str, comment_body: str) -> dict:
     """Add a comment to a Jira issue."""
-    async with httpx.AsyncClient() as client:
-        resp = await client.post(_url(f"/issue/{issue_key}/comment"), headers=_headers(), json={"body": {"type": "doc", "version": 1, "content": [{"type": "paragraph", "content": [{"type": "text", "text": comment_body}]}]}})
+    async with resilience.client("jira", timeout=http_timeout()) as client:
+        resp = await client.post(
+            _url(f"/issue/{issue_key}/comment"),
+            headers=_headers(),
+            json={"body": _adf(comment_body)},
+        )
         resp.raise_for_status()
         return {"issue": issue_key, "comment_id": resp.json().get("id")}
+
+
+@tool
+async def bulk_create_issues(project_key: str, issues: list[dict]) -> dict:
+    """Create many Jira issues at once: dicts of 'summary', 'description', optional 'issue_type'."""
+    results: list[dict | None] = [None] * len(issues)
+    valid = []
+    for index, issue in enumerate(issues):
+        if isinstance(issue, dict) and issue.get("summary"):
+            valid.append((index, issue))
+        else:
+            summary = issue.get("description", "") if isinstance(issue, dict) else str(issue)
+            results[index] = {"summary": summary, "error": "Each issue needs a 'summary'"}
+    async with resilience.client("jira", timeout=http_timeout()) as client:
+        for start in range(0, len(valid), BULK_CREATE_CHUNK):
+            batch = valid[start:start + BULK_CREATE_CHUNK]
+            created = await _create_chunk(client, project_key, [i for _, i in batch])
+            for (index, _), result in zip(batch, created):
+                results[index] = result
+    return {
+        "created": sum(1 for r in results if "key" in r),
+        "failed": sum(1 for r in results if "error" in r),
+        "results": results,
+    }
+
+
+@tool
+async def bulk_transition_issues(issue_keys: list[str], transition_name: str) -> dict:
+    """Transition many Jira issues to the same status concurrently."""
+    async with resilience.client("jira", timeout=http_timeout()) as client:
+        states = {key.upper(): state for key in issue_keys if (state := _known_state(key))}
+        try:
+            unknown = [k for k in issue_keys if k.upper() not in states]
+            states.update(await _issue_states(client, unknown))
+        except httpx.HTTPError:
+            pass  # the issues of unknown state fall back to their own transitions
+        # Look up transitions once per uncached workflow state; its other issues reuse them.
+        pending = {}
+        for key, state in states.items():
+            if _cached_transitions(state) is None:
+                pending.setdefault(state, key)
+        await _bounded_per_item(client, list(pending.values()), _fetch_transitions)
+        results = await _bounded_per_item(
+            client,
+            issue_keys,
+            lambda c, key: _transition_issue(c, key, transition_name, states.get(key.upper())),
+        )
+    return {"transitioned": sum(1 for r in results if "error" not in r), "results": results}
+
+
+@tool
+async def bulk_add_comment(issue_keys: list[str], comment_body: str) -> dict:
+    """Add the same comment to many Jira issues concurrently."""
+
+    async def comment(client: httpx.AsyncClient, key: str) -> dict:
+        resp = await client.post(
+            _url(f"/issue/{key}/comment"), headers=_headers(), json={"body": _adf(comment_body)}
+        )
+        resp.raise_for_status()
+        return {"issue": key, "comment_id": resp.json().get("id")}
+
+    async with resilience.client("jira", timeout=http_timeout()) as client:
+        results = await _bounded_per_item(client, issue_keys, comment)
+    return {"commented": sum(1 for r in results if "error" not in r), "results": results}
@@ -1,7 +1,7 @@
 from app.agents.base import AgentCapability, AgentCard, BaseAgent
 from app.agents.kafka.tools import create_topic, delete_topic, describe_topic, list_topics, update_topic_config
 from app.config import settings
-from app.services.llm import get_llm
+from app.services.llm import cached_system_message, get_llm, select_tools
 
 
 class Agent(BaseAgent):
@@ -14,12 +14,11 @@ class Agent(BaseAgent):
         return [create_topic, list_topics, describe_topic, update_topic_config, delete_topic]
 
     async def invoke(self, task: str, context: dict) -> dict:
-        llm = get_llm(settings)
         tools = self.get_tools()
-        llm_with_tools = llm.bind_tools(tools)
-        from langchain_core.messages import HumanMessage, SystemMessage, ToolMessage
-        messages = [SystemMessage(content=self.get_system_prompt()), HumanMessage(content=task)]
-        response = await llm_with_tools.ainvoke(messages)
+        from langchain_core.messages import HumanMessage, ToolMessage
+        system = cached_system_message(settings, self.get_system_prompt())
+        messages = [system, HumanMessage(content=task)]
+        response = await select_tools(settings, "kafka", tools, messages)
         tools_used = []
         if response.tool_calls:
             tool_map = {t.name: t for t in tools}
@@ -30,7 +29,8 @@ class Agent(BaseAgent):
                     tools_used.append(tc["name"])
                     messages.append(response)
                     messages.append(ToolMessage(content=str(result), tool_call_id=tc["id"]))
-            final = await llm_with_tools.ainvoke(messages)
+            synthesis = get_llm(settings, "synthesis", "kafka").bind_tools(tools)
+            final = await synthesis.ainvoke(messages)
             return {"content": final.content, "tools_used": tools_used}
         return {"content": response.content, "tools_used": []}
 
@@ -1,3 +1,5 @@
-from app.agents.kubernetes.agent import KubernetesAgent
+from app.agents.kubernetes.agent import Agent
 
-__all__ = ["KubernetesAgent"]
+KubernetesAgent = Agent  # the name exported before the registry loaded every agent as ``Agent``
+
+__all__ = ["Agent", "KubernetesAgent"]
@@ -1,4 +1,4 @@
-from app.agents.base import AgentCard, BaseAgent
+from app.agents.base import AgentCapability, AgentCard, BaseAgent
 from app.agents.kubernetes.tools import (
     get_events,
     get_logs,
@@ -8,16 +8,66 @@ from app.agents.kubernetes.tools import (
     list_services,
     scale_deployment,
 )
+from app.config import settings
+from app.services.llm import cached_system_message, get_llm, select_tools
 
 
-class KubernetesAgent(BaseAgent):
+class Agent(BaseAgent):
     def get_card(self) -> AgentCard:
         return AgentCard(
             name="kubernetes",
-            description="Manage Kubernetes clusters directly - list pods, services, namespaces, get logs, scale deployments, view events",
-            icon="kubernetes",
-            category="infrastructure",
+            description=(
+                "Manages Kubernetes clusters directly - pods, services, namespaces, logs, events "
+                "and deployment scaling"
+            ),
+            capabilities=[
+                AgentCapability(
+                    name="workload_inspection",
+                    description="List pods, services and namespaces and check pod status",
+                    tools=["list_pods", "get_pod_status", "list_services", "list_namespaces"],
+                ),
+                AgentCapability(
+                    name="troubleshooting",
+                    description="Read pod logs and namespace events",
+                    tools=["get_logs", "get_events"],
+                ),
+                AgentCapability(
+                    name="scaling",
+                    description="Scale deployments up or down",
+                    tools=["scale_deployment"],
+                ),
+            ],
         )
 
-    def get_tools(self) -> list:
+    def get_tools(self):
         return [list_pods, get_pod_status, list_services, list_namespaces, get_logs, scale_deployment, get_events]
+
+    async def invoke(self, task: str, context: dict) -> dict:
+        tools = self.get_tools()
+        from langchain_core.messages import HumanMessage, ToolMessage
+        system = cached_system_message(settings, self.get_system_prompt())
+        messages = [system, HumanMessage(content=task)]
+        response = await select_tools(settings, "kubernetes", tools, messages)
+        tools_used = []
+        if response.tool_calls:
+            tool_map = {t.name: t for t in tools}
+            messages.append(response)  # once: every tool call's result answers this message
+            for tc in response.tool_calls:
+                fn = tool_map.get(tc["name"])
+                if fn:
+                    result = await fn.ainvoke(tc["args"])
+                    tools_used.append(tc["name"])
+                else:
+                    result = f"Unknown tool: {tc['name']}"
+                messages.append(ToolMessage(content=str(result), tool_call_id=tc["id"]))
+            synthesis = get_llm(settings, "synthesis", "kubernetes").bind_tools(tools)
+            final = await synthesis.ainvoke(messages)
+            return {"content": final.content, "tools_used": tools_used}
+        return {"content": response.content, "tools_used": []}
+
+    def get_system_prompt(self) -> str:
+        return (
+            "You are a Kubernetes operations agent. You inspect pods, services, namespaces and "
+            "events, read pod logs, and scale deployments with kubectl. Confirm the namespace "
+            "before scaling anything."
+        )
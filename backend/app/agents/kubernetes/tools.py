@@ -1,21 +1,17 @@
-import asyncio
 import logging
 
 from langchain_core.tools import tool
 
+from app.services import processes
+
 logger = logging.getLogger(__name__)
 
 
 async def _kubectl(args: list[str]) -> str:
     """Execute kubectl command safely using argument list (no shell injection)."""
     cmd = ["kubectl"] + args
-    proc = await asyncio.create_subprocess_exec(
-        *cmd,
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE,
-    )
-    stdout, stderr = await proc.communicate()
-    if proc.returncode != 0:
+    returncode, stdout, stderr = await processes.run(cmd)
+    if returncode != 0:
         raise RuntimeError(f"kubectl error: {stderr.decode().strip()}")
     return stdout.decode().strip()
 
@@ -0,0 +1,96 @@
+"""Static agent manifest.
+
+``manifest.json`` holds every agent's card and tool schemas, generated from the
+agent code. At startup the registry reads it instead of importing the agents,
+so langchain, the provider SDKs and the tool modules are not needed to list
+agents, route messages or serve cards. Regenerate it after changing an agent:
+
+    python -m app.agents.manifest          # or: make agents-manifest
+
+The test suite fails when the file is out of date.
+"""
+
+import argparse
+import importlib
+import json
+import sys
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from app.agents.base import BaseAgent
+
+MANIFEST = Path(__file__).parent / "manifest.json"
+
+AGENT_MODULES = [
+    "app.agents.github.agent",
+    "app.agents.argocd.agent",
+    "app.agents.flux.agent",
+    "app.agents.jira.agent",
+    "app.agents.slack.agent",
+    "app.agents.pagerduty.agent",
+    "app.agents.backstage.agent",
+    "app.agents.kafka.agent",
+    "app.agents.vault.agent",
+    "app.agents.rancher.agent",
+    "app.agents.policy.agent",
+    "app.agents.kubernetes.agent",
+]
+
+
+@dataclass(frozen=True)
+class AgentSpec:
+    """What the registry knows about an agent without importing it."""
+
+    name: str
+    module: str
+    card: dict  # AgentCard.model_dump()
+    tools: list[dict]  # name, description, parameters (JSON schema)
+
+    @classmethod
+    def from_agent(cls, agent: BaseAgent, module: str = "") -> "AgentSpec":
+        from langchain_core.utils.function_calling import convert_to_openai_tool
+
+        card = agent.get_card().model_dump()
+        tools = [
+            {
+                "name": t.name,
+                "description": t.description,
+                "parameters": convert_to_openai_tool(t)["function"]["parameters"],
+            }
+            for t in agent.get_tools()
+        ]
+        module = module or type(agent).__module__
+        return cls(name=card["name"], module=module, card=card, tools=tools)
+
+
+def load_manifest(path: Path = MANIFEST) -> dict[str, AgentSpec]:
+    entries = json.loads(path.read_text())["agents"]
+    return {entry["name"]: AgentSpec(**entry) for entry in entries}
+
+
+def build_manifest(modules: list[str] = AGENT_MODULES) -> list[AgentSpec]:
+    """Import every agent module and describe it. Any broken module is an error, not a warning."""
+    return [
+        AgentSpec.from_agent(importlib.import_module(module).Agent(), module) for module in modules
+    ]
+
+
+def render(specs: list[AgentSpec]) -> str:
+    return json.dumps({"agents": [asdict(spec) for spec in specs]}, indent=2) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Regenerate the static agent manifest")
+    parser.add_argument("--check", action="store_true", help="fail if manifest.json is out of date")
+    args = parser.parse_args()
+    content = render(build_manifest())
+    if args.check:
+        if not MANIFEST.exists() or MANIFEST.read_text() != content:
+            sys.exit(f"{MANIFEST} is out of date; run: python -m app.agents.manifest")
+        return
+    MANIFEST.write_text(content)
+    print(f"Wrote {len(AGENT_MODULES)} agents to {MANIFEST}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,40 @@
 from app.agents.base import AgentCapability, AgentCard, BaseAgent
-from app.agents.pagerduty.tools import acknowledge_incident, get_on_call_schedule, list_incidents, resolve_incident, trigger_incident
+from app.agents.pagerduty.tools import (
+    acknowledge_incident,
+    get_on_call_schedule,
+    list_incidents,
+    query_incidents,
+    resolve_incident,
+    trigger_incident,
+)
 from app.config import settings
-from app.services.llm import get_llm
+from app.services.llm import cached_system_message, get_llm, select_tools
 
 
 class Agent(BaseAgent):
     def get_card(self) -> AgentCard:
         return AgentCard(name="pagerduty", description="Manages PagerDuty incidents, on-call schedules, and alerting", capabilities=[
             AgentCapability(name="incident_management", description="List, acknowledge, resolve, and trigger incidents", tools=["list_incidents", "acknowledge_incident", "resolve_incident", "trigger_incident"]),
+            AgentCapability(
+                name="incident_search",
+                description="Filter recent incidents by service, urgency, status and time",
+                tools=["query_incidents"],
+            ),
             AgentCapability(name="on_call", description="View on-call schedules", tools=["get_on_call_schedule"]),
         ])
 
     def get_tools(self):
-        return [list_incidents, acknowledge_incident, resolve_incident, get_on_call_schedule, trigger_incident]
+        return [
+            list_incidents, acknowledge_incident, resolve_incident, get_on_call_schedule,
+            trigger_incident, query_incidents,
+        ]
 
     async def invoke(self, task: str, context: dict) -> dict:
-        llm = get_llm(settings)
         tools = self.get_tools()
-        llm_with_tools = llm.bind_tools(tools)
-        from langchain_core.messages import HumanMessage, SystemMessage, ToolMessage
-        messages = [SystemMessage(content=self.get_system_prompt()), HumanMessage(content=task)]
-        response = await llm_with_tools.ainvoke(messages)
+        from langchain_core.messages import HumanMessage, ToolMessage
+        system = cached_system_message(settings, self.get_system_prompt())
+        messages = [system, HumanMessage(content=task)]
+        response = await select_tools(settings, "pagerduty", tools, messages)
         tools_used = []
         if response.tool_calls:
             tool_map = {t.name: t for t in tools}
@@ -31,7 +45,8 @@ class Agent(BaseAgent):
                     tools_used.append(tc["name"])
                     messages.append(response)
                     messages.append(ToolMessage(content=str(result), tool_call_id=tc["id"]))
-            final = await llm_with_tools.ainvoke(messages)
+            synthesis = get_llm(settings, "synthesis", "pagerduty").bind_tools(tools)
+            final = await synthesis.ainvoke(messages)
             return {"content": final.content, "tools_used": tools_used}
         return {"content": response.content, "tools_used": []}
 
@@ -0,0 +1,295 @@
+"""Local mirror of PagerDuty incidents with in-memory query indexes.
+
+A background task performs an initial load of recent incidents, then polls
+``/log_entries`` with a ``since`` cursor to pick up new and changed incidents
+(log entries embed the full incident via ``include[]=incidents``). Incidents are
+persisted to Postgres when a database is configured, so a restart resumes from the
+stored state instead of reloading the whole window, and indexed in memory by
+service, urgency, status and creation time so queries never hit the PagerDuty API.
+Incidents older than ``pagerduty_mirror_days`` are evicted after every sync. If
+syncs keep failing for ``STALE_AFTER_SYNCS`` intervals the mirror stops reporting
+ready, so the tools go back to the PagerDuty API instead of serving stale data.
+"""
+
+import asyncio
+import bisect
+import logging
+import time
+from collections import defaultdict
+from datetime import UTC, datetime, timedelta
+
+import httpx
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+
+from app.config import settings
+from app.models import PagerDutyIncident
+from app.services.database import get_session, is_db_available
+
+logger = logging.getLogger(__name__)
+
+PD_API = "https://api.pagerduty.com"
+PAGE_SIZE = 100
+STALE_AFTER_SYNCS = 5  # failed sync intervals before the mirror stops serving queries
+
+
+def _headers() -> dict:
+    return {
+        "Authorization": f"Token token={settings.pagerduty_api_key}",
+        "Content-Type": "application/json",
+        "Accept": "application/vnd.pagerduty+json;version=2",
+    }
+
+
+def _parse_time(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def _iso(value: datetime) -> str:
+    """Canonical UTC timestamp, so index entries sort and compare as strings."""
+    return value.astimezone(UTC).isoformat()
+
+
+def summarize(raw: dict) -> dict:
+    """Normalize a PagerDuty API incident into the shape served by the tools."""
+    return {
+        "id": raw["id"],
+        "title": raw.get("title", ""),
+        "status": raw.get("status", ""),
+        "urgency": raw.get("urgency", ""),
+        "service_id": raw.get("service", {}).get("id", ""),
+        "service": raw.get("service", {}).get("summary", ""),
+        "created_at": _iso(_parse_time(raw["created_at"])),
+        "updated_at": _iso(_parse_time(raw.get("last_status_change_at") or raw["created_at"])),
+        "url": raw.get("html_url", ""),
+    }
+
+
+class IncidentMirror:
+    def __init__(self):
+        self._incidents: dict[str, dict] = {}
+        self._by_service: defaultdict[str, set[str]] = defaultdict(set)
+        self._by_urgency: defaultdict[str, set[str]] = defaultdict(set)
+        self._by_status: defaultdict[str, set[str]] = defaultdict(set)
+        self._by_created: list[tuple[str, str]] = []  # sorted (created_at, id)
+        self._cursor: datetime | None = None
+        self._task: asyncio.Task | None = None
+        self._synced_at = 0.0  # monotonic time of the last successful sync
+        self.ready = False
+
+    # -- indexing ---------------------------------------------------------
+
+    def upsert(self, incident: dict):
+        previous = self._incidents.get(incident["id"])
+        if previous:
+            self._unindex(previous)
+        self._incidents[incident["id"]] = incident
+        self._by_service[incident["service"].lower()].add(incident["id"])
+        self._by_service[incident["service_id"]].add(incident["id"])
+        self._by_urgency[incident["urgency"]].add(incident["id"])
+        self._by_status[incident["status"]].add(incident["id"])
+        bisect.insort(self._by_created, (incident["created_at"], incident["id"]))
+        updated = _parse_time(incident["updated_at"])
+        if self._cursor is None or updated > self._cursor:
+            self._cursor = updated
+
+    def evict(self, before: datetime) -> int:
+        """Drop incidents created before the given time; returns how many were dropped."""
+        cutoff = bisect.bisect_left(self._by_created, _iso(before), key=lambda e: e[0])
+        for _, incident_id in self._by_created[:cutoff]:
+            incident = self._incidents.pop(incident_id)
+            self._by_service[incident["service"].lower()].discard(incident_id)
+            self._by_service[incident["service_id"]].discard(incident_id)
+            self._by_urgency[incident["urgency"]].discard(incident_id)
+            self._by_status[incident["status"]].discard(incident_id)
+        del self._by_created[:cutoff]
+        return cutoff
+
+    def _unindex(self, incident: dict):
+        self._by_service[incident["service"].lower()].discard(incident["id"])
+        self._by_service[incident["service_id"]].discard(incident["id"])
+        self._by_urgency[incident["urgency"]].discard(incident["id"])
+        self._by_status[incident["status"]].discard(incident["id"])
+        pos = bisect.bisect_left(self._by_created, (incident["created_at"], incident["id"]))
+        if pos < len(self._by_created) and self._by_created[pos][1] == incident["id"]:
+            self._by_created.pop(pos)
+
+    def query(
+        self,
+        statuses: list[str] | None = None,
+        urgency: str = "",
+        service: str = "",
+        since: datetime | None = None,
+        until: datetime | None = None,
+        limit: int = 50,
+    ) -> list[dict]:
+        """Return incidents matching all filters, newest first."""
+        candidates: set[str] | None = None
+        if statuses:
+            candidates = set().union(*(self._by_status.get(s, set()) for s in statuses))
+        if urgency:
+            matched = self._by_urgency.get(urgency, set())
+            candidates = matched if candidates is None else candidates & matched
+        if service:
+            matched = self._by_service.get(service.lower()) or self._by_service.get(service, set())
+            candidates = matched if candidates is None else candidates & matched
+
+        by_created = self._by_created
+        lo, hi = 0, len(by_created)
+        if since:
+            lo = bisect.bisect_left(by_created, _iso(since), key=lambda e: e[0])
+        if until:
+            hi = bisect.bisect_right(by_created, _iso(until), key=lambda e: e[0])
+        results = []
+        for _, incident_id in reversed(self._by_created[lo:hi]):
+            if candidates is None or incident_id in candidates:
+                results.append(self._incidents[incident_id])
+                if len(results) >= limit:
+                    break
+        return results
+
+    # -- sync -------------------------------------------------------------
+
+    def start(self):
+        if self._task is None and settings.pagerduty_api_key:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        await self._load_from_db()
+        async with httpx.AsyncClient(timeout=settings.http_timeout) as client:
+            while True:
+                try:
+                    if self._cursor is None:
+                        await self._initial_load(client)
+                    else:
+                        await self._sync_changes(client)
+                    await self._evict_expired()
+                    self._synced_at = time.monotonic()
+                    self.ready = True
+                except httpx.HTTPError as e:
+                    logger.warning(f"PagerDuty incident sync failed: {e}")
+                except Exception:
+                    logger.exception("PagerDuty incident sync failed")
+                stale_after = STALE_AFTER_SYNCS * settings.pagerduty_sync_interval
+                if self.ready and time.monotonic() - self._synced_at > stale_after:
+                    logger.warning(
+                        "PagerDuty mirror is stale; "
+                        "serving incidents from the API until a sync succeeds"
+                    )
+                    self.ready = False
+                await asyncio.sleep(settings.pagerduty_sync_interval)
+
+    async def _evict_expired(self):
+        cutoff = datetime.now(UTC) - timedelta(days=settings.pagerduty_mirror_days)
+        self.evict(cutoff)
+        if is_db_available():
+            try:
+                async with get_session() as session:
+                    await session.execute(
+                        delete(PagerDutyIncident).where(PagerDutyIncident.created_at < cutoff)
+                    )
+            except Exception as e:
+                logger.warning(f"Failed to evict PagerDuty incidents from database: {e}")
+
+    async def _initial_load(self, client: httpx.AsyncClient):
+        started = datetime.now(UTC)
+        since = started - timedelta(days=settings.pagerduty_mirror_days)
+        incidents = await self._paginate(client, "/incidents", "incidents", {
+            "since": _iso(since), "until": _iso(started), "sort_by": "created_at:desc",
+        })
+        await self._apply(incidents)
+        self._cursor = max(self._cursor or started, started)
+        logger.info(f"PagerDuty mirror loaded {len(incidents)} incidents")
+
+    async def _sync_changes(self, client: httpx.AsyncClient):
+        entries = await self._paginate(client, "/log_entries", "log_entries", {
+            "since": _iso(self._cursor), "include[]": "incidents", "is_overview": "true",
+        })
+        changed = {
+            e["incident"]["id"]: e["incident"]
+            for e in entries if e.get("incident", {}).get("created_at")
+        }
+        await self._apply(list(changed.values()))
+        if entries:
+            self._cursor = max(self._cursor, *(_parse_time(e["created_at"]) for e in entries))
+
+    async def _paginate(
+        self, client: httpx.AsyncClient, path: str, key: str, params: dict
+    ) -> list[dict]:
+        items, offset = [], 0
+        while True:
+            page = {**params, "limit": PAGE_SIZE, "offset": offset}
+            resp = await client.get(f"{PD_API}{path}", headers=_headers(), params=page)
+            resp.raise_for_status()
+            data = resp.json()
+            items.extend(data.get(key, []))
+            if not data.get("more"):
+                return items
+            offset += PAGE_SIZE
+
+    async def _apply(self, raw_incidents: list[dict]):
+        incidents = [summarize(r) for r in raw_incidents]
+        for incident in incidents:
+            self.upsert(incident)
+        if incidents and is_db_available():
+            await self._persist(incidents, raw_incidents)
+
+    # -- persistence ------------------------------------------------------
+
+    async def _persist(self, incidents: list[dict], raw_incidents: list[dict]):
+        rows = [
+            {
+                "id": i["id"], "title": i["title"], "status": i["status"], "urgency": i["urgency"],
+                "service_id": i["service_id"], "service_name": i["service"], "url": i["url"],
+                "created_at": _parse_time(i["created_at"]),
+                "updated_at": _parse_time(i["updated_at"]),
+                "raw": raw,
+            }
+            for i, raw in zip(incidents, raw_incidents)
+        ]
+        stmt = insert(PagerDutyIncident).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[PagerDutyIncident.id],
+            set_={
+                c: stmt.excluded[c]
+                for c in (
+                    "title", "status", "urgency", "service_id", "service_name", "updated_at", "url",
+                    "raw",
+                )
+            },
+        )
+        try:
+            async with get_session() as session:
+                await session.execute(stmt)
+        except Exception as e:
+            logger.warning(f"Failed to persist PagerDuty incidents: {e}")
+
+    async def _load_from_db(self):
+        if not is_db_available():
+            return
+        since = datetime.now(UTC) - timedelta(days=settings.pagerduty_mirror_days)
+        try:
+            async with get_session() as session:
+                query = select(PagerDutyIncident.raw).where(PagerDutyIncident.created_at >= since)
+                rows = (await session.execute(query)).scalars().all()
+        except Exception as e:
+            logger.warning(f"Failed to load PagerDuty mirror from database: {e}")
+            return
+        for raw in rows:
+            self.upsert(summarize(raw))
+        if rows:
+            self._synced_at = time.monotonic()
+            self.ready = True
+            logger.info(f"PagerDuty mirror restored {len(rows)} incidents from database")
+
+
+incident_mirror = IncidentMirror()
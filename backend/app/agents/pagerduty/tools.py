@@ -1,7 +1,11 @@
-import httpx
+from datetime import UTC, datetime, timedelta
+
 from langchain_core.tools import tool
 
+from app.agents.pagerduty.mirror import incident_mirror, summarize
 from app.config import settings
+from app.services import resilience
+from app.services.deadline import http_timeout
 
 PD_API = "https://api.pagerduty.com"
 
@@ -13,16 +17,20 @@ def _headers() -> dict:
 @tool
 async def list_incidents(status: str = "triggered,acknowledged", limit: int = 10) -> list[dict]:
     """List PagerDuty incidents filtered by status (triggered, acknowledged, resolved)."""
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(f"{PD_API}/incidents", headers=_headers(), params={"statuses[]": status.split(","), "limit": limit, "sort_by": "created_at:desc"})
+    if incident_mirror.ready:
+        return incident_mirror.query(statuses=status.split(","), limit=limit)
+    # Same shape as the mirror's, so answers do not depend on whether it has synced.
+    params = {"statuses[]": status.split(","), "limit": limit, "sort_by": "created_at:desc"}
+    async with resilience.client("pagerduty", timeout=http_timeout()) as client:
+        resp = await client.get(f"{PD_API}/incidents", headers=_headers(), params=params)
         resp.raise_for_status()
-        return [{"id": i["id"], "title": i["title"], "status": i["status"], "urgency": i["urgency"], "service": i["service"]["summary"], "created_at": i["created_at"], "url": i["html_url"]} for i in resp.json().get("incidents", [])]
+        return [summarize(i) for i in resp.json().get("incidents", [])]
 
 
 @tool
 async def acknowledge_incident(incident_id: str) -> dict:
     """Acknowledge a PagerDuty incident."""
-    async with httpx.AsyncClient() as client:
+    async with resilience.client("pagerduty", timeout=http_timeout()) as client:
         resp = await client.put(f"{PD_API}/incidents/{incident_id}", headers={**_headers(), "From": "idpportal@example.com"}, json={"incident": {"type": "incident_reference", "status": "acknowledged"}})
         resp.raise_for_status()
         return {"id": incident_id, "status": "acknowledged"}
@@ -31,7 +39,7 @@ async def acknowledge_incident(incident_id: str) -> dict:
 @tool
 async def resolve_incident(incident_id: str) -> dict:
     """Resolve a PagerDuty incident."""
-    async with httpx.AsyncClient() as client:
+    async with resilience.client("pagerduty", timeout=http_timeout()) as client:
         resp = await client.put(f"{PD_API}/incidents/{incident_id}", headers={**_headers(), "From": "idpportal@example.com"}, json={"incident": {"type": "incident_reference", "status": "resolved"}})
         resp.raise_for_status()
         return {"id": incident_id, "status": "resolved"}
@@ -40,7 +48,7 @@ async def resolve_incident(incident_id: str) -> dict:
 @tool
 async def get_on_call_schedule(schedule_id: str) -> dict:
     """Get the current on-call schedule from PagerDuty."""
-    async with httpx.AsyncClient() as client:
+    async with resilience.client("pagerduty", timeout=http_timeout()) as client:
         resp = await client.get(f"{PD_API}/schedules/{schedule_id}", headers=_headers(), params={"include[]": "users"})
         resp.raise_for_status()
         schedule = resp.json().get("schedule", {})
@@ -51,8 +59,25 @@ async def get_on_call_schedule(schedule_id: str) -> dict:
 @tool
 async def trigger_incident(service_id: str, title: str, description: str, urgency: str = "high") -> dict:
     """Create a new PagerDuty incident."""
-    async with httpx.AsyncClient() as client:
+    async with resilience.client("pagerduty", timeout=http_timeout()) as client:
         resp = await client.post(f"{PD_API}/incidents", headers={**_headers(), "From": "idpportal@example.com"}, json={"incident": {"type": "incident", "title": title, "service": {"id": service_id, "type": "service_reference"}, "urgency": urgency, "body": {"type": "incident_body", "details": description}}})
         resp.raise_for_status()
         data = resp.json().get("incident", {})
         return {"id": data.get("id"), "title": title, "status": data.get("status"), "url": data.get("html_url")}
+
+
+@tool
+async def query_incidents(
+    service: str = "", urgency: str = "", status: str = "", since_hours: int = 168, limit: int = 50
+) -> dict:
+    """Query recent incidents from the mirror by service, urgency (high, low), status and age."""
+    if not incident_mirror.ready:
+        return {"error": "Incident mirror is still syncing; use list_incidents instead"}
+    incidents = incident_mirror.query(
+        statuses=status.split(",") if status else None,
+        urgency=urgency,
+        service=service,
+        since=datetime.now(UTC) - timedelta(hours=since_hours),
+        limit=limit,
+    )
+    return {"count": len(incidents), "incidents": incidents}
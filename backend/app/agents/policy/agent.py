@@ -1,27 +1,36 @@
 from app.agents.base import AgentCapability, AgentCard, BaseAgent
-from app.agents.policy.tools import fix_violations, generate_config, list_policies, validate_config
+from app.agents.policy.tools import (
+    fix_violations,
+    generate_config,
+    list_policies,
+    validate_config,
+    validate_configs,
+)
 from app.config import settings
-from app.services.llm import get_llm
+from app.services.llm import cached_system_message, get_llm, select_tools
 
 
 class Agent(BaseAgent):
     def get_card(self) -> AgentCard:
         return AgentCard(name="policy", description="Validates configs against OPA/Rego policies, generates compliant configs, and auto-fixes violations using AI", capabilities=[
-            AgentCapability(name="validation", description="Validate configurations against policies", tools=["validate_config", "list_policies"]),
+            AgentCapability(
+                name="validation",
+                description="Validate configurations against policies",
+                tools=["validate_config", "validate_configs", "list_policies"],
+            ),
             AgentCapability(name="generation", description="Generate policy-compliant configs from requirements", tools=["generate_config"]),
             AgentCapability(name="remediation", description="Auto-fix policy violations", tools=["fix_violations"]),
         ])
 
     def get_tools(self):
-        return [validate_config, generate_config, fix_violations, list_policies]
+        return [validate_config, validate_configs, generate_config, fix_violations, list_policies]
 
     async def invoke(self, task: str, context: dict) -> dict:
-        llm = get_llm(settings)
         tools = self.get_tools()
-        llm_with_tools = llm.bind_tools(tools)
-        from langchain_core.messages import HumanMessage, SystemMessage, ToolMessage
-        messages = [SystemMessage(content=self.get_system_prompt()), HumanMessage(content=task)]
-        response = await llm_with_tools.ainvoke(messages)
+        from langchain_core.messages import HumanMessage, ToolMessage
+        system = cached_system_message(settings, self.get_system_prompt())
+        messages = [system, HumanMessage(content=task)]
+        response = await select_tools(settings, "policy", tools, messages)
         tools_used = []
         if response.tool_calls:
             tool_map = {t.name: t for t in tools}
@@ -32,7 +41,8 @@ class Agent(BaseAgent):
                     tools_used.append(tc["name"])
                     messages.append(response)
                     messages.append(ToolMessage(content=str(result), tool_call_id=tc["id"]))
-            final = await llm_with_tools.ainvoke(messages)
+            synthesis = get_llm(settings, "synthesis", "policy").bind_tools(tools)
+            final = await synthesis.ainvoke(messages)
             return {"content": final.content, "tools_used": tools_used}
         return {"content": response.content, "tools_used": []}
 
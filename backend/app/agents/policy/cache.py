@@ -0,0 +1,85 @@
+"""Content-addressed cache of policy validation results.
+
+Results are keyed by a hash of the domain, the normalized config and the version
+of the Rego bundle in ``settings.policies_dir``. Because the bundle version is part
+of the key, editing a policy naturally misses the cache. Configs that only differ
+in formatting, key order or comments normalize to the same key. Without a readable
+policies directory the bundle version is unknown and nothing is cached.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import yaml
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+MAX_ENTRIES = 4096
+BUNDLE_CHECK_INTERVAL = 5.0  # seconds between policies_dir mtime scans
+
+_results: OrderedDict[str, dict] = OrderedDict()
+_bundle: dict = {"checked_at": 0.0, "stamp": None, "version": None}
+
+
+def normalize_config(config_yaml: str) -> str:
+    try:
+        documents = list(yaml.safe_load_all(config_yaml))
+    except yaml.YAMLError:
+        return config_yaml.strip()
+    return json.dumps(documents, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def bundle_version() -> str | None:
+    """Hash of all .rego files under policies_dir, recomputed only when their mtimes change."""
+    now = time.monotonic()
+    if now - _bundle["checked_at"] < BUNDLE_CHECK_INTERVAL:
+        return _bundle["version"]
+    _bundle["checked_at"] = now
+
+    root = Path(settings.policies_dir)
+    if not root.is_dir():
+        if _bundle["version"] is not None or _bundle["stamp"] is None:
+            logger.warning(f"Policies directory {root} not found - validation caching disabled")
+        _bundle.update(stamp=(), version=None)
+        return None
+
+    files = sorted(root.rglob("*.rego"))
+    stamp = tuple((str(f), os.stat(f).st_mtime_ns, os.stat(f).st_size) for f in files)
+    if stamp != _bundle["stamp"]:
+        digest = hashlib.sha256()
+        for f in files:
+            digest.update(str(f.relative_to(root)).encode())
+            digest.update(f.read_bytes())
+        _bundle.update(stamp=stamp, version=digest.hexdigest()[:16])
+    return _bundle["version"]
+
+
+def cache_key(domain: str, config_yaml: str) -> str | None:
+    version = bundle_version()
+    if version is None:
+        return None
+    payload = f"{version}\0{domain}\0{normalize_config(config_yaml)}"
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def get(key: str | None) -> dict | None:
+    if key is None or key not in _results:
+        return None
+    _results.move_to_end(key)
+    return _results[key]
+
+
+def put(key: str | None, result: dict):
+    if key is None:
+        return
+    _results[key] = result
+    _results.move_to_end(key)
+    while len(_results) > MAX_ENTRIES:
+        _results.popitem(last=False)
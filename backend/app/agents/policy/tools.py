@@ -1,31 +1,89 @@
-import httpx
 from langchain_core.tools import tool
 
+from app.agents.policy import cache
 from app.config import settings
+from app.services import resilience
+from app.services.deadline import http_timeout
+
+
+def _shape(domain: str, data: dict) -> dict:
+    violations = data.get("violations") or []
+    return {
+        "valid": data.get("valid", False),
+        "violations": violations,
+        "violations_count": len(violations),
+        "domain": domain,
+    }
 
 
 @tool
 async def validate_config(domain: str, config_yaml: str) -> dict:
     """Validate a configuration against OPA/Rego policies. Domains: kafka, kubernetes, terraform, cicd, gitops."""
-    async with httpx.AsyncClient() as client:
+    key = cache.cache_key(domain, config_yaml)
+    cached = cache.get(key)
+    if cached is not None:
+        return {**cached, "cached": True}
+    async with resilience.client("policy", idempotent=True, timeout=http_timeout()) as client:
         resp = await client.post(
             f"{settings.policy_agent_url}/validate",
             json={"domain": domain, "config": config_yaml},
         )
         resp.raise_for_status()
-        data = resp.json()
-        return {
-            "valid": data.get("valid", False),
-            "violations": data.get("violations", []),
-            "violations_count": len(data.get("violations", [])),
-            "domain": domain,
-        }
+        result = _shape(domain, resp.json())
+        cache.put(key, result)
+        return result
+
+
+async def validate_many(items: list[dict]) -> list[dict]:
+    """Validate many {domain, config} items, sending only cache misses in one batch request."""
+    keys = [cache.cache_key(i["domain"], i["config"]) for i in items]
+    results: list[dict | None] = [cache.get(k) for k in keys]
+    results = [{**r, "cached": True} if r is not None else None for r in results]
+
+    misses: dict[str, list[int]] = {}  # identical configs in one batch are validated once
+    for idx, (item, key) in enumerate(zip(items, keys)):
+        if results[idx] is None:
+            misses.setdefault(key or f"uncached-{idx}", []).append(idx)
+    if misses:
+        batch = [items[positions[0]] for positions in misses.values()]
+        async with resilience.client("policy", idempotent=True, timeout=http_timeout()) as client:
+            resp = await client.post(
+                f"{settings.policy_agent_url}/validate/batch",
+                json={"items": [{"domain": i["domain"], "config": i["config"]} for i in batch]},
+            )
+            resp.raise_for_status()
+        answered = resp.json().get("results", [])
+        if len(answered) < len(batch):  # never leave a config without a result
+            error = f"The policy agent returned {len(answered)} results for {len(batch)} configs"
+            answered = answered + [{"error": error}] * (len(batch) - len(answered))
+        for (key, positions), item, data in zip(misses.items(), batch, answered):
+            if data.get("error"):
+                result = {"valid": False, "error": data["error"], "domain": item["domain"]}
+            else:
+                result = _shape(item["domain"], data)
+                cache.put(keys[positions[0]], result)
+            for idx in positions:
+                results[idx] = result
+    return results
+
+
+@tool
+async def validate_configs(items: list[dict]) -> dict:
+    """Validate several configurations in one call.
+
+    Each item is {"domain": ..., "config": <yaml>}; unchanged configs are served from cache.
+    """
+    results = await validate_many(items)
+    return {
+        "all_valid": all(r.get("valid") for r in results),
+        "results": results,
+    }
 
 
 @tool
 async def generate_config(domain: str, requirements: str) -> dict:
     """Generate a policy-compliant configuration using AI. Provide natural language requirements."""
-    async with httpx.AsyncClient(timeout=60) as client:
+    async with resilience.client("policy", timeout=http_timeout(60)) as client:
         resp = await client.post(
             f"{settings.policy_agent_url}/generate",
             json={"domain": domain, "requirements": requirements},
@@ -37,7 +95,7 @@ async def generate_config(domain: str, requirements: str) -> dict:
 @tool
 async def fix_violations(domain: str, config_yaml: str, violations: list[str]) -> dict:
     """Auto-fix policy violations in a configuration using AI remediation."""
-    async with httpx.AsyncClient(timeout=60) as client:
+    async with resilience.client("policy", timeout=http_timeout(60)) as client:
         resp = await client.post(
             f"{settings.policy_agent_url}/fix",
             json={"domain": domain, "config": config_yaml, "violations": violations},
@@ -50,7 +108,7 @@ async def fix_violations(domain: str, config_yaml: str, violations: list[str]) -
 async def list_policies(domain: str = "") -> list[dict]:
     """List available OPA/Rego policies, optionally filtered by domain."""
     path = f"/policies/{domain}" if domain else "/policies"
-    async with httpx.AsyncClient() as client:
+    async with resilience.client("policy", timeout=http_timeout()) as client:
         resp = await client.get(f"{settings.policy_agent_url}{path}")
         resp.raise_for_status()
         return resp.json().get("policies", [])
@@ -1,7 +1,11 @@
+import asyncio
+
 import httpx
 from langchain_core.tools import tool
 
 from app.config import settings
+from app.services import resilience
+from app.services.deadline import http_timeout
 
 
 def _headers() -> dict:
@@ -13,12 +17,40 @@ def _headers() -> dict:
 
 def _client() -> httpx.AsyncClient:
     """Create HTTP client with configurable TLS verification."""
-    return httpx.AsyncClient(
+    return resilience.client(
+        "rancher",
         verify=settings.rancher_verify_tls,
-        timeout=settings.http_timeout,
+        timeout=http_timeout(),
     )
 
 
+def _cluster_status(c: dict) -> dict:
+    return {
+        "id": c["id"],
+        "name": c["name"],
+        "state": c["state"],
+        "provider": c.get("driver", ""),
+        "k8s_version": c.get("version", {}).get("gitVersion", ""),
+        "node_count": c.get("nodeCount", 0),
+        "cpu": c.get("allocatable", {}).get("cpu", ""),
+        "memory": c.get("allocatable", {}).get("memory", ""),
+        "conditions": [
+            {"type": cd["type"], "status": cd["status"]}
+            for cd in c.get("conditions", [])[:5]
+        ],
+    }
+
+
+def _cluster_event(e: dict) -> dict:
+    return {
+        "type": e.get("eventType", ""),
+        "reason": e.get("reason", ""),
+        "message": e.get("message", ""),
+        "source": e.get("source", {}).get("component", ""),
+        "created": e.get("created", ""),
+    }
+
+
 @tool
 async def list_clusters() -> list[dict]:
     """List all Kubernetes clusters managed by Rancher."""
@@ -49,21 +81,7 @@ async def get_cluster_status(cluster_id: str) -> dict:
             headers=_headers(),
         )
         resp.raise_for_status()
-        c = resp.json()
-        return {
-            "id": c["id"],
-            "name": c["name"],
-            "state": c["state"],
-            "provider": c.get("driver", ""),
-            "k8s_version": c.get("version", {}).get("gitVersion", ""),
-            "node_count": c.get("nodeCount", 0),
-            "cpu": c.get("allocatable", {}).get("cpu", ""),
-            "memory": c.get("allocatable", {}).get("memory", ""),
-            "conditions": [
-                {"type": cd["type"], "status": cd["status"]}
-                for cd in c.get("conditions", [])[:5]
-            ],
-        }
+        return _cluster_status(resp.json())
 
 
 @tool
@@ -94,13 +112,89 @@ async def get_cluster_events(cluster_id: str, limit: int = 20) -> list[dict]:
             params={"limit": limit, "sort": "created", "order": "desc"},
         )
         resp.raise_for_status()
-        return [
-            {
-                "type": e.get("eventType", ""),
-                "reason": e.get("reason", ""),
-                "message": e.get("message", ""),
-                "source": e.get("source", {}).get("component", ""),
-                "created": e.get("created", ""),
-            }
-            for e in resp.json().get("data", [])
-        ]
+        return [_cluster_event(e) for e in resp.json().get("data", [])]
+
+
+def _cluster_health_score(status: dict, events: list[dict]) -> int:
+    """Rank clusters for fleet views: higher scores are less healthy."""
+    score = 0
+    if status.get("state") != "active":
+        score += 100
+    score += 10 * sum(1 for cd in status.get("conditions", []) if cd.get("status") != "True")
+    score += sum(1 for e in events if e.get("type") == "Warning")
+    return score
+
+
+async def _fetch_cluster_health(
+    client: httpx.AsyncClient, cluster: dict, event_limit: int
+) -> dict:
+    base = f"{settings.rancher_server_url}/v3/clusters/{cluster['id']}"
+    status_resp, events_resp = await asyncio.gather(
+        client.get(base, headers=_headers()),
+        client.get(
+            f"{base}/events",
+            headers=_headers(),
+            params={"limit": event_limit, "sort": "created", "order": "desc"},
+        ),
+    )
+    status_resp.raise_for_status()
+    events_resp.raise_for_status()
+    status = _cluster_status(status_resp.json())
+    events = [_cluster_event(e) for e in events_resp.json().get("data", [])]
+    return {
+        **status,
+        "events": events,
+        "health_score": _cluster_health_score(status, events),
+    }
+
+
+@tool
+async def get_fleet_health(
+    unhealthy_only: bool = False, event_limit: int = 10
+) -> dict:
+    """Check status and recent events of every Rancher-managed cluster concurrently.
+
+    Returns clusters ranked from least to most healthy, plus the clusters that
+    could not be queried within the per-cluster timeout.
+    """
+    # Each cluster takes two requests (status and events) from the integration's bulkhead.
+    semaphore = asyncio.Semaphore(
+        min(settings.rancher_fleet_concurrency, max(1, settings.integration_max_concurrent // 2))
+    )
+
+    async with _client() as client:
+        resp = await client.get(
+            f"{settings.rancher_server_url}/v3/clusters", headers=_headers()
+        )
+        resp.raise_for_status()
+        clusters = resp.json().get("data", [])
+
+        async def probe(cluster: dict) -> dict:
+            async with semaphore:
+                return await asyncio.wait_for(
+                    _fetch_cluster_health(client, cluster, event_limit),
+                    timeout=settings.rancher_cluster_timeout,
+                )
+
+        results = await asyncio.gather(
+            *(probe(c) for c in clusters), return_exceptions=True
+        )
+
+    ranked, failed = [], []
+    for cluster, result in zip(clusters, results):
+        if isinstance(result, BaseException):
+            error = "timed out" if isinstance(result, TimeoutError) else str(result)
+            failed.append({"id": cluster["id"], "name": cluster.get("name", ""), "error": error})
+        else:
+            ranked.append(result)
+
+    ranked.sort(key=lambda c: c["health_score"], reverse=True)
+    if unhealthy_only:
+        ranked = [c for c in ranked if c["health_score"] > 0]
+
+    return {
+        "total_clusters": len(clusters),
+        "queried": len(clusters) - len(failed),
+        "clusters": ranked,
+        "failed": failed,
+    }
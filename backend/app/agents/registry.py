@@ -1,58 +1,199 @@
+"""Agent registry.
+
+Agents are discovered from the static manifest (see ``app.agents.manifest``)
+without importing their code. Cards, tool catalogs, the supervisor prompt and
+the intent router are all built from the manifest. An agent's module is
+imported the first time the agent is used (in a thread, through ``aget_agent``),
+or earlier by the background ``warm_up`` that starts once the app is serving. Agents listed in
+``agent_workers`` are never imported: they are reached over A2A instead (see
+``app.agents.remote``).
+"""
+
+import asyncio
+import hashlib
 import importlib
+import json
 import logging
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
 
 from app.agents.base import BaseAgent
+from app.agents.manifest import AGENT_MODULES, AgentSpec, load_manifest
+from app.agents.router import IntentRouter
+from app.config import settings
 
 logger = logging.getLogger(__name__)
 
-AGENT_MODULES = [
-    "app.agents.github.agent",
-    "app.agents.argocd.agent",
-    "app.agents.flux.agent",
-    "app.agents.jira.agent",
-    "app.agents.slack.agent",
-    "app.agents.pagerduty.agent",
-    "app.agents.backstage.agent",
-    "app.agents.kafka.agent",
-    "app.agents.vault.agent",
-    "app.agents.rancher.agent",
-    "app.agents.policy.agent",
-]
+
+@dataclass(frozen=True)
+class CachedPayload:
+    body: bytes
+    etag: str
+
+
+@dataclass(frozen=True)
+class RegistrySnapshot:
+    """Serialized agent cards and tool catalogs, built once per set of registered agents."""
+
+    version: str
+    agents: CachedPayload
+    cards: MappingProxyType  # name -> CachedPayload
+    tools: MappingProxyType  # name -> CachedPayload
+    descriptions: str
+
+
+def _payload(data) -> CachedPayload:
+    body = json.dumps(data, separators=(",", ":")).encode()
+    return CachedPayload(body=body, etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+
+
+def parse_workers(value: str) -> dict[str, str]:
+    """'kubernetes=unix:/run/k.sock,argocd=http://host:8100' -> {agent name: endpoint}"""
+    workers = {}
+    for entry in filter(None, (e.strip() for e in value.split(","))):
+        name, sep, endpoint = entry.partition("=")
+        if not sep or not endpoint.strip():
+            raise ValueError(f"Invalid AGENT_WORKERS entry '{entry}', expected name=endpoint")
+        workers[name.strip()] = endpoint.strip()
+    return workers
+
+
+def build_snapshot(specs: dict[str, AgentSpec]) -> RegistrySnapshot:
+    cards, tools, descriptions = {}, {}, []
+    for name, spec in specs.items():
+        cards[name] = spec.card
+        tools[name] = _payload({"agent": name, "tools": spec.tools})
+        caps = ", ".join(c["name"] for c in spec.card["capabilities"])
+        descriptions.append(f"- **{name}**: {spec.card['description']} (capabilities: {caps})")
+    listing = _payload({"agents": list(cards.values())})
+    digest = hashlib.sha256(listing.body)
+    for name in tools:
+        digest.update(tools[name].body)
+    return RegistrySnapshot(
+        version=digest.hexdigest()[:16],
+        agents=listing,
+        cards=MappingProxyType({name: _payload(card) for name, card in cards.items()}),
+        tools=MappingProxyType(tools),
+        descriptions="\n".join(descriptions),
+    )
 
 
 class AgentRegistry:
     def __init__(self):
-        self._agents: dict[str, BaseAgent] = {}
+        self._specs: dict[str, AgentSpec] = {}
+        self._agents: dict[str, BaseAgent] = {}  # imported so far
+        self.failures: dict[str, str] = {}  # agent name -> import/instantiation error
+        self._snapshot: RegistrySnapshot | None = None
+        self._router: IntentRouter | None = None
+        self._warm_up: asyncio.Task | None = None
+        self.workers = parse_workers(settings.agent_workers)  # agent name -> A2A endpoint
 
     async def discover_and_register(self):
-        for module_path in AGENT_MODULES:
-            try:
-                module = importlib.import_module(module_path)
-                agent_class = getattr(module, "Agent")
-                agent = agent_class()
-                card = agent.get_card()
-                self._agents[card.name] = agent
-                logger.info(f"Registered agent: {card.name}")
-            except Exception as e:
-                logger.warning(f"Failed to load agent from {module_path}: {e}")
+        specs = load_manifest()
+        stale = set(AGENT_MODULES) ^ {spec.module for spec in specs.values()}
+        if stale:
+            raise RuntimeError(
+                f"Agent manifest is out of date ({', '.join(sorted(stale))}); "
+                "run: python -m app.agents.manifest"
+            )
+        unknown = set(self.workers) - set(specs)
+        if unknown:
+            raise RuntimeError(f"AGENT_WORKERS names unknown agents: {', '.join(sorted(unknown))}")
+        self._specs = specs
+        self._snapshot = self._router = None
+        logger.info(
+            f"Discovered {len(specs)} agents, built registry snapshot {self.snapshot.version}"
+        )
 
     def get_agent(self, name: str) -> BaseAgent | None:
-        return self._agents.get(name)
+        agent = self._agents.get(name)
+        if agent is None and name in self._specs and name not in self.failures:
+            agent = self._load(self._specs[name])
+        return agent
+
+    async def aget_agent(self, name: str) -> BaseAgent | None:
+        """get_agent for async callers: a first-use import runs in a thread, off the event loop."""
+        spec = self._specs.get(name)
+        loaded = name in self._agents or name in self.failures or name in self.workers
+        if spec is not None and not loaded:
+            try:
+                await asyncio.to_thread(importlib.import_module, spec.module)
+            except Exception:
+                pass  # reported by _load below, with the traceback
+        return self.get_agent(name)
+
+    def _load(self, spec: AgentSpec) -> BaseAgent | None:
+        if spec.name in self.workers:
+            # Imported here to keep the HTTP and LLM stacks out of startup.
+            from app.agents.remote import RemoteAgent
+
+            agent = self._agents[spec.name] = RemoteAgent(spec, self.workers[spec.name])
+            logger.info(f"Agent {spec.name} runs in a worker at {agent.endpoint}")
+            return agent
+        started = time.perf_counter()
+        try:
+            agent = importlib.import_module(spec.module).Agent()
+        except Exception as e:
+            logger.exception(f"Failed to load agent {spec.name} from {spec.module}")
+            self.failures[spec.name] = str(e)
+            return None
+        self._agents[spec.name] = agent
+        logger.info(f"Loaded agent {spec.name} in {(time.perf_counter() - started) * 1000:.0f}ms")
+        return agent
+
+    def start_warm_up(self):
+        """Import the remaining agent modules in the background, off the event loop."""
+        if self._warm_up is None:
+            self._warm_up = asyncio.create_task(self.warm_up())
+
+    async def warm_up(self):
+        for name in self._specs:
+            if name not in self.workers:
+                await self.aget_agent(name)
+
+    async def close(self):
+        if self._warm_up is not None:
+            self._warm_up.cancel()
+            await asyncio.gather(self._warm_up, return_exceptions=True)
+        for name in self.workers:
+            if agent := self._agents.get(name):
+                await agent.aclose()
 
     def list_agents(self) -> list[str]:
-        return list(self._agents.keys())
+        return list(self.specs)
 
     def get_all_tools(self) -> list:
         tools = []
-        for agent in self._agents.values():
-            tools.extend(agent.get_tools())
+        for name in self.list_agents():
+            if agent := self.get_agent(name):
+                tools.extend(agent.get_tools())
         return tools
 
+    @property
+    def specs(self) -> dict[str, AgentSpec]:
+        """Manifest entries, plus agents registered in-process without one."""
+        extra = {
+            name: AgentSpec.from_agent(agent)
+            for name, agent in self._agents.items()
+            if name not in self._specs
+        }
+        return {**self._specs, **extra}
+
+    @property
+    def snapshot(self) -> RegistrySnapshot:
+        if self._snapshot is None:
+            self._snapshot = build_snapshot(self.specs)
+        return self._snapshot
+
+    @property
+    def router(self) -> IntentRouter:
+        if self._router is None:
+            self._router = IntentRouter(
+                self.specs, settings.fast_router_threshold, settings.fast_router_margin
+            )
+        return self._router
+
     def get_agent_descriptions(self) -> str:
         """Return a formatted string of all agent capabilities for the supervisor."""
-        descriptions = []
-        for name, agent in self._agents.items():
-            card = agent.get_card()
-            caps = ", ".join(c.name for c in card.capabilities)
-            descriptions.append(f"- **{name}**: {card.description} (capabilities: {caps})")
-        return "\n".join(descriptions)
+        return self.snapshot.descriptions
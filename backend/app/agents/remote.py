@@ -0,0 +1,102 @@
+"""Agents that run outside the API process.
+
+``agent_workers`` maps agent names to A2A endpoints, either a local worker
+process on a Unix socket or a remote service:
+
+    AGENT_WORKERS=kubernetes=unix:/run/idp/kubernetes.sock,argocd=http://argocd-agent:8100
+
+For those agents the registry hands out a RemoteAgent instead of importing the
+agent code. Its invoke() sends an A2A ``tasks/send`` request over a pooled
+connection. The request carries the ``agent_worker_token`` shared secret and the
+chat's remaining deadline, and goes through the bulkhead and circuit breaker of
+integration ``agent:<name>``. Workers are
+started with ``python -m app.agents.worker``.
+"""
+
+import uuid
+
+import httpx
+
+from app.agents.base import AgentCard, BaseAgent
+from app.agents.manifest import AgentSpec
+from app.config import settings
+from app.services import resilience
+from app.services.deadline import remaining, timeout
+from app.services.llm import add_usage
+
+
+class A2AError(Exception):
+    """The worker rejected the request or reported the task as failed."""
+
+
+class RemoteAgent(BaseAgent):
+    def __init__(self, spec: AgentSpec, endpoint: str):
+        self.spec = spec
+        self.endpoint = endpoint
+        self._client: httpx.AsyncClient | None = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            uds, base_url = None, self.endpoint
+            if self.endpoint.startswith("unix:"):
+                uds, base_url = self.endpoint.removeprefix("unix:"), "http://agent"
+            limits = httpx.Limits(
+                max_connections=settings.agent_worker_connections,
+                max_keepalive_connections=settings.agent_worker_connections,
+            )
+            self._client = resilience.client(
+                f"agent:{self.spec.name}", uds=uds, limits=limits, base_url=base_url
+            )
+        return self._client
+
+    def get_card(self) -> AgentCard:
+        return AgentCard(**self.spec.card)
+
+    def get_tools(self) -> list:
+        return []  # the tools run in the worker; their schemas are in the manifest
+
+    async def invoke(self, task: str, context: dict) -> dict:
+        task_id = str(uuid.uuid4())
+        request = {
+            "jsonrpc": "2.0",
+            "id": task_id,
+            "method": "tasks/send",
+            "params": {
+                "id": task_id,
+                "message": {"role": "user", "parts": [{"type": "text", "text": task}]},
+                "metadata": {"context": context},
+            },
+        }
+        headers = {"Authorization": f"Bearer {settings.agent_worker_token}"}
+        if (left := remaining()) is not None:
+            headers["X-Request-Timeout"] = f"{max(left, 0):.3f}"
+        resp = await self.client.post(
+            "/", json=request, headers=headers, timeout=timeout(settings.chat_deadline)
+        )
+        resp.raise_for_status()
+        body = resp.json()
+        if "error" in body:
+            message = body["error"].get("message", "unknown error")
+            raise A2AError(f"{self.spec.name} worker: {message}")
+        result = body["result"]
+        metadata = result.get("metadata", {})
+        add_usage(metadata.get("usage", {}))
+        if result["status"]["state"] != "completed":
+            parts = result["status"].get("message", {}).get("parts", [])
+            message = " ".join(p.get("text", "") for p in parts) or result["status"]["state"]
+            raise A2AError(f"{self.spec.name} worker: {message}")
+        content = "\n".join(
+            part["text"]
+            for artifact in result.get("artifacts", [])
+            for part in artifact["parts"]
+            if part.get("type") == "text"
+        )
+        return {"content": content, "tools_used": metadata.get("tools_used", [])}
+
+    def get_system_prompt(self) -> str:
+        return ""  # lives with the agent in the worker
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
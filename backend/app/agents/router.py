@@ -0,0 +1,112 @@
+"""Local intent router that sends clear-cut requests straight to one agent.
+
+Each registered agent is indexed as a TF-IDF term vector built from its
+manifest card (name, description, capabilities) and its tools (names and
+descriptions), so building the router imports no agent code. A
+message is scored against every agent by cosine similarity. It is routed only
+when the best score clears ``fast_router_threshold`` and beats the runner-up by
+``fast_router_margin``. Anything ambiguous, or addressed to several systems at
+once, goes to the LLM supervisor as before. Routing a message takes
+microseconds, compared with a full supervisor LLM round trip.
+"""
+
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+
+from prometheus_client import Counter as PrometheusCounter
+
+from app.agents.manifest import AgentSpec
+
+ROUTER_DECISIONS = PrometheusCounter(
+    "intent_router_decisions_total",
+    "Chat messages by routing outcome (fast_path, supervisor, fast_path_failed)",
+    ["outcome"],
+)
+
+_WORD = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and any all are as at be by can could do does for from get give how i in into is it its "
+    "me my of on or our please show tell that the their them then there these this to us using via "
+    "want we what which with would you your".split()
+)
+
+# Weight of each source of terms in an agent's vector.
+NAME_WEIGHT = 3.0
+TOOL_NAME_WEIGHT = 2.0
+TEXT_WEIGHT = 1.0
+
+
+def _stem(word: str) -> str:
+    for suffix in ("ing", "es", "s"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[: -len(suffix)]
+    return word
+
+
+def tokenize(text: str) -> list[str]:
+    return [_stem(w) for w in _WORD.findall(text.lower().replace("_", " ")) if w not in _STOPWORDS]
+
+
+@dataclass(frozen=True)
+class Route:
+    agent: str
+    score: float
+    margin: float  # (best - runner-up) / best
+
+
+class IntentRouter:
+    def __init__(self, agents: dict[str, AgentSpec], threshold: float, margin: float):
+        self.threshold = threshold
+        self.margin = margin
+        documents: dict[str, Counter] = {}
+        for name, spec in agents.items():
+            terms: Counter = Counter()
+            for term in tokenize(name):
+                terms[term] += NAME_WEIGHT
+            texts = [spec.card["description"]]
+            for cap in spec.card["capabilities"]:
+                texts += [cap["name"], cap["description"]]
+            for tool in spec.tools:
+                for term in tokenize(tool["name"]):
+                    terms[term] += TOOL_NAME_WEIGHT
+                # The summary line, not the Args section.
+                texts.append(tool["description"].split("\n\n")[0])
+            for text in texts:
+                for term in tokenize(text):
+                    terms[term] += TEXT_WEIGHT
+            documents[name] = terms
+
+        df = Counter(term for terms in documents.values() for term in terms)
+        n = len(documents)
+        self._idf = {term: math.log((1 + n) / (1 + count)) + 1 for term, count in df.items()}
+        self._vectors: dict[str, dict[str, float]] = {}
+        for name, terms in documents.items():
+            vector = {t: w * self._idf[t] for t, w in terms.items()}
+            norm = math.sqrt(sum(v * v for v in vector.values())) or 1.0
+            self._vectors[name] = {t: v / norm for t, v in vector.items()}
+
+    def scores(self, message: str) -> list[tuple[str, float]]:
+        query = Counter(t for t in tokenize(message) if t in self._idf)
+        if not query:
+            return []
+        weights = {t: c * self._idf[t] for t, c in query.items()}
+        norm = math.sqrt(sum(w * w for w in weights.values()))
+        ranked = [
+            (name, sum(w * vector.get(t, 0.0) for t, w in weights.items()) / norm)
+            for name, vector in self._vectors.items()
+        ]
+        return sorted(ranked, key=lambda r: r[1], reverse=True)
+
+    def route(self, message: str) -> Route | None:
+        """The agent to send the message to, or None to let the supervisor decide."""
+        ranked = self.scores(message)
+        if not ranked or ranked[0][1] <= 0:
+            return None
+        best, score = ranked[0]
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+        margin = (score - runner_up) / score
+        if score < self.threshold or margin < self.margin:
+            return None
+        return Route(agent=best, score=score, margin=margin)
@@ -0,0 +1,93 @@
+"""Offline evaluation of the fast-path intent router.
+
+Runs every labelled message in ``evals/routing.yaml`` through the router built
+from the registered agents, without calling any LLM or integration:
+
+    python -m app.agents.routing_eval [--threshold 0.2] [--margin 0.3] [--llm-latency-ms 1500]
+
+Reports how many messages were fast-routed, how many of those went to the right
+agent, how many should-fallback messages were wrongly routed, the router's own
+latency, and the supervisor latency saved, estimated as one LLM round trip per
+correctly routed message.
+"""
+
+import argparse
+import asyncio
+import time
+from pathlib import Path
+
+import yaml
+
+from app.agents.router import IntentRouter
+
+CASES = Path(__file__).parents[2] / "evals" / "routing.yaml"
+
+
+def load_cases(path: Path = CASES) -> list[dict]:
+    return yaml.safe_load(path.read_text())["cases"]
+
+
+def evaluate(router: IntentRouter, cases: list[dict], llm_latency_ms: float = 1500.0) -> dict:
+    routed = correct = wrong = false_routes = 0
+    misses = []
+    started = time.perf_counter()
+    for case in cases:
+        route = router.route(case["message"])
+        if route is None:
+            continue
+        routed += 1
+        if case["agent"] is None:
+            false_routes += 1
+            misses.append({"message": case["message"], "expected": None, "routed": route.agent})
+        elif route.agent == case["agent"]:
+            correct += 1
+        else:
+            wrong += 1
+            misses.append(
+                {"message": case["message"], "expected": case["agent"], "routed": route.agent}
+            )
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    routable = sum(1 for c in cases if c["agent"] is not None)
+    return {
+        "cases": len(cases),
+        "fast_routed": routed,
+        # Routable messages sent to the right agent.
+        "coverage": correct / routable if routable else 0.0,
+        # Fast-routed messages that went to the right agent.
+        "precision": correct / routed if routed else 1.0,
+        "misrouted": wrong,
+        # Multi-agent or chit-chat messages that skipped the supervisor.
+        "false_routes": false_routes,
+        "router_latency_us": elapsed_ms * 1000 / len(cases) if cases else 0.0,
+        "latency_saved_ms": correct * llm_latency_ms,
+        "misses": misses,
+    }
+
+
+async def _main():
+    from app.agents.registry import AgentRegistry
+    from app.config import settings
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--cases", type=Path, default=CASES)
+    parser.add_argument("--threshold", type=float, default=settings.fast_router_threshold)
+    parser.add_argument("--margin", type=float, default=settings.fast_router_margin)
+    parser.add_argument(
+        "--llm-latency-ms", type=float, default=1500.0, help="assumed supervisor round trip"
+    )
+    args = parser.parse_args()
+
+    registry = AgentRegistry()
+    await registry.discover_and_register()
+    router = IntentRouter(registry.specs, args.threshold, args.margin)
+    report = evaluate(router, load_cases(args.cases), args.llm_latency_ms)
+
+    for miss in report.pop("misses"):
+        print(f"  miss: {miss['message']!r} expected={miss['expected']} routed={miss['routed']}")
+    for key, value in report.items():
+        print(f"{key:>20}: {value:.3f}" if isinstance(value, float) else f"{key:>20}: {value}")
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
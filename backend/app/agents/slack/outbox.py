@@ -0,0 +1,221 @@
+"""Asynchronous outbound queue for Slack Web API calls.
+
+Slack rate limits are enforced per method and, for chat.postMessage, per channel.
+Instead of posting directly from tools, messages are enqueued here and delivered by
+one lane per channel, which spaces out calls, honours ``429 Retry-After`` and retries
+transient failures with backoff. Successive updates sharing a coalesce key (e.g. one
+incident) are collapsed: pending updates are replaced in place, and once the first
+message is delivered later updates become ``chat.update`` edits of that message.
+"""
+
+import asyncio
+import logging
+import random
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import httpx
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+SLACK_API = "https://slack.com/api"
+
+# Minimum seconds between calls, per method (workspace-wide) and per channel.
+METHOD_INTERVALS = {
+    "chat.postMessage": 1.0 / 20,
+    "chat.update": 1.2,  # Tier 3: ~50 per minute
+}
+CHANNEL_INTERVAL = 1.0  # chat.postMessage allows ~1 message per second per channel
+MAX_ATTEMPTS = 5
+MAX_TRACKED = 1000  # bounded history of delivery statuses and coalesced threads
+
+
+@dataclass
+class OutboundMessage:
+    id: str
+    channel: str
+    payload: dict
+    coalesce_key: str | None = None
+    status: str = "queued"  # queued | sending | sent | failed
+    method: str = "chat.postMessage"
+    attempts: int = 0
+    ts: str | None = None
+    error: str | None = None
+    updates_coalesced: int = 0
+
+    def to_status(self) -> dict:
+        return {
+            "message_id": self.id,
+            "channel": self.channel,
+            "status": self.status,
+            "method": self.method,
+            "attempts": self.attempts,
+            "ts": self.ts,
+            "error": self.error,
+            "updates_coalesced": self.updates_coalesced,
+        }
+
+
+class _Interval:
+    """Serialize callers so consecutive acquisitions are at least `interval` apart."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            delay = self._next - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next = time.monotonic() + self.interval
+
+    def defer(self, seconds: float):
+        self._next = max(self._next, time.monotonic() + seconds)
+
+
+class SlackOutbox:
+    def __init__(self):
+        self._messages: OrderedDict[str, OutboundMessage] = OrderedDict()
+        self._pending: dict[str, OutboundMessage] = {}  # coalesce key -> queued message
+        self._threads: OrderedDict[str, tuple[str, str]] = OrderedDict()  # key -> (channel, ts)
+        self._lanes: dict[str, asyncio.Queue[OutboundMessage]] = {}
+        self._workers: dict[str, asyncio.Task] = {}
+        self._method_limits = {m: _Interval(i) for m, i in METHOD_INTERVALS.items()}
+        self._channel_limits: dict[str, _Interval] = {}
+        self._client: httpx.AsyncClient | None = None
+
+    def enqueue(self, channel: str, payload: dict, coalesce_key: str | None = None) -> dict:
+        """Queue a message for delivery and return its delivery status immediately."""
+        if coalesce_key and coalesce_key in self._pending:
+            msg = self._pending[coalesce_key]
+            msg.payload = payload
+            msg.updates_coalesced += 1
+            return msg.to_status()
+
+        msg = OutboundMessage(
+            id=str(uuid.uuid4()), channel=channel, payload=payload, coalesce_key=coalesce_key
+        )
+        self._remember(self._messages, msg.id, msg)
+        if coalesce_key:
+            self._pending[coalesce_key] = msg
+        self._lane(channel).put_nowait(msg)
+        return msg.to_status()
+
+    def status(self, message_id: str) -> dict | None:
+        msg = self._messages.get(message_id)
+        return msg.to_status() if msg else None
+
+    async def drain(self, timeout: float = 10.0):
+        """Wait for queued messages to be delivered, then stop the lane workers."""
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(q.join() for q in self._lanes.values())), timeout=timeout
+            )
+        except TimeoutError:
+            logger.warning("Slack outbox drain timed out with messages still queued")
+        for task in self._workers.values():
+            task.cancel()
+        self._workers.clear()
+        self._lanes.clear()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    @staticmethod
+    def _remember(store: OrderedDict, key: str, value):
+        store[key] = value
+        store.move_to_end(key)
+        while len(store) > MAX_TRACKED:
+            store.popitem(last=False)
+
+    def _lane(self, channel: str) -> asyncio.Queue:
+        if channel not in self._lanes:
+            self._lanes[channel] = asyncio.Queue()
+            self._channel_limits[channel] = _Interval(CHANNEL_INTERVAL)
+        if channel not in self._workers or self._workers[channel].done():
+            self._workers[channel] = asyncio.create_task(self._run_lane(channel))
+        return self._lanes[channel]
+
+    async def _run_lane(self, channel: str):
+        queue = self._lanes[channel]
+        while True:
+            msg = await queue.get()
+            try:
+                await self._deliver(msg)
+            except Exception as e:  # keep the lane alive whatever happens
+                msg.status, msg.error = "failed", str(e)
+                logger.error(f"Slack delivery {msg.id} to {channel} failed: {e}")
+            finally:
+                queue.task_done()
+
+    async def _deliver(self, msg: OutboundMessage):
+        if msg.coalesce_key:
+            self._pending.pop(msg.coalesce_key, None)
+        payload = {"channel": msg.channel, **msg.payload}
+        thread = self._threads.get(msg.coalesce_key) if msg.coalesce_key else None
+        if thread:
+            msg.method = "chat.update"
+            payload = {**payload, "channel": thread[0], "ts": thread[1]}
+
+        msg.status = "sending"
+        while msg.attempts < MAX_ATTEMPTS:
+            msg.attempts += 1
+            await self._method_limits[msg.method].wait()
+            if msg.method == "chat.postMessage":
+                await self._channel_limits[msg.channel].wait()
+            try:
+                resp = await self._http().post(
+                    f"{SLACK_API}/{msg.method}", headers=_headers(), json=payload
+                )
+            except httpx.HTTPError as e:
+                msg.error = str(e)
+                await asyncio.sleep(_backoff(msg.attempts))
+                continue
+
+            if resp.status_code == 429:
+                retry_after = float(resp.headers.get("Retry-After", "1"))
+                self._method_limits[msg.method].defer(retry_after)
+                self._channel_limits[msg.channel].defer(retry_after)
+                msg.error = f"rate limited, retry after {retry_after}s"
+                continue
+            if resp.status_code >= 500:
+                msg.error = f"HTTP {resp.status_code}"
+                await asyncio.sleep(_backoff(msg.attempts))
+                continue
+
+            data = resp.json()
+            if not data.get("ok"):
+                msg.status, msg.error = "failed", data.get("error", "unknown_error")
+                return
+            msg.status, msg.error = "sent", None
+            msg.ts = data.get("ts")
+            if msg.coalesce_key and msg.ts:
+                thread = (data.get("channel", msg.channel), msg.ts)
+                self._remember(self._threads, msg.coalesce_key, thread)
+            return
+        msg.status = "failed"
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=settings.http_timeout)
+        return self._client
+
+
+def _headers() -> dict:
+    return {
+        "Authorization": f"Bearer {settings.slack_bot_token}",
+        "Content-Type": "application/json",
+    }
+
+
+def _backoff(attempt: int) -> float:
+    return min(30.0, 2 ** (attempt - 1)) * random.uniform(0.5, 1.0)
+
+
+outbox = SlackOutbox()
@@ -1,9 +1,11 @@
-import httpx
+import time
+
 from langchain_core.tools import tool
 
+from app.agents.slack.outbox import SLACK_API, outbox
 from app.config import settings
-
-SLACK_API = "https://slack.com/api"
+from app.services import resilience
+from app.services.deadline import http_timeout
 
 
 def _headers() -> dict:
@@ -12,17 +14,14 @@ def _headers() -> dict:
 
 @tool
 async def send_message(channel: str, text: str) -> dict:
-    """Send a message to a Slack channel."""
-    async with httpx.AsyncClient() as client:
-        resp = await client.post(f"{SLACK_API}/chat.postMessage", headers=_headers(), json={"channel": channel, "text": text})
-        data = resp.json()
-        return {"ok": data.get("ok"), "channel": data.get("channel"), "ts": data.get("ts")}
+    """Queue a message to a Slack channel. Returns a message_id for get_delivery_status."""
+    return outbox.enqueue(channel, {"text": text})
 
 
 @tool
 async def create_channel(name: str, is_private: bool = False) -> dict:
     """Create a new Slack channel."""
-    async with httpx.AsyncClient() as client:
+    async with resilience.client("slack", timeout=http_timeout()) as client:
         resp = await client.post(f"{SLACK_API}/conversations.create", headers=_headers(), json={"name": name, "is_private": is_private})
         data = resp.json()
         if data.get("ok"):
@@ -32,19 +31,25 @@ async def create_channel(name: str, is_private: bool = False) -> dict:
 
 @tool
 async def post_incident_update(channel: str, incident_title: str, status: str, details: str) -> dict:
-    """Post a structured incident update to a Slack channel using Block Kit."""
+    """Post a structured incident update to a Slack channel using Block Kit.
+
+    Rapid updates for the same incident are collapsed into edits of a single message.
+    """
     blocks = [
         {"type": "header", "text": {"type": "plain_text", "text": f"Incident: {incident_title}"}},
         {"type": "section", "fields": [
             {"type": "mrkdwn", "text": f"*Status:*\n{status}"},
-            {"type": "mrkdwn", "text": f"*Updated:*\n<!date^{int(__import__('time').time())}^{{date_short}} {{time}}|now>"},
+            {
+                "type": "mrkdwn",
+                "text": f"*Updated:*\n<!date^{int(time.time())}^{{date_short}} {{time}}|now>",
+            },
         ]},
         {"type": "section", "text": {"type": "mrkdwn", "text": details}},
         {"type": "divider"},
     ]
-    async with httpx.AsyncClient() as client:
-        resp = await client.post(f"{SLACK_API}/chat.postMessage", headers=_headers(), json={"channel": channel, "blocks": blocks, "text": f"Incident Update: {incident_title}"})
-        return {"ok": resp.json().get("ok"), "channel": channel}
+    payload = {"blocks": blocks, "text": f"Incident Update: {incident_title}"}
+    coalesce_key = f"incident:{channel}:{incident_title.lower()}"
+    return outbox.enqueue(channel, payload, coalesce_key=coalesce_key)
 
 
 @tool
@@ -54,6 +59,10 @@ async def send_notification(channel: str, title: str, message: str, severity: st
     attachments = [{"color": color_map.get(severity, "#2563eb"), "blocks": [
         {"type": "section", "text": {"type": "mrkdwn", "text": f"*{title}*\n{message}"}},
     ]}]
-    async with httpx.AsyncClient() as client:
-        resp = await client.post(f"{SLACK_API}/chat.postMessage", headers=_headers(), json={"channel": channel, "attachments": attachments, "text": title})
-        return {"ok": resp.json().get("ok"), "channel": channel}
+    return outbox.enqueue(channel, {"attachments": attachments, "text": title})
+
+
+@tool
+async def get_delivery_status(message_id: str) -> dict:
+    """Check whether a queued Slack message has been delivered."""
+    return outbox.status(message_id) or {"message_id": message_id, "error": "Unknown message id"}
@@ -1,16 +1,44 @@
-import json
+import asyncio
 import logging
-from typing import Any, AsyncIterator
+from collections.abc import AsyncIterator, Callable
+from functools import lru_cache
+from typing import Any
 
-from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
-from pydantic import BaseModel
+from langchain_core.messages import AIMessage, HumanMessage
+from prometheus_client import Counter
+from pydantic import BaseModel, Field
 
 from app.agents.registry import AgentRegistry
+from app.agents.router import ROUTER_DECISIONS, Route
 from app.config import Settings
-from app.services.llm import get_llm
+from app.services.batch import shared
+from app.services.deadline import DeadlineExceededError, within_deadline
+from app.services.llm import (
+    LLM_ESCALATIONS,
+    cached_system_message,
+    can_escalate,
+    get_llm,
+    llm_usage,
+    model_route,
+)
+from app.services.semantic_cache import semantic_cache
 
 logger = logging.getLogger(__name__)
 
+CHAT_CANCELLATIONS = Counter(
+    "chat_cancellations_total",
+    "Chat runs cancelled before finishing, by what was running",
+    ["stage"],
+)
+CANCELLED_TOKENS = Counter(
+    "chat_cancelled_tokens_total", "LLM tokens spent on chat runs that were cancelled"
+)
+CHAT_DEADLINES = Counter(
+    "chat_deadline_exceeded_total",
+    "Chat runs that ran out of time and answered partially, by what was running",
+    ["stage"],
+)
+
 
 class OrchestratorState(BaseModel):
     messages: list[Any] = []
@@ -18,18 +46,14 @@ class OrchestratorState(BaseModel):
     current_task: str = ""
     next_agent: str = ""
     agent_outputs: dict = {}
+    failed_agents: list[str] = []  # delegations that raised or named an unknown agent
     context: dict = {}
 
 
-class SupervisorAgent:
-    def __init__(self, registry: AgentRegistry, settings: Settings):
-        self.registry = registry
-        self.settings = settings
-        self.llm = get_llm(settings)
-
-    def _build_supervisor_prompt(self) -> str:
-        agent_descriptions = self.registry.get_agent_descriptions()
-        return f"""You are the IDP Portal Supervisor Agent. You orchestrate platform engineering tasks
+@lru_cache(maxsize=4)
+def _supervisor_prompt(agent_descriptions: str) -> str:
+    # Cached so every request for the same set of agents sends the identical prompt string.
+    return f"""You are the IDP Portal Supervisor Agent. You orchestrate platform engineering tasks
 by delegating to specialized sub-agents.
 
 Available agents:
@@ -41,59 +65,231 @@ When a user sends a message:
 3. If the task requires multiple agents, execute them in the right order
 4. Synthesize the results into a clear response
 
-Respond with a JSON object:
-{{
-    "reasoning": "your analysis of what needs to be done",
-    "agent": "agent_name" or null if you can answer directly,
-    "task": "specific task to delegate" or null,
-    "response": "direct response if no agent needed" or null
-}}
+Reply with a SupervisorDecision for every step, with your confidence in it from 0 to 1.
 
 If the task is complete, set "agent" to null and provide the final "response"."""
 
-    async def run(self, user_message: str, conversation_id: str = "") -> dict:
+
+def _partial_answer(state: OrchestratorState) -> str:
+    """What to tell the user when the deadline expires: whatever the agents finished in time."""
+    if not state.agent_outputs:
+        return (
+            "Sorry, the request timed out before any agent could answer. "
+            "Please try again or narrow it down."
+        )
+    parts = [
+        f"[{name} agent]: {output.get('content', 'Done')}"
+        for name, output in state.agent_outputs.items()
+    ]
+    header = "The request timed out before I could finish. Here is what I gathered so far:"
+    return "\n\n".join([header, *parts])
+
+
+class SupervisorDecision(BaseModel):
+    """The supervisor's next step: delegate a task to one agent, or answer the user."""
+
+    reasoning: str = Field(description="Your analysis of what needs to be done")
+    agent: str | None = Field(
+        default=None, description="Agent to delegate to, or null to answer directly"
+    )
+    task: str | None = Field(default=None, description="Specific task for the agent")
+    response: str | None = Field(
+        default=None, description="Final answer for the user when agent is null"
+    )
+    confidence: float = Field(
+        default=1.0, ge=0, le=1, description="How sure you are that this step is right, 0 to 1"
+    )
+
+
+class SupervisorAgent:
+    def __init__(self, registry: AgentRegistry, settings: Settings):
+        self.registry = registry
+        self.settings = settings
+        self.route = model_route(settings, "routing")
+        self.decider = self._decider(get_llm(settings, "routing"))
+        # Unsure routing and multi-agent answers are redone by the strong model, which writes the
+        # final answer.
+        self.escalation_decider = None
+        if can_escalate(settings, self.route):
+            self.escalation_decider = self._decider(get_llm(settings, "synthesis", tier="strong"))
+
+    def _decider(self, llm):
+        # OpenAI constrains decoding to the JSON schema; Anthropic is forced to call the decision
+        # tool.
+        method = "json_schema" if self.settings.llm_provider == "openai" else "function_calling"
+        return llm.with_structured_output(SupervisorDecision, method=method, include_raw=True)
+
+    def _escalation_reason(
+        self, decision: SupervisorDecision | None, state: OrchestratorState
+    ) -> str | None:
+        if decision is None:
+            return "unparsed"
+        if decision.confidence < self.settings.llm_escalation_confidence:
+            return "low_confidence"
+        if not decision.agent and len(state.agent_outputs) >= self.settings.llm_escalation_agents:
+            return "synthesis"
+        return None
+
+    def _build_supervisor_prompt(self) -> str:
+        return _supervisor_prompt(self.registry.get_agent_descriptions())
+
+    async def run(
+        self,
+        user_message: str,
+        conversation_id: str = "",
+        on_event: Callable[[dict], None] | None = None,
+    ) -> dict:
+        """Answer a chat message; on_event, if given, receives each routing decision when made."""
+        embedding = None
+        if semantic_cache.enabled:
+            cached, embedding = await semantic_cache.lookup(self._cache_scope(), user_message)
+            if cached is not None:
+                if on_event:
+                    reasoning = f"Answered from cache (similarity {cached['similarity']:.2f})"
+                    on_event({"type": "decision", "agent": None, "reasoning": reasoning})
+                return {
+                    "messages": [
+                        HumanMessage(content=user_message), AIMessage(content=cached["message"]),
+                    ],
+                    "agent_outputs": cached["agent_outputs"],
+                    "conversation_id": conversation_id,
+                    "usage": {},
+                    "routing": "cache",
+                    "partial": False,
+                    "cached": True,
+                }
+
         state = OrchestratorState(
             messages=[HumanMessage(content=user_message)],
             conversation_id=conversation_id,
         )
 
-        supervisor_prompt = self._build_supervisor_prompt()
+        # Built once per run and identical across runs, so every iteration hits the provider's
+        # prompt cache.
+        system_message = cached_system_message(self.settings, self._build_supervisor_prompt())
         max_iterations = 5
 
-        for _iteration in range(max_iterations):
-            messages = [
-                SystemMessage(content=supervisor_prompt),
-                *state.messages,
-            ]
+        with llm_usage() as usage:
+            routing = "supervisor"
+            partial = False
+            try:
+                route = None
+                if self.settings.fast_router_enabled:
+                    route = self.registry.router.route(user_message)
+                if route and await self._fast_path(state, route, on_event):
+                    routing = "fast_path"
+                if routing == "supervisor":
+                    await self._loop(state, system_message, max_iterations, on_event)
+            except DeadlineExceededError:
+                stage = state.next_agent or "supervisor"
+                CHAT_DEADLINES.labels(stage).inc()
+                logger.warning(f"Chat {conversation_id} ran out of time during {stage}")
+                state.messages.append(AIMessage(content=_partial_answer(state)))
+                partial = True
+            except asyncio.CancelledError:
+                # The client went away; in-flight LLM/HTTP requests and subprocesses are torn
+                # down with us.
+                stage = state.next_agent or "supervisor"
+                CHAT_CANCELLATIONS.labels(stage).inc()
+                CANCELLED_TOKENS.inc(usage["input"] + usage["output"])
+                logger.info(f"Chat {conversation_id} cancelled during {stage}")
+                raise
+        ROUTER_DECISIONS.labels(routing).inc()
 
-            response = await self.llm.ainvoke(messages)
-            response_text = response.content
+        result = {
+            "messages": state.messages,
+            "agent_outputs": state.agent_outputs,
+            "failed_agents": state.failed_agents,
+            "conversation_id": conversation_id,
+            "usage": dict(usage),
+            "routing": routing,
+            "partial": partial,
+        }
+        if embedding is not None:
+            await semantic_cache.put(self._cache_scope(), user_message, embedding, result)
+        return result
 
-            try:
-                decision = json.loads(response_text)
-            except json.JSONDecodeError:
-                # LLM gave a direct text response
-                state.messages.append(AIMessage(content=response_text))
+    def _cache_scope(self) -> str:
+        # Answers are only reused for the same set of agents and the same chat models.
+        return f"{self.registry.snapshot.version}:{self.settings.llm_model}:{self.route.model}"
+
+    async def _fast_path(self, state: OrchestratorState, route: Route, on_event) -> bool:
+        """Hand the message straight to the routed agent, skipping the supervisor LLM call."""
+        agent = await self.registry.aget_agent(route.agent)
+        if on_event:
+            reasoning = f"Matched {route.agent} (score {route.score:.2f})"
+            on_event({"type": "decision", "agent": route.agent, "reasoning": reasoning})
+        state.next_agent = route.agent
+        task = state.messages[0].content
+        try:
+            result = await within_deadline(shared(
+                ("agent", route.agent, task), lambda: agent.invoke(task=task, context=state.context)
+            ))
+        except DeadlineExceededError:
+            raise
+        except Exception as e:
+            logger.warning(
+                f"Fast-path agent {route.agent} failed, falling back to the supervisor: {e}"
+            )
+            ROUTER_DECISIONS.labels("fast_path_failed").inc()
+            state.next_agent = ""
+            return False
+        state.next_agent = ""
+        state.agent_outputs[route.agent] = result
+        state.messages.append(AIMessage(content=result.get("content", "Done"), name=route.agent))
+        return True
+
+    async def _loop(self, state: OrchestratorState, system_message, max_iterations: int, on_event):
+        for _iteration in range(max_iterations):
+            messages = [system_message, *state.messages]
+
+            output = await within_deadline(self.decider.ainvoke(messages))
+            decision: SupervisorDecision | None = output["parsed"]
+            escalate = self.escalation_decider is not None
+            if escalate and (reason := self._escalation_reason(decision, state)):
+                LLM_ESCALATIONS.labels("routing", reason).inc()
+                output = await within_deadline(self.escalation_decider.ainvoke(messages))
+                decision = output["parsed"]
+            if decision is None:
+                # Only possible if the provider ignored the schema; keep any text it produced.
+                logger.warning(
+                    f"Supervisor decision did not match the schema: {output['parsing_error']}"
+                )
+                content = output["raw"].content or "Sorry, I could not process that request."
+                state.messages.append(AIMessage(content=content))
                 break
+            if on_event:
+                on_event({
+                    "type": "decision",
+                    "agent": decision.agent,
+                    "reasoning": decision.reasoning,
+                    "task": decision.task,
+                })
 
-            agent_name = decision.get("agent")
-            task = decision.get("task")
-            direct_response = decision.get("response")
+            agent_name = decision.agent
+            task = decision.task
+            direct_response = decision.response
 
             if not agent_name:
                 final_msg = direct_response or "Task completed."
                 state.messages.append(AIMessage(content=final_msg))
                 break
 
-            agent = self.registry.get_agent(agent_name)
+            agent = await self.registry.aget_agent(agent_name)
             if not agent:
+                state.failed_agents.append(agent_name)
                 state.messages.append(
                     AIMessage(content=f"Agent '{agent_name}' not available. {direct_response or ''}")
                 )
                 break
 
+            state.next_agent = agent_name
             try:
-                result = await agent.invoke(task=task, context=state.context)
+                # Identical sub-tasks from different items of a batch run once.
+                result = await within_deadline(shared(
+                    ("agent", agent_name, task),
+                    lambda: agent.invoke(task=task, context=state.context),
+                ))
                 state.agent_outputs[agent_name] = result
                 state.messages.append(
                     AIMessage(
@@ -101,17 +297,15 @@ If the task is complete, set "agent" to null and provide the final "response".""
                         name=agent_name,
                     )
                 )
+            except DeadlineExceededError:
+                raise
             except Exception as e:
                 logger.error(f"Agent {agent_name} failed: {e}")
+                state.failed_agents.append(agent_name)
                 state.messages.append(
                     AIMessage(content=f"[{agent_name} agent] Error: {str(e)}")
                 )
-
-        return {
-            "messages": state.messages,
-            "agent_outputs": state.agent_outputs,
-            "conversation_id": conversation_id,
-        }
+            state.next_agent = ""  # left set on cancellation, to label the metric
 
     async def stream(
         self, user_message: str, conversation_id: str = ""
@@ -119,7 +313,25 @@ If the task is complete, set "agent" to null and provide the final "response".""
         """Stream events for real-time UI updates."""
         yield {"type": "thinking", "content": "Analyzing your request..."}
 
-        result = await self.run(user_message, conversation_id)
+        events: asyncio.Queue[dict] = asyncio.Queue()
+        task = asyncio.create_task(
+            self.run(user_message, conversation_id, on_event=events.put_nowait)
+        )
+        getter: asyncio.Future | None = None
+        try:
+            while not task.done() or not events.empty():
+                getter = asyncio.ensure_future(events.get())
+                await asyncio.wait({getter, task}, return_when=asyncio.FIRST_COMPLETED)
+                if getter.done():
+                    yield getter.result()
+                else:
+                    getter.cancel()
+            result = task.result()
+        finally:
+            # Closing the stream (client disconnect) cancels the whole run, not just the event pump.
+            if getter is not None:
+                getter.cancel()
+            task.cancel()
 
         for name, output in result.get("agent_outputs", {}).items():
             yield {
@@ -137,4 +349,9 @@ If the task is complete, set "agent" to null and provide the final "response".""
                 "conversation_id": conversation_id,
             }
 
-        yield {"type": "done"}
+        yield {
+            "type": "done",
+            "usage": result.get("usage", {}),
+            "partial": result.get("partial", False),
+            "cached": result.get("cached", False),
+        }
@@ -1,26 +1,40 @@
 from app.agents.base import AgentCapability, AgentCard, BaseAgent
-from app.agents.vault.tools import create_vault_policy, enable_secrets_engine, list_secrets, read_secret, write_secret
+from app.agents.vault.tools import (
+    create_vault_policy,
+    enable_secrets_engine,
+    inventory_secrets,
+    list_secrets,
+    read_secret,
+    write_secret,
+)
 from app.config import settings
-from app.services.llm import get_llm
+from app.services.llm import cached_system_message, get_llm, select_tools
 
 
 class Agent(BaseAgent):
     def get_card(self) -> AgentCard:
         return AgentCard(name="vault", description="Manages secrets in HashiCorp Vault (KV-v2 engine)", capabilities=[
             AgentCapability(name="secret_management", description="Read, write, and list secrets", tools=["read_secret", "write_secret", "list_secrets"]),
+            AgentCapability(
+                name="secret_inventory",
+                description="Audit all secrets under a path (metadata only)",
+                tools=["inventory_secrets"],
+            ),
             AgentCapability(name="policy_management", description="Create Vault policies and manage engines", tools=["create_vault_policy", "enable_secrets_engine"]),
         ])
 
     def get_tools(self):
-        return [read_secret, write_secret, list_secrets, create_vault_policy, enable_secrets_engine]
+        return [
+            read_secret, write_secret, list_secrets, create_vault_policy, enable_secrets_engine,
+            inventory_secrets,
+        ]
 
     async def invoke(self, task: str, context: dict) -> dict:
-        llm = get_llm(settings)
         tools = self.get_tools()
-        llm_with_tools = llm.bind_tools(tools)
-        from langchain_core.messages import HumanMessage, SystemMessage, ToolMessage
-        messages = [SystemMessage(content=self.get_system_prompt()), HumanMessage(content=task)]
-        response = await llm_with_tools.ainvoke(messages)
+        from langchain_core.messages import HumanMessage, ToolMessage
+        system = cached_system_message(settings, self.get_system_prompt())
+        messages = [system, HumanMessage(content=task)]
+        response = await select_tools(settings, "vault", tools, messages)
         tools_used = []
         if response.tool_calls:
             tool_map = {t.name: t for t in tools}
@@ -31,9 +45,15 @@ class Agent(BaseAgent):
                     tools_used.append(tc["name"])
                     messages.append(response)
                     messages.append(ToolMessage(content=str(result), tool_call_id=tc["id"]))
-            final = await llm_with_tools.ainvoke(messages)
+            synthesis = get_llm(settings, "synthesis", "vault").bind_tools(tools)
+            final = await synthesis.ainvoke(messages)
             return {"content": final.content, "tools_used": tools_used}
         return {"content": response.content, "tools_used": []}
 
     def get_system_prompt(self) -> str:
-        return "You are a HashiCorp Vault secrets management agent. You manage secrets, policies, and secrets engines. Never expose secret values directly - only confirm operations and show metadata."
+        return (
+            "You are a HashiCorp Vault secrets management agent. You manage secrets, policies, "
+            "and secrets engines. Never expose secret values directly - only confirm operations "
+            "and show metadata. Use inventory_secrets to audit a whole subtree instead of listing "
+            "folders one by one."
+        )
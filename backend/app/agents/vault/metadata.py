@@ -0,0 +1,135 @@
+"""Concurrent KV-v2 metadata walks backed by a short-lived metadata cache.
+
+Only ``secret/metadata`` endpoints are used, so a walk returns key names, versions
+and timestamps but never secret values. Cached entries expire after
+``vault_metadata_ttl`` seconds and are dropped early when ``write_secret`` changes a
+path or a read observes a newer version than the cached one.
+"""
+
+import asyncio
+import time
+
+import httpx
+
+from app.config import settings
+from app.services import resilience
+from app.services.deadline import http_timeout
+
+
+def _headers() -> dict:
+    return {"X-Vault-Token": settings.vault_token, "Content-Type": "application/json"}
+
+
+class MetadataCache:
+    def __init__(self):
+        self._listings: dict[str, tuple[float, list[str]]] = {}
+        self._metadata: dict[str, tuple[float, dict]] = {}
+
+    def _fresh(self, entry: tuple[float, object] | None):
+        if entry and time.monotonic() - entry[0] < settings.vault_metadata_ttl:
+            return entry[1]
+        return None
+
+    def listing(self, path: str) -> list[str] | None:
+        return self._fresh(self._listings.get(path))
+
+    def metadata(self, path: str) -> dict | None:
+        return self._fresh(self._metadata.get(path))
+
+    def store_listing(self, path: str, keys: list[str]):
+        self._listings[path] = (time.monotonic(), keys)
+
+    def store_metadata(self, path: str, metadata: dict):
+        self._metadata[path] = (time.monotonic(), metadata)
+
+    def observe_version(self, path: str, version: int | None):
+        """Drop cached metadata for a path if Vault reports a different version."""
+        cached = self.metadata(path)
+        if cached and version is not None and cached["version"] != version:
+            self._metadata.pop(path, None)
+
+    def invalidate(self, path: str):
+        """Forget a secret and the listings of its parent folders (it may be new)."""
+        self._metadata.pop(path, None)
+        parts = path.strip("/").split("/")
+        for i in range(len(parts)):
+            self._listings.pop("/".join(parts[:i]) + ("/" if i else ""), None)
+
+
+metadata_cache = MetadataCache()
+
+
+async def list_keys(client: httpx.AsyncClient, path: str) -> list[str]:
+    cached = metadata_cache.listing(path)
+    if cached is not None:
+        return cached
+    url = f"{settings.vault_addr}/v1/secret/metadata/{path}"
+    resp = await client.request("LIST", url, headers=_headers())
+    if resp.status_code == 404:
+        keys = []
+    else:
+        resp.raise_for_status()
+        keys = resp.json().get("data", {}).get("keys", [])
+    metadata_cache.store_listing(path, keys)
+    return keys
+
+
+async def _metadata(client: httpx.AsyncClient, path: str) -> dict:
+    cached = metadata_cache.metadata(path)
+    if cached is not None:
+        return cached
+    resp = await client.get(f"{settings.vault_addr}/v1/secret/metadata/{path}", headers=_headers())
+    resp.raise_for_status()
+    data = resp.json().get("data", {})
+    versions = data.get("versions", {})
+    current = versions.get(str(data.get("current_version")), {})
+    metadata = {
+        "path": path,
+        "version": data.get("current_version"),
+        "versions": len(versions),
+        "created_time": data.get("created_time"),
+        "updated_time": data.get("updated_time"),
+        "deleted": bool(current.get("deletion_time")) or current.get("destroyed", False),
+        "custom_metadata": data.get("custom_metadata") or {},
+    }
+    metadata_cache.store_metadata(path, metadata)
+    return metadata
+
+
+async def walk(path: str = "", max_depth: int = 10) -> dict:
+    """Inventory every secret under a KV-v2 prefix with bounded concurrency."""
+    prefix = path.strip("/") + "/" if path.strip("/") else ""
+    concurrency = min(settings.vault_walk_concurrency, settings.integration_max_concurrent)
+    semaphore = asyncio.Semaphore(concurrency)  # within the bulkhead: no request waits for a slot
+    secrets: list[dict] = []
+    errors: list[dict] = []
+
+    async with resilience.client("vault", timeout=http_timeout()) as client:
+
+        async def visit(folder: str, depth: int):
+            try:
+                async with semaphore:
+                    keys = await list_keys(client, folder)
+            except httpx.HTTPError as e:
+                errors.append({"path": folder, "error": str(e)})
+                return
+            children = []
+            for key in keys:
+                if key.endswith("/"):
+                    if depth < max_depth:
+                        children.append(visit(folder + key, depth + 1))
+                else:
+                    children.append(inspect(folder + key))
+            await asyncio.gather(*children)
+
+        async def inspect(secret_path: str):
+            try:
+                async with semaphore:
+                    secrets.append(await _metadata(client, secret_path))
+            except httpx.HTTPError as e:
+                errors.append({"path": secret_path, "error": str(e)})
+
+        await visit(prefix, 0)
+
+    secrets.sort(key=lambda s: s["path"])
+    return {"path": prefix, "count": len(secrets), "secrets": secrets, "errors": errors}
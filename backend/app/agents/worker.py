@@ -0,0 +1,145 @@
+"""Run one agent as a standalone A2A worker.
+
+    python -m app.agents.worker kubernetes --uds /run/idp/kubernetes.sock --workers 4
+    python -m app.agents.worker argocd --port 8100
+
+The worker serves the agent card at ``/.well-known/agent.json`` and answers A2A
+``tasks/send`` JSON-RPC requests at ``/``. Tasks must carry the
+AGENT_WORKER_TOKEN shared secret as a bearer token, and a Unix socket is created
+readable and writable by the worker's user only. Each uvicorn worker is a separate
+process with its own event loop, so heavy agents scale across cores (and, over
+HTTP, across nodes) independently of the API tier. Point the API at it with
+AGENT_WORKERS (see ``app.agents.remote``).
+"""
+
+import argparse
+import contextlib
+import hmac
+import importlib
+import logging
+import os
+import socket
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from prometheus_client import make_asgi_app
+
+from app.agents.manifest import load_manifest
+from app.config import settings
+from app.services.deadline import deadline_scope, within_deadline
+from app.services.llm import llm_usage
+
+logger = logging.getLogger(__name__)
+
+WORKER_AGENT_ENV = "IDP_WORKER_AGENT"
+SOCKET_MODE = 0o600
+
+
+def _rpc_error(rpc_id, code: int, message: str) -> dict:
+    return {"jsonrpc": "2.0", "id": rpc_id, "error": {"code": code, "message": message}}
+
+
+def _authorized(request: Request) -> bool:
+    expected = f"Bearer {settings.agent_worker_token}".encode()
+    return hmac.compare_digest(request.headers.get("authorization", "").encode(), expected)
+
+
+def create_app(agent_name: str) -> FastAPI:
+    if not settings.agent_worker_token:
+        raise RuntimeError("AGENT_WORKER_TOKEN must be set: workers only accept tasks carrying it")
+    spec = load_manifest()[agent_name]
+    agent = importlib.import_module(spec.module).Agent()
+    app = FastAPI(title=f"{agent_name} agent worker", docs_url=None, redoc_url=None)
+    app.mount("/metrics", make_asgi_app())
+
+    @app.get("/.well-known/agent.json")
+    async def agent_card():
+        return spec.card
+
+    @app.post("/")
+    async def rpc(request: Request):
+        if not _authorized(request):
+            return JSONResponse(_rpc_error(None, -32001, "Unauthorized"), status_code=401)
+        try:
+            body = await request.json()
+        except ValueError:
+            return _rpc_error(None, -32700, "Parse error")
+        rpc_id = body.get("id")
+        if body.get("method") != "tasks/send":
+            return _rpc_error(rpc_id, -32601, f"Method not found: {body.get('method')}")
+        params = body.get("params") or {}
+        parts = (params.get("message") or {}).get("parts", [])
+        text = "\n".join(p.get("text", "") for p in parts if p.get("type") == "text")
+        try:
+            requested = float(request.headers.get("X-Request-Timeout", settings.chat_deadline))
+            budget = min(settings.chat_deadline, requested)
+        except ValueError:
+            return _rpc_error(rpc_id, -32602, "X-Request-Timeout must be a number of seconds")
+
+        status, artifacts, result = {"state": "completed"}, [], {}
+        with llm_usage() as usage, deadline_scope(budget):
+            try:
+                context = (params.get("metadata") or {}).get("context", {})
+                result = await within_deadline(agent.invoke(task=text, context=context))
+                artifacts = [{"parts": [{"type": "text", "text": str(result.get("content", ""))}]}]
+            except Exception as e:
+                logger.exception(f"Agent {agent_name} failed task {params.get('id')}")
+                message = {"role": "agent", "parts": [{"type": "text", "text": str(e)}]}
+                status = {"state": "failed", "message": message}
+        return {
+            "jsonrpc": "2.0",
+            "id": rpc_id,
+            "result": {
+                "id": params.get("id"),
+                "status": status,
+                "artifacts": artifacts,
+                "metadata": {"tools_used": result.get("tools_used", []), "usage": dict(usage)},
+            },
+        }
+
+    return app
+
+
+def app_from_env() -> FastAPI:
+    """uvicorn factory for multi-process workers, which need an import string, not an app object."""
+    return create_app(os.environ[WORKER_AGENT_ENV])
+
+
+def bind_unix_socket(path: str) -> socket.socket:
+    """Listen on path with SOCKET_MODE permissions from the start.
+
+    uvicorn's own uds option leaves the socket world-writable.
+    """
+    with contextlib.suppress(FileNotFoundError):
+        os.unlink(path)  # left behind by a previous run
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    umask = os.umask(0o777 & ~SOCKET_MODE)
+    try:
+        sock.bind(path)
+    finally:
+        os.umask(umask)
+    os.chmod(path, SOCKET_MODE)
+    return sock
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run one agent as an A2A worker")
+    parser.add_argument("agent", choices=sorted(load_manifest()))
+    parser.add_argument("--uds", help="serve on this Unix socket instead of TCP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--workers", type=int, default=1, help="worker processes")
+    args = parser.parse_args()
+
+    os.environ[WORKER_AGENT_ENV] = args.agent
+    if args.uds:
+        listen = {"fd": bind_unix_socket(args.uds).fileno()}
+    else:
+        listen = {"host": args.host, "port": args.port}
+    uvicorn.run("app.agents.worker:app_from_env", factory=True, workers=args.workers, **listen)
+
+
+if __name__ == "__main__":
+    main()
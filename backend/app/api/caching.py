@@ -0,0 +1,9 @@
+from fastapi import Request, Response
+
+
+def cached_json(request: Request, body: bytes, etag: str) -> Response:
+    """Serve a pre-serialized JSON body with a strong ETag, or 304 if the client already has it."""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -8,14 +8,18 @@ from app.services.auth import verify_token
 security = HTTPBearer(auto_error=False)
 
 
+async def authenticate(token: str | None) -> dict | None:
+    if settings.app_env == "development" and not token:
+        return {"sub": "dev-user", "email": "dev@localhost", "roles": ["admin"]}
+    if not token:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    return await verify_token(token)
+
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials | None = Depends(security),
 ) -> dict | None:
-    if settings.app_env == "development" and not credentials:
-        return {"sub": "dev-user", "email": "dev@localhost", "roles": ["admin"]}
-    if not credentials:
-        raise HTTPException(status_code=401, detail="Not authenticated")
-    return await verify_token(credentials.credentials)
+    return await authenticate(credentials.credentials if credentials else None)
 
 
 async def get_supervisor(request: Request) -> SupervisorAgent:
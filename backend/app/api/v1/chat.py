@@ -1,12 +1,20 @@
+import asyncio
 import json
+import time
 import uuid
+from collections import Counter
 
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Depends, HTTPException, Request
 from pydantic import BaseModel, Field
 from sse_starlette.sse import EventSourceResponse
+from starlette.background import BackgroundTask
 
 from app.agents.supervisor import SupervisorAgent
-from app.api.deps import get_supervisor
+from app.api.deps import get_current_user, get_supervisor
+from app.config import settings
+from app.services.admission import AdmissionRejectedError, Ticket, admission
+from app.services.batch import batch_scope
+from app.services.deadline import deadline_scope
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
@@ -16,6 +24,16 @@ class ChatRequest(BaseModel):
     conversation_id: str = Field(default_factory=lambda: str(uuid.uuid4()))
 
 
+class BatchItem(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    message: str
+    conversation_id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+
+
+class BatchChatRequest(BaseModel):
+    items: list[BatchItem] = Field(min_length=1)
+
+
 class AgentOutput(BaseModel):
     agent_name: str
     content: str
@@ -26,15 +44,37 @@ class ChatResponse(BaseModel):
     message: str
     conversation_id: str
     agent_outputs: list[AgentOutput] = []
+    usage: dict[str, int] = {}  # input, output, cache_read and cache_write tokens
+    # The deadline expired and the answer covers only the agents that finished.
+    partial: bool = False
+    cached: bool = False  # answered from the semantic cache
 
 
-@router.post("/", response_model=ChatResponse)
-async def chat(request: ChatRequest, supervisor: SupervisorAgent = Depends(get_supervisor)):
-    result = await supervisor.run(
-        user_message=request.message,
-        conversation_id=request.conversation_id,
-    )
+def _admit(user: dict | None, slots: int = 1) -> Ticket:
+    try:
+        return admission.enter((user or {}).get("sub", "anonymous"), slots)
+    except AdmissionRejectedError as e:
+        raise HTTPException(
+            status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)}
+        )
+
+
+def _deadline(req: Request) -> float:
+    """Monotonic deadline for the request: chat_deadline, or less if X-Request-Timeout asks."""
+    budget = settings.chat_deadline
+    try:
+        budget = min(budget, float(req.headers.get("X-Request-Timeout", budget)))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="X-Request-Timeout must be a number of seconds")
+    return time.monotonic() + max(budget, 0.0)
+
 
+def _tokens(result: dict) -> int:
+    usage = result.get("usage", {})
+    return usage.get("input", 0) + usage.get("output", 0)
+
+
+def _response(result: dict, conversation_id: str) -> ChatResponse:
     agent_outputs = []
     for name, output in result.get("agent_outputs", {}).items():
         agent_outputs.append(
@@ -47,33 +87,177 @@ async def chat(request: ChatRequest, supervisor: SupervisorAgent = Depends(get_s
 
     return ChatResponse(
         message=result["messages"][-1].content if result.get("messages") else "",
-        conversation_id=request.conversation_id,
+        conversation_id=conversation_id,
         agent_outputs=agent_outputs,
+        usage=result.get("usage", {}),
+        partial=result.get("partial", False),
+        cached=result.get("cached", False),
     )
 
 
+@router.post("/", response_model=ChatResponse)
+async def chat(
+    request: ChatRequest,
+    req: Request,
+    supervisor: SupervisorAgent = Depends(get_supervisor),
+    user: dict | None = Depends(get_current_user),
+):
+    deadline = _deadline(req)
+    ticket = _admit(user)
+    result = {}
+    try:
+        if not await ticket.wait(settings.chat_queue_timeout):
+            raise HTTPException(
+                status_code=429,
+                detail="Timed out waiting for capacity",
+                headers={"Retry-After": "5"},
+            )
+        with deadline_scope(at=deadline):
+            result = await supervisor.run(
+                user_message=request.message,
+                conversation_id=request.conversation_id,
+            )
+    finally:
+        ticket.release(_tokens(result))
+
+    return _response(result, request.conversation_id)
+
+
 @router.post("/stream")
 async def chat_stream(
     request: ChatRequest,
     req: Request,
     supervisor: SupervisorAgent = Depends(get_supervisor),
+    user: dict | None = Depends(get_current_user),
 ):
+    deadline = _deadline(req)
+    ticket = _admit(user)  # rejected before the stream starts, so clients see a plain 429
+
     async def event_generator():
+        tokens = 0
         try:
-            async for event in supervisor.stream(
-                user_message=request.message,
-                conversation_id=request.conversation_id,
-            ):
-                if await req.is_disconnected():
-                    break
-                yield {
-                    "event": event.get("type", "message"),
-                    "data": json.dumps(event),
-                }
+            # Report the queue position (only when it changes) until the request is admitted.
+            try:
+                async for position in ticket.queue_positions(settings.chat_queue_timeout):
+                    data = json.dumps({"type": "queue", "position": position})
+                    yield {"event": "queue", "data": data}
+            except TimeoutError as e:
+                yield {"event": "error", "data": json.dumps({"error": str(e)})}
+                return
+
+            # Set inside the generator: it runs in the response's context, not the endpoint's.
+            with deadline_scope(at=deadline):
+                async for event in supervisor.stream(
+                    user_message=request.message,
+                    conversation_id=request.conversation_id,
+                ):
+                    if await req.is_disconnected():
+                        break
+                    if event.get("type") == "done":
+                        tokens = _tokens(event)
+                    yield {
+                        "event": event.get("type", "message"),
+                        "data": json.dumps(event),
+                    }
         except Exception as e:
             yield {
                 "event": "error",
                 "data": json.dumps({"error": str(e)}),
             }
+        finally:
+            ticket.release(tokens)
+
+    # The background release covers clients that disconnect before the generator starts.
+    return EventSourceResponse(event_generator(), background=BackgroundTask(ticket.release))
+
+
+@router.post("/batch")
+async def chat_batch(
+    request: BatchChatRequest,
+    supervisor: SupervisorAgent = Depends(get_supervisor),
+    user: dict | None = Depends(get_current_user),
+):
+    """Answer many independent prompts, streaming a "result" event per item as it completes.
+
+    Identical prompts run once, and items share identical agent sub-tasks and
+    integration reads. The batch runs at most chat_batch_concurrency prompts at
+    a time and holds that many admission slots; each prompt's tokens are drawn
+    from the budget as it completes. A final "summary" event reports the
+    aggregate token usage.
+    """
+    if len(request.items) > settings.chat_batch_max_items:
+        raise HTTPException(
+            status_code=422, detail=f"At most {settings.chat_batch_max_items} items per batch"
+        )
+
+    groups: dict[str, list[BatchItem]] = {}
+    for item in request.items:
+        groups.setdefault(item.message.strip(), []).append(item)
+    concurrency = min(settings.chat_batch_concurrency, len(groups))
+    ticket = _admit(user, slots=concurrency)
+
+    async def run(
+        message: str, items: list[BatchItem], slots: asyncio.Semaphore, done: asyncio.Queue
+    ):
+        async with slots:
+            try:
+                with deadline_scope(settings.chat_deadline):
+                    result = await supervisor.run(
+                        user_message=message, conversation_id=items[0].conversation_id
+                    )
+                await done.put((items, result, None))
+            except Exception as e:
+                await done.put((items, None, e))
+
+    async def event_generator():
+        usage: Counter[str] = Counter()
+        failed = 0
+        try:
+            try:
+                async for position in ticket.queue_positions(settings.chat_queue_timeout):
+                    data = json.dumps({"type": "queue", "position": position})
+                    yield {"event": "queue", "data": data}
+            except TimeoutError as e:
+                yield {"event": "error", "data": json.dumps({"error": str(e)})}
+                return
+
+            slots = asyncio.Semaphore(concurrency)
+            done: asyncio.Queue = asyncio.Queue()
+            with batch_scope() as shared:
+                tasks = [
+                    asyncio.create_task(run(message, items, slots, done))
+                    for message, items in groups.items()
+                ]
+                try:
+                    for _ in tasks:
+                        items, result, error = await done.get()
+                        if error is not None:
+                            failed += len(items)
+                            for item in items:
+                                data = json.dumps({"id": item.id, "error": str(error)})
+                                yield {"event": "error", "data": data}
+                            continue
+                        usage.update(result.get("usage", {}))
+                        ticket.debit(_tokens(result))
+                        for i, item in enumerate(items):
+                            body = _response(result, item.conversation_id).model_dump()
+                            data = json.dumps({"id": item.id, "deduplicated": i > 0, **body})
+                            yield {"event": "result", "data": data}
+                finally:
+                    for task in tasks:
+                        task.cancel()
+
+            summary = {
+                "type": "summary",
+                "items": len(request.items),
+                "unique_prompts": len(groups),
+                "failed": failed,
+                # Agent sub-tasks and integration reads answered from another item.
+                "shared_calls": shared.shared,
+                "usage": dict(usage),
+            }
+            yield {"event": "summary", "data": json.dumps(summary)}
+        finally:
+            ticket.release()
 
-    return EventSourceResponse(event_generator())
+    return EventSourceResponse(event_generator(), background=BackgroundTask(ticket.release))
@@ -4,6 +4,7 @@ from app.api.v1.agents import router as agents_router
 from app.api.v1.chat import router as chat_router
 from app.api.v1.health import router as health_router
 from app.api.v1.selfservice import router as selfservice_router
+from app.api.v1.ws import router as ws_router
 
 api_v1_router = APIRouter()
 
@@ -11,3 +12,4 @@ api_v1_router.include_router(health_router)
 api_v1_router.include_router(chat_router)
 api_v1_router.include_router(agents_router)
 api_v1_router.include_router(selfservice_router)
+api_v1_router.include_router(ws_router)
@@ -1,14 +1,16 @@
-from fastapi import APIRouter
-from pydantic import BaseModel
+import json
 
-router = APIRouter(prefix="/self-service", tags=["self-service"])
+from fastapi import APIRouter, Depends, HTTPException, Request
+from pydantic import BaseModel
+from sse_starlette.sse import EventSourceResponse
 
+from app.api.caching import cached_json
+from app.api.deps import get_current_user
+from app.services.provisioning import provisioning_engine
+from app.services.provisioning.manifests import service_name
+from app.services.templates import TemplateValidationError, template_registry
 
-class TemplateInfo(BaseModel):
-    name: str
-    description: str
-    category: str
-    parameters: list[dict]
+router = APIRouter(prefix="/self-service", tags=["self-service"])
 
 
 class ProvisionRequest(BaseModel):
@@ -16,107 +18,111 @@ class ProvisionRequest(BaseModel):
     parameters: dict
 
 
+class BulkProvisionRequest(BaseModel):
+    items: list[ProvisionRequest]
+    slack_channel: str = ""
+
+
 class ProvisionStatus(BaseModel):
     request_id: str
+    template_name: str
     status: str  # pending | running | completed | failed
     steps: list[dict]
-
-
-TEMPLATES = [
-    TemplateInfo(
-        name="microservice",
-        description="Create a new microservice with GitHub repo, CI/CD, and ArgoCD deployment",
-        category="application",
-        parameters=[
-            {"name": "service_name", "type": "string", "required": True},
-            {"name": "language", "type": "string", "options": ["python", "go", "node"], "required": True},
-            {"name": "gitops_engine", "type": "string", "options": ["argocd", "flux"], "default": "argocd"},
-            {"name": "needs_kafka", "type": "boolean", "default": False},
-            {"name": "needs_database", "type": "boolean", "default": False},
-        ],
-    ),
-    TemplateInfo(
-        name="kafka-topic",
-        description="Create a Kafka topic with schema registry",
-        category="infrastructure",
-        parameters=[
-            {"name": "topic_name", "type": "string", "required": True},
-            {"name": "partitions", "type": "integer", "default": 3},
-            {"name": "retention_ms", "type": "integer", "default": 604800000},
-            {"name": "schema", "type": "string", "required": False},
-        ],
-    ),
-    TemplateInfo(
-        name="database",
-        description="Provision a managed database (RDS Postgres/MySQL/Aurora)",
-        category="infrastructure",
-        parameters=[
-            {"name": "db_name", "type": "string", "required": True},
-            {"name": "engine", "type": "string", "options": ["postgres", "mysql", "aurora-postgres"], "required": True},
-            {"name": "instance_class", "type": "string", "default": "db.t3.medium"},
-            {"name": "storage_gb", "type": "integer", "default": 20},
-        ],
-    ),
-    TemplateInfo(
-        name="api-service",
-        description="Create a REST API service with OpenAPI spec and golden path patterns",
-        category="application",
-        parameters=[
-            {"name": "service_name", "type": "string", "required": True},
-            {"name": "language", "type": "string", "options": ["python", "go", "node"], "required": True},
-            {"name": "auth_required", "type": "boolean", "default": True},
-        ],
-    ),
-    TemplateInfo(
-        name="s3-bucket",
-        description="Create an S3 bucket with encryption and lifecycle policies",
-        category="infrastructure",
-        parameters=[
-            {"name": "bucket_name", "type": "string", "required": True},
-            {"name": "versioning", "type": "boolean", "default": True},
-            {"name": "lifecycle_days", "type": "integer", "default": 90},
-        ],
-    ),
-    TemplateInfo(
-        name="worker-service",
-        description="Create a background worker service (Kafka consumer or SQS processor)",
-        category="application",
-        parameters=[
-            {"name": "service_name", "type": "string", "required": True},
-            {"name": "source", "type": "string", "options": ["kafka", "sqs"], "required": True},
-            {"name": "topic_or_queue", "type": "string", "required": True},
-        ],
-    ),
-]
+    created_at: str
+    updated_at: str
+    duration_ms: int | None = None
+    items: list[dict] | None = None  # bulk requests only
 
 
 @router.get("/templates")
-async def list_templates():
-    return {"templates": [t.model_dump() for t in TEMPLATES]}
+async def list_templates(request: Request, category: str | None = None):
+    payload, etag = template_registry.listing(category)
+    return cached_json(request, payload, etag)
 
 
 @router.get("/templates/{template_name}")
-async def get_template(template_name: str):
-    for t in TEMPLATES:
-        if t.name == template_name:
-            return t.model_dump()
-    return {"error": f"Template '{template_name}' not found"}
-
-
-@router.post("/provision")
-async def provision(request: ProvisionRequest):
-    # TODO: Wire up self-service engine
-    import uuid
-
-    return ProvisionStatus(
-        request_id=str(uuid.uuid4()),
-        status="pending",
-        steps=[
-            {"name": "validate_policies", "status": "pending"},
-            {"name": "create_repo", "status": "pending"},
-            {"name": "generate_configs", "status": "pending"},
-            {"name": "deploy_gitops", "status": "pending"},
-            {"name": "register_catalog", "status": "pending"},
-            {"name": "notify_team", "status": "pending"},
-        ],
-    ).model_dump()
+async def get_template(request: Request, template_name: str):
+    template = template_registry.get(template_name)
+    if template is None:
+        return {"error": f"Template '{template_name}' not found"}
+    return cached_json(request, template.payload, template.etag)
+
+
+def _requester(user: dict | None) -> str:
+    user = user or {}
+    return user.get("preferred_username") or user.get("sub", "")
+
+
+def _validated(template_name: str, parameters: dict) -> dict:
+    template = template_registry.get(template_name)
+    if template is None:
+        raise HTTPException(status_code=404, detail=f"Template '{template_name}' not found")
+    try:
+        return template.validate(parameters)
+    except TemplateValidationError as e:
+        raise HTTPException(status_code=422, detail={"errors": e.errors}) from None
+
+
+@router.post("/provision", response_model=ProvisionStatus)
+async def provision(request: ProvisionRequest, user: dict | None = Depends(get_current_user)):
+    parameters = _validated(request.template_name, request.parameters)
+    job = await provisioning_engine.submit(
+        request.template_name, parameters, requested_by=_requester(user)
+    )
+    return job.snapshot()
+
+
+@router.post("/provision/bulk", response_model=ProvisionStatus)
+async def provision_bulk(
+    request: BulkProvisionRequest, user: dict | None = Depends(get_current_user)
+):
+    """Provision many items as one job; every item is validated before anything starts."""
+    if not request.items:
+        raise HTTPException(status_code=400, detail="No items to provision")
+    errors, seen, items = [], {}, []
+    for index, item in enumerate(request.items):
+        try:
+            parameters = _validated(item.template_name, item.parameters)
+            name = service_name(parameters)
+        except HTTPException as e:
+            errors.append({"index": index, "error": e.detail})
+            continue
+        except ValueError as e:
+            errors.append({"index": index, "error": str(e)})
+            continue
+        if (item.template_name, name) in seen:
+            first = seen[(item.template_name, name)]
+            errors.append({"index": index, "error": f"Duplicate of item {first}"})
+        seen.setdefault((item.template_name, name), index)
+        items.append({"template_name": item.template_name, "parameters": parameters})
+    if errors:
+        raise HTTPException(status_code=400, detail={"errors": errors})
+
+    job = await provisioning_engine.submit_bulk(
+        items, requested_by=_requester(user), slack_channel=request.slack_channel
+    )
+    return job.snapshot()
+
+
+@router.get("/provision/{request_id}", response_model=ProvisionStatus)
+async def provision_status(request_id: str):
+    job = await provisioning_engine.get(request_id)
+    if job is None:
+        raise HTTPException(
+            status_code=404, detail=f"Provisioning request '{request_id}' not found"
+        )
+    return job.snapshot()
+
+
+@router.get("/provision/{request_id}/events")
+async def provision_events(request_id: str):
+    if await provisioning_engine.get(request_id) is None:
+        raise HTTPException(
+            status_code=404, detail=f"Provisioning request '{request_id}' not found"
+        )
+
+    async def event_generator():
+        async for snapshot in provisioning_engine.events(request_id):
+            yield {"event": "progress", "data": json.dumps(snapshot)}
+
+    return EventSourceResponse(event_generator())
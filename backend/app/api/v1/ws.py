@@ -0,0 +1,182 @@
+"""WebSocket chat channel.
+
+One connection authenticates once, then carries any number of chat requests
+multiplexed by a client-chosen id:
+
+    -> {"type": "auth", "token": "<access token>"}   (first frame, unless sent as Authorization)
+    <- {"type": "ready", "user": "<sub>"}
+    -> {"type": "chat", "id": "1", "message": "...", "conversation_id": "..."}
+    <- {"type": "queue" | "thinking" | "decision" | "agent_output" | "message" | "done",
+        "id": "1", ...}
+    -> {"type": "cancel", "id": "1"}
+    <- {"type": "cancelled", "id": "1"}
+
+Events are the SSE stream's, tagged with the request id. Each request goes
+through chat admission and gets its own deadline, as on the HTTP endpoints.
+Outgoing chat events take one of a bounded number of send slots: a client that
+reads slowly pauses the requests producing them instead of making the server
+buffer without limit. Replies to the client's own frames (cancelled, pong,
+errors) skip the slots, so a cancel is answered even while the events are
+backed up. Replies are bounded too: a client that keeps sending frames while
+``REPLY_BACKLOG`` replies wait unread is disconnected with 1008.
+"""
+
+import asyncio
+import contextlib
+import time
+import uuid
+
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+
+from app.agents.supervisor import SupervisorAgent
+from app.api.deps import authenticate
+from app.config import settings
+from app.services.admission import AdmissionRejectedError, admission
+from app.services.deadline import deadline_scope
+
+router = APIRouter(tags=["chat"])
+
+CLOSE_UNAUTHORIZED = 4401
+CLOSE_POLICY_VIOLATION = 1008
+REPLY_BACKLOG = 32  # unread replies to a client's frames before it is disconnected
+
+
+class SlowClientError(Exception):
+    """The client sends frames but does not read the replies."""
+
+
+class ChatConnection:
+    def __init__(self, websocket: WebSocket, user: dict):
+        self.websocket = websocket
+        self.user = user
+        self.outbox: asyncio.Queue[tuple[dict, bool]] = asyncio.Queue()  # (frame, holds a slot)
+        self.slots = asyncio.Semaphore(settings.ws_send_queue_size)
+        self.replies = 0  # replies queued and not yet sent
+        self.overflowed = False
+        self.requests: dict[str, asyncio.Task] = {}
+
+    async def send(self, frame: dict):
+        """Queue a chat event for the client; waits while all send slots are taken."""
+        await self.slots.acquire()
+        self.outbox.put_nowait((frame, True))
+
+    def reply(self, frame: dict):
+        """Queue a reply to a client frame without waiting; each answers one frame the client sent.
+
+        Past REPLY_BACKLOG unsent replies the frame is dropped and the connection
+        marked for closing, which receive() does before reading the next frame.
+        """
+        if self.replies >= REPLY_BACKLOG:
+            self.overflowed = True
+            return
+        self.replies += 1
+        self.outbox.put_nowait((frame, False))
+
+    def reply_error(self, request_id: str, error: str, **extra):
+        self.reply({"type": "error", "id": request_id, "error": error, **extra})
+
+    async def pump(self):
+        while True:
+            frame, slot = await self.outbox.get()
+            await self.websocket.send_json(frame)
+            if slot:
+                self.slots.release()
+            else:
+                self.replies -= 1
+
+    async def receive(self):
+        while True:
+            if self.overflowed:
+                raise SlowClientError(f"{REPLY_BACKLOG} replies are waiting to be read")
+            try:
+                frame = await self.websocket.receive_json()
+            except ValueError:
+                frame = None
+            if not isinstance(frame, dict):
+                self.reply({"type": "error", "error": "Frames must be JSON objects"})
+                continue
+            kind, request_id = frame.get("type"), str(frame.get("id", ""))
+            if kind == "chat":
+                if not request_id or request_id in self.requests:
+                    self.reply_error(request_id, "Each chat needs a unique id")
+                    continue
+                self.requests[request_id] = asyncio.create_task(self.chat(request_id, frame))
+            elif kind == "cancel":
+                task = self.requests.pop(request_id, None)
+                if task is not None:
+                    task.cancel()
+                    self.reply({"type": "cancelled", "id": request_id})
+            elif kind == "ping":
+                self.reply({"type": "pong"})
+            else:
+                self.reply_error(request_id, f"Unknown frame type '{kind}'")
+
+    async def chat(self, request_id: str, frame: dict):
+        try:
+            requested = float(frame.get("timeout") or settings.chat_deadline)
+            budget = min(settings.chat_deadline, requested)
+            deadline = time.monotonic() + budget
+            ticket = admission.enter(self.user.get("sub", "anonymous"))
+        except ValueError:
+            self.reply_error(request_id, "timeout must be a number of seconds")
+            self.requests.pop(request_id, None)
+            return
+        except AdmissionRejectedError as e:
+            self.reply_error(request_id, str(e), retry_after=e.retry_after)
+            self.requests.pop(request_id, None)
+            return
+        tokens = 0
+        try:
+            async for position in ticket.queue_positions(settings.chat_queue_timeout):
+                await self.send({"type": "queue", "id": request_id, "position": position})
+            registry = self.websocket.app.state.agent_registry
+            supervisor = SupervisorAgent(registry=registry, settings=settings)
+            conversation_id = frame.get("conversation_id") or str(uuid.uuid4())
+            with deadline_scope(at=deadline):
+                # aclosing: cancelling this request must close the stream (and the supervisor run).
+                stream = supervisor.stream(frame.get("message", ""), conversation_id)
+                async with contextlib.aclosing(stream) as events:
+                    async for event in events:
+                        if event.get("type") == "done":
+                            usage = event.get("usage", {})
+                            tokens = usage.get("input", 0) + usage.get("output", 0)
+                        await self.send({**event, "id": request_id})
+        except Exception as e:
+            await self.send({"type": "error", "id": request_id, "error": str(e)})
+        finally:
+            ticket.release(tokens)
+            self.requests.pop(request_id, None)
+
+    def close(self):
+        for task in self.requests.values():
+            task.cancel()
+
+
+@router.websocket("/ws")
+async def chat_socket(websocket: WebSocket):
+    await websocket.accept()
+    try:
+        token = websocket.headers.get("authorization", "").removeprefix("Bearer ").strip() or None
+        if token is None:
+            frame = await asyncio.wait_for(websocket.receive_json(), settings.ws_auth_timeout)
+            if not isinstance(frame, dict) or frame.get("type") != "auth":
+                raise HTTPException(status_code=401, detail="The first frame must be an auth frame")
+            token = frame.get("token") or None
+        user = await authenticate(token)
+    except (HTTPException, TimeoutError, ValueError) as e:
+        reason = getattr(e, "detail", "Not authenticated")
+        await websocket.close(code=CLOSE_UNAUTHORIZED, reason=reason)
+        return
+
+    connection = ChatConnection(websocket, user)
+    await websocket.send_json({"type": "ready", "user": user.get("sub")})
+    pump = asyncio.create_task(connection.pump())
+    try:
+        await connection.receive()
+    except WebSocketDisconnect:
+        pass
+    except SlowClientError as e:
+        await websocket.close(code=CLOSE_POLICY_VIOLATION, reason=str(e))
+    finally:
+        connection.close()
+        pump.cancel()
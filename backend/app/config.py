@@ -26,26 +26,72 @@ class Settings(BaseSettings):
     keycloak_realm: str = "idpportal"
     keycloak_client_id: str = ""
     keycloak_client_secret: str = ""
+    auth_jwks_ttl: int = 3600  # seconds before the realm signing keys are refetched
+    auth_claims_cache_size: int = 10000  # verified tokens kept until they expire
 
     # LLM
     llm_provider: str = "anthropic"  # anthropic | openai
     anthropic_api_key: str = ""
     openai_api_key: str = ""
     llm_model: str = "claude-sonnet-4-20250514"
+    llm_prompt_caching: bool = True  # mark the system prompt + tools prefix for provider caching
+    llm_timeout: float = 120.0  # seconds per LLM request
+    llm_fast_model: str = ""  # fast tier; empty = claude-3-5-haiku-20241022 / gpt-4o-mini
+    llm_role_tiers: str = ""  # e.g. routing=fast,tools=fast,synthesis=strong,github.tools=strong
+    # e.g. routing=2048,tools=1024,synthesis=4096,github.synthesis=8192
+    llm_role_max_tokens: str = ""
+    # Fast routing decisions less sure than this are re-asked on llm_model.
+    llm_escalation_confidence: float = 0.6
+    # Final answers combining this many agents' results are written on llm_model.
+    llm_escalation_agents: int = 2
+    # ai.embedding_model in config.yaml; needs OPENAI_API_KEY.
+    embedding_model: str = "text-embedding-3-small"
+    embedding_dimensions: int = 1536
+    semantic_cache_enabled: bool = True  # answer near-duplicate questions from earlier answers
+    semantic_cache_threshold: float = 0.95  # minimum cosine similarity for a cached answer
+    semantic_cache_ttl: int = 120  # seconds an answer stays fresh, unless its agents need less
+    # Per-agent overrides, e.g. argocd=30,jira=0 (0 = never cache).
+    semantic_cache_agent_ttls: str = ""
+    chat_max_concurrent: int = 16  # chat requests running at once, across all users
+    chat_max_concurrent_per_user: int = 2  # running + queued chat requests per user
+    chat_max_queue: int = 64  # chat requests waiting for admission before new ones get 429
+    chat_queue_timeout: float = 30.0  # seconds a queued chat request waits before giving up
+    # Seconds per chat request; clients may ask for less with X-Request-Timeout.
+    chat_deadline: float = 120.0
+    chat_batch_concurrency: int = 4  # prompts of one batch request running at once
+    chat_batch_max_items: int = 100
+    ws_auth_timeout: float = 10.0  # seconds a new WebSocket has to send its auth frame
+    # Chat events buffered per WebSocket before its requests are paused.
+    ws_send_queue_size: int = 64
+    chat_token_budget_per_minute: int = 0  # LLM tokens per minute across all chats, 0 = unlimited
+    agent_warm_up: bool = True  # import agent modules in the background after startup
+    agent_workers: str = ""  # name=endpoint,... agents served by A2A workers (unix:/path.sock or http://host:port)
+    agent_worker_connections: int = 16  # pooled connections per worker agent
+    # Shared secret the API presents to A2A workers; workers refuse to start without it.
+    agent_worker_token: str = ""
+    fast_router_enabled: bool = True  # send clear single-agent requests straight to the agent
+    fast_router_threshold: float = 0.25  # minimum cosine similarity to route locally
+    fast_router_margin: float = 0.4  # minimum relative lead over the second-best agent
 
     # GitHub
     github_app_id: str = ""
     github_app_private_key: str = ""
     github_token: str = ""
+    github_org: str = ""  # organization new service repositories are created in
+    gitops_repo: str = ""  # owner/repo that provisioned manifests are committed to
+    gitops_repo_branch: str = "main"
 
     # Jira
     jira_base_url: str = ""
     jira_api_token: str = ""
     jira_user_email: str = ""
+    jira_bulk_concurrency: int = 5  # parallel requests for bulk transition/comment tools
 
     # PagerDuty
     pagerduty_api_key: str = ""
     pagerduty_service_id: str = ""
+    pagerduty_sync_interval: int = 60  # seconds between incremental incident syncs
+    pagerduty_mirror_days: int = 30  # incident history kept in the local mirror
 
     # Slack
     slack_bot_token: str = ""
@@ -63,6 +109,8 @@ class Settings(BaseSettings):
     # Vault
     vault_addr: str = ""
     vault_token: str = ""
+    vault_walk_concurrency: int = 8  # parallel metadata requests, capped at the bulkhead
+    vault_metadata_ttl: int = 60  # seconds cached secret metadata stays valid
 
     # Kafka
     kafka_bootstrap_servers: str = ""
@@ -74,16 +122,31 @@ class Settings(BaseSettings):
     rancher_server_url: str = ""
     rancher_api_token: str = ""
     rancher_verify_tls: bool = True  # Disable only for dev with self-signed certs
+    rancher_fleet_concurrency: int = 4  # clusters queried at once, capped at half the bulkhead
+    rancher_cluster_timeout: float = 10.0  # seconds per cluster in fleet queries
 
     # Policy Agent
     policy_agent_url: str = "http://localhost:8443"
+    policies_dir: str = "../policies"  # Rego bundle, hashed to key the validation cache
 
     # Backstage
     backstage_url: str = "http://localhost:7007"
+    backstage_sync_interval: int = 300  # seconds between catalog mirror refreshes
+
+    # Self-service provisioning
+    templates_dir: str = "../templates"  # Backstage scaffolder templates, reloaded when changed
+    provisioning_step_timeout: int = 300  # seconds
+    provisioning_lease: int = 120  # seconds a replica's claim on a job lasts unless renewed
 
     # HTTP client settings
     http_timeout: int = 30  # seconds
 
+    # Integration resilience (per integration: jira, github, vault, ...)
+    integration_max_concurrent: int = 8  # requests in flight per integration
+    integration_failure_threshold: int = 5  # consecutive failures that open the circuit
+    integration_reset_timeout: float = 30.0  # seconds the circuit stays open before a probe
+    integration_retry_attempts: int = 3  # attempts for idempotent requests (1 = no retries)
+
     model_config = {"env_file": ".env", "env_file_encoding": "utf-8"}
 
     @field_validator("database_url")
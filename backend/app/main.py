@@ -3,11 +3,17 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_fastapi_instrumentator import Instrumentator
 
+from app.agents.backstage.catalog import catalog_mirror
+from app.agents.pagerduty.mirror import incident_mirror
 from app.agents.registry import AgentRegistry
+from app.agents.slack.outbox import outbox as slack_outbox
 from app.api.v1.router import api_v1_router
 from app.config import settings
 from app.services.database import close_db, init_db
+from app.services.provisioning import provisioning_engine
+from app.services.templates import template_registry
 
 logger = logging.getLogger(__name__)
 
@@ -17,16 +23,27 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info(f"Starting {settings.app_name} (env={settings.app_env})")
     await init_db()
+    await provisioning_engine.resume()
+    template_registry.refresh(force=True)
 
     registry = AgentRegistry()
     await registry.discover_and_register()
     app.state.agent_registry = registry
+    if settings.agent_warm_up:
+        registry.start_warm_up()  # agents otherwise load on first use
+    incident_mirror.start()
+    catalog_mirror.start()
 
     logger.info("Startup complete")
     yield
 
     # Shutdown
     logger.info("Shutting down...")
+    await registry.close()
+    await incident_mirror.stop()
+    await catalog_mirror.stop()
+    await provisioning_engine.shutdown()
+    await slack_outbox.drain()
     await close_db()
     logger.info("Shutdown complete")
 
@@ -50,3 +67,6 @@ app.add_middleware(
 )
 
 app.include_router(api_v1_router, prefix="/api/v1")
+
+# Request metrics plus the app's own counters (LLM tokens, ...) at /metrics
+Instrumentator().instrument(app).expose(app, include_in_schema=False)
@@ -0,0 +1,5 @@
+from app.models.base import Base
+from app.models.pagerduty import PagerDutyIncident
+from app.models.provisioning import ProvisioningJob
+
+__all__ = ["Base", "PagerDutyIncident", "ProvisioningJob"]
@@ -0,0 +1,24 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, String
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class PagerDutyIncident(Base):
+    """Local mirror of a PagerDuty incident, kept current by the incident sync."""
+
+    __tablename__ = "pagerduty_incidents"
+
+    id: Mapped[str] = mapped_column(String(32), primary_key=True)
+    title: Mapped[str] = mapped_column(String(1024))
+    status: Mapped[str] = mapped_column(String(32), index=True)
+    urgency: Mapped[str] = mapped_column(String(16), index=True)
+    service_id: Mapped[str] = mapped_column(String(32), index=True)
+    service_name: Mapped[str] = mapped_column(String(255))
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), index=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    url: Mapped[str] = mapped_column(String(1024), default="")
+    raw: Mapped[dict] = mapped_column(JSONB, default=dict)
@@ -0,0 +1,25 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, String
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class ProvisioningJob(Base):
+    """A self-service provisioning request and the state of each of its steps."""
+
+    __tablename__ = "provisioning_jobs"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    kind: Mapped[str] = mapped_column(String(16), default="single")  # single | bulk
+    template_name: Mapped[str] = mapped_column(String(128))
+    parameters: Mapped[dict] = mapped_column(JSONB, default=dict)
+    status: Mapped[str] = mapped_column(String(16), index=True)
+    steps: Mapped[list] = mapped_column(JSONB, default=list)
+    requested_by: Mapped[str] = mapped_column(String(255), default="")
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    claimed_by: Mapped[str | None] = mapped_column(String(36), nullable=True)  # replica running it
+    lease_until: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
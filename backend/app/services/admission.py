@@ -0,0 +1,220 @@
+"""Admission control for chat requests.
+
+Each chat request can make several LLM and agent calls, so requests are
+admitted against:
+
+- a global limit on concurrently running chats,
+- a per-user limit (requests over it are rejected at once rather than queued,
+  so one user cannot fill the queue),
+- an optional LLM token budget per minute, a token bucket that requests draw on
+  as they use tokens. While it is overdrawn, nothing new is admitted until it
+  refills.
+
+A batch request takes one ticket sized to the prompts it runs at once: it holds
+that many of the global slots, but counts once against its user's limit.
+
+Requests that cannot start immediately wait in a bounded FIFO queue. When the
+queue is full, the request is shed straight away with a 429, instead of letting
+latency grow without bound.
+"""
+
+import asyncio
+import time
+from collections import Counter, deque
+from collections.abc import AsyncIterator
+
+from prometheus_client import Counter as PrometheusCounter
+from prometheus_client import Gauge
+
+from app.config import settings
+
+ADMISSIONS = PrometheusCounter(
+    "chat_admissions_total",
+    "Chat admission outcomes (admitted, queued, rejected, timed_out)",
+    ["outcome"],
+)
+ACTIVE = Gauge(
+    "chat_active_requests", "Chat admission slots in use (one per running chat, several per batch)"
+)
+QUEUED = Gauge("chat_queued_requests", "Chat requests waiting for admission")
+
+
+class AdmissionRejectedError(Exception):
+    def __init__(self, reason: str, retry_after: int = 1):
+        super().__init__(reason)
+        self.retry_after = retry_after
+
+
+class Ticket:
+    """A chat request's place in admission; release() it when the request finishes."""
+
+    def __init__(self, controller: "AdmissionController", user: str, slots: int = 1):
+        self._controller = controller
+        self.user = user
+        self.slots = slots
+        self.admitted = asyncio.get_running_loop().create_future()
+        self._released = False
+
+    @property
+    def position(self) -> int:
+        """1-based place in the queue, or 0 once admitted."""
+        return self._controller.position(self)
+
+    async def wait(self, timeout: float | None = None) -> bool:
+        """Wait up to timeout seconds for admission; True once admitted."""
+        if self.admitted.done():
+            return True
+        try:
+            await asyncio.wait_for(asyncio.shield(self.admitted), timeout)
+            return True
+        except TimeoutError:
+            return False
+
+    async def queue_positions(self, timeout: float) -> AsyncIterator[int]:
+        """Wait up to timeout seconds for admission, yielding the queue position when it changes.
+
+        Raises TimeoutError if the request is still queued when the time is up.
+        """
+        loop = asyncio.get_running_loop()
+        give_up = loop.time() + timeout
+        position = None
+        while not await self.wait(timeout=1.0):
+            if self.position != position:
+                position = self.position
+                yield position
+            if loop.time() > give_up:
+                raise TimeoutError("Timed out waiting for capacity")
+
+    def debit(self, tokens_used: int):
+        """Draw tokens from the budget now, for work that finished before the whole request does."""
+        if not self._released and self.admitted.done():
+            self._controller.debit(tokens_used)
+
+    def release(self, tokens_used: int = 0):
+        if not self._released:
+            self._released = True
+            self._controller.release(self, tokens_used)
+
+
+class AdmissionController:
+    def __init__(
+        self, max_concurrent: int, per_user: int, max_queue: int, tokens_per_minute: int = 0
+    ):
+        self.max_concurrent = max_concurrent
+        self.per_user = per_user
+        self.max_queue = max_queue
+        self.tokens_per_minute = tokens_per_minute
+        self._active = 0
+        self._users: Counter[str] = Counter()  # running + queued requests per user
+        self._queue: deque[Ticket] = deque()
+        self._budget = float(tokens_per_minute)
+        self._budget_at = time.monotonic()
+        self._wakeup: asyncio.TimerHandle | None = None
+
+    def enter(self, user: str, slots: int = 1) -> Ticket:
+        """Admit or queue a request holding `slots` concurrent slots.
+
+        Raises AdmissionRejectedError, without waiting, if it can be neither admitted nor queued.
+        """
+        if self._users[user] >= self.per_user:
+            ADMISSIONS.labels("rejected").inc()
+            raise AdmissionRejectedError(
+                f"At most {self.per_user} concurrent chat requests per user"
+            )
+        ticket = Ticket(self, user, max(1, min(slots, self.max_concurrent)))
+        if not self._queue and self._can_start(ticket.slots):
+            self._start(ticket)
+            ADMISSIONS.labels("admitted").inc()
+        elif len(self._queue) < self.max_queue:
+            self._queue.append(ticket)
+            QUEUED.set(len(self._queue))
+            ADMISSIONS.labels("queued").inc()
+            self._schedule_budget_wakeup()
+        else:
+            ADMISSIONS.labels("rejected").inc()
+            raise AdmissionRejectedError(
+                "Chat is at capacity, try again shortly", retry_after=self._retry_after()
+            )
+        self._users[user] += 1
+        return ticket
+
+    def position(self, ticket: Ticket) -> int:
+        if ticket.admitted.done():
+            return 0
+        try:
+            return self._queue.index(ticket) + 1
+        except ValueError:
+            return 0
+
+    def release(self, ticket: Ticket, tokens_used: int = 0):
+        self._users[ticket.user] -= 1
+        if not self._users[ticket.user]:
+            del self._users[ticket.user]
+        if ticket.admitted.done() and not ticket.admitted.cancelled():
+            self._active -= ticket.slots
+            ACTIVE.set(self._active)
+            self.debit(tokens_used)
+        else:  # gave up while queued
+            if ticket in self._queue:
+                self._queue.remove(ticket)
+                QUEUED.set(len(self._queue))
+            ADMISSIONS.labels("timed_out").inc()
+        self._dispatch()
+
+    def debit(self, tokens_used: int):
+        self._refill()
+        self._budget -= tokens_used
+
+    def _can_start(self, slots: int = 1) -> bool:
+        if self._active + slots > self.max_concurrent:
+            return False
+        self._refill()
+        return not self.tokens_per_minute or self._budget > 0
+
+    def _start(self, ticket: Ticket):
+        self._active += ticket.slots
+        ACTIVE.set(self._active)
+        ticket.admitted.set_result(True)
+
+    def _dispatch(self):
+        while self._queue and self._can_start(self._queue[0].slots):
+            self._start(self._queue.popleft())
+        QUEUED.set(len(self._queue))
+        self._schedule_budget_wakeup()
+
+    def _refill(self):
+        if not self.tokens_per_minute:
+            return
+        now = time.monotonic()
+        rate = self.tokens_per_minute / 60
+        self._budget = min(self.tokens_per_minute, self._budget + (now - self._budget_at) * rate)
+        self._budget_at = now
+
+    def _schedule_budget_wakeup(self):
+        """If only the token budget holds the queue back, dispatch again once it has refilled."""
+        if not self._queue or self._wakeup is not None:
+            return
+        if self._active + self._queue[0].slots > self.max_concurrent:
+            return
+        if not self.tokens_per_minute or self._budget > 0:
+            return
+        delay = -self._budget / (self.tokens_per_minute / 60) + 0.01
+
+        def wake():
+            self._wakeup = None
+            self._dispatch()
+
+        self._wakeup = asyncio.get_running_loop().call_later(delay, wake)
+
+    def _retry_after(self) -> int:
+        if self.tokens_per_minute and self._budget <= 0:
+            return max(1, int(-self._budget / (self.tokens_per_minute / 60)) + 1)
+        return 1
+
+
+admission = AdmissionController(
+    max_concurrent=settings.chat_max_concurrent,
+    per_user=settings.chat_max_concurrent_per_user,
+    max_queue=settings.chat_max_queue,
+    tokens_per_minute=settings.chat_token_budget_per_minute,
+)
@@ -1,46 +1,156 @@
+"""Keycloak access token verification.
+
+Signing keys come from the realm's JWKS endpoint and are kept as parsed key
+objects indexed by ``kid``. A token signed with an unknown ``kid`` (Keycloak
+rotated its keys) triggers a refresh. Concurrent refreshes share one request, and
+refresh attempts, failed ones included, are at least ``JWKS_MIN_REFRESH_INTERVAL``
+seconds apart, so neither a cold start, a flood of forged tokens nor a Keycloak
+outage stampedes Keycloak. While Keycloak is unreachable, tokens signed with an
+already known ``kid`` keep verifying against the last good keys.
+
+Verified claims are cached by token hash until the token expires. The UI's SSE
+and polling connections present the same token many times a minute, and after
+the first request each of them costs a dictionary lookup instead of an RSA
+signature check.
+"""
+
+import asyncio
+import hashlib
 import logging
+import time
+from collections import OrderedDict
 
 import httpx
 from fastapi import HTTPException
-from jose import JWTError, jwt
+from jose import JWTError, jwk, jwt
 
 from app.config import settings
+from app.services.deadline import http_timeout
 
 logger = logging.getLogger(__name__)
 
-_cached_public_key: str | None = None
+ALGORITHMS = ["RS256"]
+JWKS_MIN_REFRESH_INTERVAL = 30.0  # seconds
+
+
+class JWKSCache:
+    def __init__(self):
+        self._keys: dict[str, jwk.Key] = {}
+        self._fetched_at: float | None = None
+        self._attempted_at: float | None = None
+        self._error: httpx.HTTPError | None = None  # of the last attempt, re-raised while throttled
+        self._refresh: asyncio.Task | None = None
+
+    @property
+    def url(self) -> str:
+        realm = f"{settings.keycloak_url}/realms/{settings.keycloak_realm}"
+        return f"{realm}/protocol/openid-connect/certs"
+
+    async def get_key(self, kid: str) -> jwk.Key:
+        stale = (
+            self._fetched_at is None
+            or time.monotonic() - self._fetched_at > settings.auth_jwks_ttl
+        )
+        if kid not in self._keys or stale:
+            try:
+                await self.refresh()
+            except httpx.HTTPError as e:
+                if kid not in self._keys:
+                    raise
+                logger.warning(f"JWKS refresh failed, serving the cached key '{kid}': {e}")
+        if kid not in self._keys:
+            raise JWTError(f"Unknown signing key '{kid}'")
+        return self._keys[kid]
 
+    async def refresh(self):
+        """Refetch the JWKS, sharing one request between concurrent callers."""
+        if self._refresh is None:
+            recent = (
+                self._attempted_at is not None
+                and time.monotonic() - self._attempted_at < JWKS_MIN_REFRESH_INTERVAL
+            )
+            if recent:
+                if self._error is not None:
+                    raise self._error
+                return
+            self._attempted_at = time.monotonic()
+            self._refresh = asyncio.create_task(self._fetch())
+            self._refresh.add_done_callback(lambda _: setattr(self, "_refresh", None))
+        await asyncio.shield(self._refresh)
 
-async def _get_keycloak_public_key() -> str:
-    global _cached_public_key
-    if _cached_public_key:
-        return _cached_public_key
+    async def _fetch(self):
+        try:
+            async with httpx.AsyncClient(timeout=http_timeout()) as client:
+                resp = await client.get(self.url)
+                resp.raise_for_status()
+                data = resp.json()
+        except httpx.HTTPError as e:
+            self._error = e
+            raise
+        self._error = None
+        keys = {}
+        for key in data.get("keys", []):
+            if key.get("use", "sig") != "sig" or key.get("alg", ALGORITHMS[0]) not in ALGORITHMS:
+                continue
+            try:
+                keys[key["kid"]] = jwk.construct(key, algorithm=key.get("alg", ALGORITHMS[0]))
+            except Exception as e:
+                logger.warning(f"Skipping unusable JWKS key {key.get('kid')}: {e}")
+        self._keys = keys
+        self._fetched_at = time.monotonic()
+        logger.info(f"Loaded {len(keys)} signing keys from {self.url}")
 
-    url = f"{settings.keycloak_url}/realms/{settings.keycloak_realm}"
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(url)
-        resp.raise_for_status()
-        data = resp.json()
-        _cached_public_key = data["public_key"]
-        return _cached_public_key
+
+class ClaimsCache:
+    """Bounded LRU of verified claims, keyed by token hash, each valid until the token's exp."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, dict] = OrderedDict()
+
+    def get(self, key: str) -> dict | None:
+        claims = self._entries.get(key)
+        if claims is None:
+            return None
+        if claims.get("exp", 0) <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return claims
+
+    def put(self, key: str, claims: dict):
+        if not claims.get("exp"):
+            return  # never cache a token without an expiry
+        self._entries[key] = claims
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+jwks = JWKSCache()
+verified_claims = ClaimsCache(settings.auth_claims_cache_size)
 
 
 async def verify_token(token: str) -> dict:
+    cache_key = hashlib.sha256(token.encode()).hexdigest()
+    claims = verified_claims.get(cache_key)
+    if claims is not None:
+        return claims
     try:
-        public_key = await _get_keycloak_public_key()
-        pem_key = f"-----BEGIN PUBLIC KEY-----\n{public_key}\n-----END PUBLIC KEY-----"
-
-        payload = jwt.decode(
+        header = jwt.get_unverified_header(token)
+        key = await jwks.get_key(header.get("kid", ""))
+        claims = jwt.decode(
             token,
-            pem_key,
-            algorithms=["RS256"],
+            key,
+            algorithms=ALGORITHMS,
             audience=settings.keycloak_client_id,
             options={"verify_aud": True, "verify_exp": True},
         )
-        return payload
     except JWTError as e:
         logger.warning(f"JWT verification failed: {e}")
         raise HTTPException(status_code=401, detail="Invalid or expired token")
     except httpx.HTTPError as e:
-        logger.error(f"Failed to fetch Keycloak public key: {e}")
+        logger.error(f"Failed to fetch Keycloak signing keys: {e}")
         raise HTTPException(status_code=503, detail="Authentication service unavailable")
+    verified_claims.put(cache_key, claims)
+    return claims
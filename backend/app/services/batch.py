@@ -0,0 +1,65 @@
+"""Work shared between the items of a batch.
+
+Inside a ``batch_scope``, ``shared(key, factory)`` runs each distinct key once:
+a later or concurrent caller with the same key awaits the first call's result
+instead of repeating it. The supervisor keys agent sub-tasks by (agent, task),
+and the integration transport keys idempotent requests by method, URL and
+credentials. Twenty batch items that all ask for the same ArgoCD application
+list then cost one request. Outside a scope ``shared`` just calls the factory,
+so interactive chats never see another request's results. Calls still running
+when the scope exits are cancelled, so an abandoned batch leaves nothing behind.
+"""
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+
+class BatchScope:
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Task] = {}
+        self.calls = 0  # distinct calls made
+        self.shared = 0  # calls answered from another item's result
+
+    async def once[T](self, key: Hashable, factory: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            self.calls += 1
+            task = self._calls[key] = asyncio.ensure_future(factory())
+
+            def forget_failure(t: asyncio.Task):
+                if t.cancelled() or t.exception() is not None:
+                    self._calls.pop(key, None)  # let a later item try again
+
+            task.add_done_callback(forget_failure)
+        else:
+            self.shared += 1
+        # Shielded: one item giving up (deadline, cancellation) must not cancel the others' call.
+        return await asyncio.shield(task)
+
+    def close(self):
+        """Cancel the calls still running; no item is left to await them."""
+        for task in self._calls.values():
+            task.cancel()
+
+
+_scope: ContextVar[BatchScope | None] = ContextVar("batch_scope", default=None)
+
+
+@contextmanager
+def batch_scope() -> Iterator[BatchScope]:
+    scope = BatchScope()
+    token = _scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _scope.reset(token)
+        scope.close()
+
+
+async def shared[T](key: Hashable, factory: Callable[[], Awaitable[T]]) -> T:
+    scope = _scope.get()
+    if scope is None:
+        return await factory()
+    return await scope.once(key, factory)
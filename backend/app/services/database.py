@@ -10,6 +10,7 @@ logger = logging.getLogger(__name__)
 
 engine = None
 async_session_factory = None
+_connected = False  # set once init_db() reached the database
 
 
 def _create_engine():
@@ -27,7 +28,11 @@ def _create_engine():
 
 
 async def init_db():
-    """Initialize database engine and verify connectivity."""
+    """Initialize database engine and verify connectivity.
+
+    Tables are created and changed by alembic migrations (``make db-migrate``), not here.
+    """
+    global _connected
     _create_engine()
     if engine is None:
         logger.warning("Skipping database initialization - no DATABASE_URL")
@@ -37,6 +42,7 @@ async def init_db():
             from sqlalchemy import text
 
             await conn.execute(text("SELECT 1"))
+        _connected = True
         logger.info("Database connection verified successfully")
     except Exception as e:
         logger.error(f"Database connection failed: {e}")
@@ -45,9 +51,15 @@ async def init_db():
         logger.warning("Continuing without database in non-production mode")
 
 
+def is_db_available() -> bool:
+    """True once init_db() has connected; features fall back to in-memory state otherwise."""
+    return _connected and async_session_factory is not None
+
+
 async def close_db():
     """Close the database engine and release connections."""
-    global engine
+    global _connected
+    _connected = False
     if engine is not None:
         await engine.dispose()
         logger.info("Database connections closed")
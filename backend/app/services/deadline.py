@@ -0,0 +1,73 @@
+"""Request-scoped deadlines.
+
+An endpoint opens a ``deadline_scope``. Everything awaited inside it (supervisor
+iterations, agent calls, tools, HTTP requests, kubectl) reads the remaining
+budget from a context variable and sizes its own timeout to fit. One hung backend
+can then no longer hold a request open past its deadline. Outside a scope, for
+example in background mirrors, each layer falls back to its configured default.
+"""
+
+import asyncio
+import time
+from collections.abc import Awaitable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from app.config import settings
+
+_deadline: ContextVar[float | None] = ContextVar("deadline", default=None)
+
+
+class DeadlineExceededError(TimeoutError):
+    """The request's time budget ran out."""
+
+
+@contextmanager
+def deadline_scope(seconds: float | None = None, at: float | None = None) -> Iterator[None]:
+    """Limit the enclosed work to `seconds` from now, or until the monotonic time `at`.
+
+    A scope can only tighten an enclosing deadline, never extend it.
+    """
+    relative = time.monotonic() + seconds if seconds is not None else None
+    candidates = [d for d in (at, relative, _deadline.get()) if d]
+    token = _deadline.set(min(candidates) if candidates else None)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> float | None:
+    """Seconds left in the current scope, or None without a deadline."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def timeout(default: float) -> float:
+    """`default`, shortened to the remaining budget.
+
+    Raises DeadlineExceededError once the budget is spent.
+    """
+    left = remaining()
+    if left is None:
+        return default
+    if left <= 0:
+        raise DeadlineExceededError("Request deadline exceeded")
+    return min(default, left)
+
+
+def http_timeout(default: float | None = None) -> float:
+    return timeout(default if default is not None else settings.http_timeout)
+
+
+async def within_deadline[T](awaitable: Awaitable[T]) -> T:
+    """Await within the remaining budget, raising DeadlineExceededError when it runs out."""
+    left = remaining()
+    if left is None:
+        return await awaitable
+    try:
+        return await asyncio.wait_for(awaitable, timeout=max(left, 0))
+    except TimeoutError:
+        if (remaining() or 0) > 0:
+            raise  # a shorter timeout inside the awaitable, not ours
+        raise DeadlineExceededError("Request deadline exceeded") from None
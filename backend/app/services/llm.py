@@ -1,25 +1,250 @@
+"""Chat model construction, provider prompt caching and token usage accounting.
+
+Every LLM call resends the same prefix: tool definitions, then the system prompt.
+With Anthropic, a ``cache_control`` breakpoint on the system message caches
+that whole prefix (tools come before the system prompt in the request), so later
+calls within the cache TTL read it at a fraction of the cost and latency. OpenAI
+caches identical prefixes of 1024+ tokens automatically. For both providers the
+prefix only hits the cache if it is byte-identical, so system prompts and tool
+lists must not contain per-request data.
+
+Calls are routed by role. ``routing`` covers supervisor decisions, ``tools``
+covers an agent picking its tools, and ``synthesis`` covers writing the answer
+from tool results. Each role runs on a tier, ``fast`` (``llm_fast_model``) or
+``strong`` (``llm_model``), with its own ``max_tokens``. ``llm_role_tiers`` and
+``llm_role_max_tokens`` override the defaults per role or per agent:
+
+    LLM_ROLE_TIERS=tools=fast,github.tools=strong
+    LLM_ROLE_MAX_TOKENS=routing=1024,synthesis=8192
+
+Callers escalate a fast call to the strong tier when its result is unusable or
+unsure. Latency, estimated cost and escalations are exported by tier, so the
+split can be tuned from the dashboards.
+"""
+
+import time
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.embeddings import Embeddings
 from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, SystemMessage
+from langchain_core.outputs import LLMResult
+from prometheus_client import Counter as PrometheusCounter
+from prometheus_client import Histogram
 
 from app.config import Settings
 
+LLM_TOKENS = PrometheusCounter(
+    "llm_tokens_total",
+    "LLM tokens by model and kind (input, output, cache_read, cache_write)",
+    ["model", "kind"],
+)
+
+LLM_LATENCY = Histogram(
+    "llm_request_duration_seconds",
+    "LLM request latency by tier and role",
+    ["tier", "role"],
+    buckets=(0.25, 0.5, 1, 2, 4, 8, 16, 32, 64, 120),
+)
+LLM_COST = PrometheusCounter(
+    "llm_cost_dollars_total",
+    "Estimated LLM spend by tier and role (MODEL_PRICES)",
+    ["tier", "role"],
+)
+LLM_ESCALATIONS = PrometheusCounter(
+    "llm_escalations_total",
+    "Fast-tier calls repeated on the strong tier, by role and reason",
+    ["role", "reason"],
+)
+
+ROLE_TIERS = {"routing": "fast", "tools": "fast", "synthesis": "strong"}
+ROLE_MAX_TOKENS = {"routing": 2048, "tools": 1024, "synthesis": 4096}
+FAST_MODELS = {"anthropic": "claude-3-5-haiku-20241022", "openai": "gpt-4o-mini"}
+# Dollars per million input and output tokens. Cache reads bill at 10% of input, cache writes
+# at 125%.
+MODEL_PRICES = {
+    "claude-sonnet-4-20250514": (3.0, 15.0),
+    "claude-3-5-haiku-20241022": (0.8, 4.0),
+    "gpt-4o": (2.5, 10.0),
+    "gpt-4o-mini": (0.15, 0.6),
+}
+
+_usage: ContextVar[Counter | None] = ContextVar("llm_usage", default=None)
+
+
+def token_usage(message) -> dict[str, int]:
+    usage = getattr(message, "usage_metadata", None) or {}
+    details = usage.get("input_token_details") or {}
+    return {
+        "input": usage.get("input_tokens", 0),
+        "output": usage.get("output_tokens", 0),
+        "cache_read": details.get("cache_read") or 0,
+        "cache_write": details.get("cache_creation") or 0,
+    }
+
+
+def estimated_cost(model: str, usage: dict[str, int]) -> float:
+    """Dollars for one call's token usage; 0 for models without a known price."""
+    if model not in MODEL_PRICES:
+        return 0.0
+    input_price, output_price = MODEL_PRICES[model]
+    # Providers count cached prompt tokens as part of the input.
+    uncached = usage.get("input", 0) - usage.get("cache_read", 0) - usage.get("cache_write", 0)
+    prompt = uncached + 0.1 * usage.get("cache_read", 0) + 1.25 * usage.get("cache_write", 0)
+    return (prompt * input_price + usage.get("output", 0) * output_price) / 1_000_000
+
+
+class _UsageRecorder(BaseCallbackHandler):
+    run_inline = True  # keep the caller's context so llm_usage() scopes see the tokens
+
+    def __init__(self, model: str, tier: str = "strong", role: str = "synthesis"):
+        self.model = model
+        self.tier = tier
+        self.role = role
+        self._started: dict[UUID, float] = {}
+
+    def on_chat_model_start(self, serialized: dict, messages: list, *, run_id: UUID, **kwargs):
+        self._started[run_id] = time.monotonic()
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs):
+        self._started.pop(run_id, None)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID | None = None, **kwargs):
+        if (started := self._started.pop(run_id, None)) is not None:
+            LLM_LATENCY.labels(self.tier, self.role).observe(time.monotonic() - started)
+        scope = _usage.get()
+        for generations in response.generations:
+            for generation in generations:
+                usage = token_usage(getattr(generation, "message", None))
+                LLM_COST.labels(self.tier, self.role).inc(estimated_cost(self.model, usage))
+                for kind, count in usage.items():
+                    if count:
+                        LLM_TOKENS.labels(self.model, kind).inc(count)
+                        if scope is not None:
+                            scope[kind] += count
+
+
+def add_usage(usage: dict[str, int]):
+    """Count tokens spent in another process (an agent worker) in the current llm_usage() scope."""
+    scope = _usage.get()
+    if scope is not None:
+        scope.update({kind: count for kind, count in usage.items() if count})
 
-def get_llm(settings: Settings) -> BaseChatModel:
+
+@contextmanager
+def llm_usage() -> Iterator[Counter]:
+    """Collect the tokens of every LLM call made inside the block, including sub-agent calls."""
+    scope: Counter = Counter()
+    token = _usage.set(scope)
+    try:
+        yield scope
+    finally:
+        _usage.reset(token)
+
+
+def cached_system_message(settings: Settings, content: str) -> SystemMessage:
+    """A system message that ends the cacheable prompt prefix."""
+    if settings.llm_provider == "anthropic" and settings.llm_prompt_caching:
+        return SystemMessage(content=[
+            {"type": "text", "text": content, "cache_control": {"type": "ephemeral"}},
+        ])
+    return SystemMessage(content=content)
+
+
+@dataclass(frozen=True)
+class ModelRoute:
+    role: str
+    tier: str  # fast | strong
+    model: str
+    max_tokens: int
+
+
+def _overrides(value: str) -> dict[str, str]:
+    pairs = (entry.partition("=") for entry in value.split(",") if entry.strip())
+    return {key.strip(): setting.strip() for key, _, setting in pairs}
+
+
+def model_route(
+    settings: Settings, role: str, agent: str = "", tier: str | None = None
+) -> ModelRoute:
+    """Tier, model and max_tokens for a role, with any per-agent override. tier forces the tier."""
+    tiers = _overrides(settings.llm_role_tiers)
+    tier = tier or tiers.get(f"{agent}.{role}") or tiers.get(role) or ROLE_TIERS[role]
+    if tier not in ("fast", "strong"):
+        raise ValueError(f"Unknown LLM tier for {agent + '.' if agent else ''}{role}: {tier}")
+    max_tokens = _overrides(settings.llm_role_max_tokens)
+    limit = max_tokens.get(f"{agent}.{role}") or max_tokens.get(role) or ROLE_MAX_TOKENS[role]
+    if tier == "strong":
+        model = settings.llm_model
+    else:
+        fast_model = FAST_MODELS.get(settings.llm_provider, settings.llm_model)
+        model = settings.llm_fast_model or fast_model
+    return ModelRoute(role=role, tier=tier, model=model, max_tokens=int(limit))
+
+
+def can_escalate(settings: Settings, route: ModelRoute) -> bool:
+    return route.tier == "fast" and route.model != settings.llm_model
+
+
+def get_llm(
+    settings: Settings, role: str = "synthesis", agent: str = "", tier: str | None = None
+) -> BaseChatModel:
+    route = model_route(settings, role, agent, tier)
+    callbacks = [_UsageRecorder(route.model, route.tier, route.role)]
     if settings.llm_provider == "anthropic":
         from langchain_anthropic import ChatAnthropic
 
         return ChatAnthropic(
-            model=settings.llm_model,
+            model=route.model,
             api_key=settings.anthropic_api_key,
             temperature=0,
-            max_tokens=4096,
+            max_tokens=route.max_tokens,
+            timeout=settings.llm_timeout,
+            callbacks=callbacks,
         )
     elif settings.llm_provider == "openai":
         from langchain_openai import ChatOpenAI
 
         return ChatOpenAI(
-            model=settings.llm_model,
+            model=route.model,
             api_key=settings.openai_api_key,
             temperature=0,
+            max_tokens=route.max_tokens,
+            stream_usage=True,
+            timeout=settings.llm_timeout,
+            callbacks=callbacks,
         )
     else:
         raise ValueError(f"Unsupported LLM provider: {settings.llm_provider}")
+
+
+async def select_tools(settings: Settings, agent: str, tools: list, messages: list) -> AIMessage:
+    """An agent's first step: pick tools on its ``tools`` tier.
+
+    If the tool calls come back malformed, the step is redone on the strong tier.
+    """
+    route = model_route(settings, "tools", agent)
+    response = await get_llm(settings, "tools", agent).bind_tools(tools).ainvoke(messages)
+    if response.invalid_tool_calls and can_escalate(settings, route):
+        LLM_ESCALATIONS.labels("tools", "invalid_tool_call").inc()
+        strong = get_llm(settings, "tools", agent, tier="strong").bind_tools(tools)
+        response = await strong.ainvoke(messages)
+    return response
+
+
+def get_embeddings(settings: Settings) -> Embeddings:
+    """Embedding model for the semantic cache: always OpenAI, as Anthropic has no embeddings API."""
+    from langchain_openai import OpenAIEmbeddings
+
+    return OpenAIEmbeddings(
+        model=settings.embedding_model,
+        api_key=settings.openai_api_key,
+        dimensions=settings.embedding_dimensions,
+        timeout=settings.http_timeout,
+    )
@@ -0,0 +1,42 @@
+"""Subprocesses that die with the request that started them.
+
+Cancelling a task that awaits ``proc.communicate()`` leaves the child running.
+``run`` kills the child when its caller is cancelled, e.g. because the chat
+client disconnected, so an abandoned request does not leave kubectl processes
+behind. The same happens when the request's deadline runs out.
+"""
+
+import asyncio
+import contextlib
+
+from app.services.deadline import DeadlineExceededError, timeout
+
+
+async def run(
+    cmd: list[str] | str, default_timeout: float | None = None
+) -> tuple[int, bytes, bytes]:
+    """Run cmd (an argument list, or a shell string) and return (returncode, stdout, stderr).
+
+    The child is killed after default_timeout seconds (TimeoutError), or sooner if the request
+    deadline runs out (DeadlineExceededError).
+    """
+    own_limit = default_timeout or float("inf")
+    limit = timeout(own_limit)
+    pipes = {"stdout": asyncio.subprocess.PIPE, "stderr": asyncio.subprocess.PIPE}
+    if isinstance(cmd, str):
+        proc = await asyncio.create_subprocess_shell(cmd, **pipes)
+    else:
+        proc = await asyncio.create_subprocess_exec(*cmd, **pipes)
+    try:
+        wait = None if limit == float("inf") else limit
+        stdout, stderr = await asyncio.wait_for(proc.communicate(), wait)
+    except (asyncio.CancelledError, TimeoutError) as e:
+        with contextlib.suppress(ProcessLookupError):
+            proc.kill()
+        await proc.wait()
+        if isinstance(e, TimeoutError):
+            if limit < own_limit:
+                raise DeadlineExceededError(f"Command timed out after {limit:.1f}s") from None
+            raise TimeoutError(f"Command timed out after {limit:.1f}s") from None
+        raise
+    return proc.returncode, stdout, stderr
@@ -0,0 +1,15 @@
+from app.services.provisioning.bulk import BULK_PIPELINE
+from app.services.provisioning.engine import ProvisioningEngine, provisioning_engine
+from app.services.provisioning.job import Job
+from app.services.provisioning.steps import PIPELINE, ProvisioningError, StepSkipped, StepSpec
+
+__all__ = [
+    "BULK_PIPELINE",
+    "PIPELINE",
+    "Job",
+    "ProvisioningEngine",
+    "ProvisioningError",
+    "StepSkipped",
+    "StepSpec",
+    "provisioning_engine",
+]
@@ -0,0 +1,174 @@
+"""Bulk provisioning: one job that provisions many services, topics or databases.
+
+The bulk pipeline has the same stages as a single request, but each stage works
+across all items at once. Policy checks go to the policy agent in one batch, and
+every item's manifests land in the GitOps repository as a single commit. Per-item
+GitHub, ArgoCD and Backstage calls run concurrently within each backend's limit.
+Each stage records a result per item. An item that fails drops out of later stages
+without affecting the others.
+"""
+
+import asyncio
+from collections.abc import Awaitable, Callable
+
+import yaml
+
+from app.agents.policy.tools import validate_many
+from app.agents.slack.outbox import outbox
+from app.config import settings
+from app.services.provisioning import steps
+from app.services.provisioning.job import Job
+from app.services.provisioning.manifests import render_manifests, service_name
+from app.services.provisioning.steps import ProvisioningError, StepSkipped, StepSpec, backend_slot
+
+
+def item_job(job: Job, index: int) -> Job:
+    """A single-request view of one item, so the regular step functions can run on it."""
+    item = job.parameters["items"][index]
+    item_steps = []
+    for step in job.steps:
+        result = job.item_result(step["name"], index)
+        item_steps.append({
+            "name": step["name"],
+            "status": result.get("status", "pending"),
+            "output": result.get("output"),
+        })
+    return Job(
+        id=f"{job.id}/{index}",
+        template_name=item["template_name"],
+        parameters=item["parameters"],
+        steps=item_steps,
+    )
+
+
+async def _record(job: Job, stage: str, index: int, result: dict):
+    step = job.step(stage)
+    items = (step["output"] or {}).get("items", {})
+    step["output"] = {"items": {**items, str(index): result}}
+    await job.changed()
+
+
+def _blocked(job: Job, index: int, depends_on: tuple[str, ...]) -> bool:
+    return any(
+        job.item_result(dep, index).get("status") in ("failed", "cancelled") for dep in depends_on
+    )
+
+
+async def _per_item(
+    job: Job, stage: str, backend: str, run: Callable[[Job], Awaitable[dict]]
+) -> dict:
+    """Run a regular step function for every item, within the backend's concurrency limit."""
+    depends_on = tuple(job.step(stage)["depends_on"])
+
+    async def one(index: int):
+        if job.item_result(stage, index).get("status") in ("completed", "skipped"):
+            return  # finished before a restart
+        if _blocked(job, index, depends_on):
+            cancelled = {"status": "cancelled", "error": "A previous step failed"}
+            await _record(job, stage, index, cancelled)
+            return
+        try:
+            async with backend_slot(backend):
+                result = {"status": "completed", "output": await run(item_job(job, index))}
+        except StepSkipped as e:
+            result = {"status": "skipped", "output": {"reason": str(e)}}
+        except Exception as e:
+            result = {"status": "failed", "error": str(e)}
+        await _record(job, stage, index, result)
+
+    await asyncio.gather(*(one(i) for i in range(len(job.parameters["items"]))))
+    return job.step(stage)["output"] or {"items": {}}
+
+
+async def bulk_validate_policies(job: Job) -> dict:
+    files, owners = [], []
+    for index, item in enumerate(job.parameters["items"]):
+        for m in render_manifests(item["template_name"], item["parameters"]):
+            config = yaml.safe_dump(m["manifest"], sort_keys=False)
+            files.append({"domain": m["domain"], "path": m["path"], "config": config})
+            owners.append(index)
+
+    async with backend_slot("policy"):
+        results = await validate_many(
+            [{"domain": f["domain"], "config": f["config"]} for f in files]
+        )
+
+    items = {
+        str(i): {"status": "completed", "output": {"validated": []}}
+        for i in range(len(job.parameters["items"]))
+    }
+    for index, f, r in zip(owners, files, results):
+        entry = items[str(index)]
+        if r.get("valid"):
+            entry["output"]["validated"].append(f["path"])
+        else:
+            violations = r.get("violations") or r.get("error")
+            entry.update(status="failed", error=f"Policy violations in {f['path']}: {violations}")
+    return {"items": items}
+
+
+async def bulk_generate_configs(job: Job) -> dict:
+    if not settings.gitops_repo:
+        raise ProvisioningError("GITOPS_REPO is not configured")
+    items, files = {}, []
+    for index, item in enumerate(job.parameters["items"]):
+        if _blocked(job, index, ("validate_policies",)):
+            items[str(index)] = {"status": "cancelled", "error": "A previous step failed"}
+            continue
+        paths = []
+        for m in render_manifests(item["template_name"], item["parameters"]):
+            content = yaml.safe_dump(m["manifest"], sort_keys=False)
+            files.append({"path": m["path"], "content": content})
+            paths.append(m["path"])
+        output = {"repo": settings.gitops_repo, "files": paths}
+        items[str(index)] = {"status": "completed", "output": output}
+
+    if files:
+        message = f"Bulk provision {len(items)} items (request {job.id})"
+        sha = await steps.commit_files(files, message)
+        for entry in items.values():
+            if entry["status"] == "completed":
+                entry["output"]["commit"] = sha
+    return {"items": items}
+
+
+async def bulk_create_repos(job: Job) -> dict:
+    return await _per_item(job, "create_repo", "github", steps.create_repo)
+
+
+async def bulk_commit_catalog_info(job: Job) -> dict:
+    return await _per_item(job, "commit_catalog_info", "github", steps.commit_catalog_info)
+
+
+async def bulk_deploy_gitops(job: Job) -> dict:
+    return await _per_item(job, "deploy_gitops", "argocd", steps.deploy_gitops)
+
+
+async def bulk_register_catalog(job: Job) -> dict:
+    return await _per_item(job, "register_catalog", "backstage", steps.register_catalog)
+
+
+async def bulk_notify_team(job: Job) -> dict:
+    """Send one summary message for the whole batch rather than one per item."""
+    channel = job.parameters.get("slack_channel") or settings.slack_default_channel
+    if not channel or not settings.slack_bot_token:
+        raise StepSkipped("No Slack channel configured")
+    lines, failed = [], 0
+    for index, item in enumerate(job.parameters["items"]):
+        ok = not _blocked(job, index, tuple(s["name"] for s in job.steps))
+        failed += not ok
+        name = service_name(item["parameters"])
+        lines.append(f"{'✅' if ok else '❌'} {name} ({item['template_name']})")
+    header = f"*Bulk provisioning {job.id}*: {len(lines) - failed}/{len(lines)} succeeded"
+    return outbox.enqueue(channel, {"text": "\n".join([header, *lines])})
+
+
+BULK_PIPELINE: list[StepSpec] = [
+    StepSpec("validate_policies", (), bulk_validate_policies),
+    StepSpec("create_repo", ("validate_policies",), bulk_create_repos),
+    StepSpec("commit_catalog_info", ("create_repo",), bulk_commit_catalog_info),
+    StepSpec("generate_configs", ("validate_policies",), bulk_generate_configs, backend="github"),
+    StepSpec("deploy_gitops", ("generate_configs",), bulk_deploy_gitops),
+    StepSpec("register_catalog", ("commit_catalog_info",), bulk_register_catalog),
+    StepSpec("notify_team", ("deploy_gitops", "register_catalog"), bulk_notify_team),
+]
@@ -0,0 +1,313 @@
+"""Durable, DAG-scheduled execution of self-service provisioning jobs.
+
+A job's steps run as soon as all of their dependencies have completed or been
+skipped, so independent steps overlap and a job takes roughly as long as its
+critical path. Every state change is persisted to Postgres (when configured) and
+published to subscribers of the job's progress stream. On startup, jobs that were
+still running are reloaded and continue from their unfinished steps.
+
+A replica holds a lease on each job it runs and renews it while the job runs.
+resume() takes only jobs whose lease has lapsed, locking the rows with SKIP
+LOCKED, so replicas starting together do not run the same job twice.
+"""
+
+import asyncio
+import logging
+import uuid
+from collections import defaultdict
+from collections.abc import AsyncIterator
+from datetime import timedelta
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+
+from app.config import settings
+from app.models import ProvisioningJob
+from app.services.database import get_session, is_db_available
+from app.services.provisioning.bulk import BULK_PIPELINE
+from app.services.provisioning.job import TERMINAL, Job, _now
+from app.services.provisioning.steps import PIPELINE, StepSkipped, StepSpec, backend_slot
+
+logger = logging.getLogger(__name__)
+
+# Seconds between database reads when following a job run by another process.
+EVENTS_POLL_INTERVAL = 2.0
+
+
+def _new_step(spec: StepSpec) -> dict:
+    return {
+        "name": spec.name,
+        "depends_on": list(spec.depends_on),
+        "status": "pending",  # pending | running | completed | skipped | failed | cancelled
+        "started_at": None,
+        "finished_at": None,
+        "duration_ms": None,
+        "output": None,
+        "error": None,
+    }
+
+
+class ProvisioningEngine:
+    def __init__(
+        self, pipeline: list[StepSpec] = PIPELINE, bulk_pipeline: list[StepSpec] = BULK_PIPELINE
+    ):
+        self._pipelines = {
+            "single": {spec.name: spec for spec in pipeline},
+            "bulk": {spec.name: spec for spec in bulk_pipeline},
+        }
+        self._jobs: dict[str, Job] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._listeners: defaultdict[str, set[asyncio.Queue]] = defaultdict(set)
+        self.replica = str(uuid.uuid4())  # claims the jobs this engine runs
+
+    async def submit(self, template_name: str, parameters: dict, requested_by: str = "") -> Job:
+        return await self._submit("single", template_name, parameters, requested_by)
+
+    async def submit_bulk(
+        self, items: list[dict], requested_by: str = "", slack_channel: str = ""
+    ) -> Job:
+        """Provision many {template_name, parameters} items as one aggregated job."""
+        parameters = {"items": items, "slack_channel": slack_channel}
+        return await self._submit("bulk", "bulk", parameters, requested_by)
+
+    async def _submit(
+        self, kind: str, template_name: str, parameters: dict, requested_by: str
+    ) -> Job:
+        job = Job(
+            id=str(uuid.uuid4()),
+            template_name=template_name,
+            parameters=parameters,
+            steps=[_new_step(spec) for spec in self._pipelines[kind].values()],
+            kind=kind,
+            requested_by=requested_by,
+            on_change=self._changed,
+        )
+        self._jobs[job.id] = job
+        await self._changed(job)
+        self._start(job)
+        return job
+
+    async def get(self, job_id: str) -> Job | None:
+        if job_id in self._jobs:
+            return self._jobs[job_id]
+        if not is_db_available():
+            return None
+        try:
+            async with get_session() as session:
+                row = await session.get(ProvisioningJob, job_id)
+        except Exception as e:
+            logger.warning(f"Failed to load provisioning job {job_id}: {e}")
+            return None
+        return _from_row(row) if row else None
+
+    async def events(self, job_id: str) -> AsyncIterator[dict]:
+        """Yield the job's current snapshot, then every update until it finishes."""
+        job = await self.get(job_id)
+        if job is None:
+            return
+        if job_id not in self._jobs:
+            # Not executing here (another replica runs it): follow its progress in the database.
+            snapshot = job.snapshot()
+            yield snapshot
+            while snapshot["status"] not in TERMINAL:
+                await asyncio.sleep(EVENTS_POLL_INTERVAL)
+                job = await self.get(job_id)
+                if job is None:
+                    return
+                if (latest := job.snapshot()) != snapshot:
+                    snapshot = latest
+                    yield snapshot
+            return
+        queue: asyncio.Queue[dict] = asyncio.Queue()
+        self._listeners[job_id].add(queue)
+        try:
+            snapshot = job.snapshot()
+            yield snapshot
+            while snapshot["status"] not in TERMINAL:
+                snapshot = await queue.get()
+                yield snapshot
+        finally:
+            self._listeners[job_id].discard(queue)
+            if not self._listeners[job_id]:
+                del self._listeners[job_id]
+
+    async def resume(self):
+        """Restart jobs that were interrupted by a process restart and that no replica holds."""
+        if not is_db_available():
+            return
+        unclaimed = or_(ProvisioningJob.lease_until.is_(None), ProvisioningJob.lease_until < _now())
+        try:
+            async with get_session() as session:
+                rows = (await session.execute(
+                    select(ProvisioningJob)
+                    .where(ProvisioningJob.status.in_(["pending", "running"]), unclaimed)
+                    .with_for_update(skip_locked=True)
+                )).scalars().all()
+                for row in rows:
+                    row.claimed_by, row.lease_until = self.replica, _lease_end()
+        except Exception as e:
+            logger.warning(f"Failed to load interrupted provisioning jobs: {e}")
+            return
+        for row in rows:
+            job = _from_row(row)
+            job.on_change = self._changed
+            for step in job.steps:
+                if step["status"] == "running":
+                    step.update(status="pending", started_at=None)
+            self._jobs[job.id] = job
+            self._start(job)
+        if rows:
+            logger.info(f"Resumed {len(rows)} provisioning jobs")
+
+    async def shutdown(self):
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._tasks.clear()
+        if not is_db_available():
+            return
+        # Hand the interrupted jobs over at once instead of when their leases lapse.
+        try:
+            async with get_session() as session:
+                await session.execute(
+                    update(ProvisioningJob)
+                    .where(ProvisioningJob.claimed_by == self.replica)
+                    .where(ProvisioningJob.status.in_(["pending", "running"]))
+                    .values(lease_until=None)
+                )
+        except Exception as e:
+            logger.warning(f"Failed to release provisioning job leases: {e}")
+
+    def _start(self, job: Job):
+        task = asyncio.create_task(self._execute(job))
+        self._tasks[job.id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job.id, None))
+
+    async def _execute(self, job: Job):
+        job.status = "running"
+        await self._changed(job)
+        running: set[asyncio.Task] = set()
+        try:
+            while True:
+                # Steps are declared in topological order, so failures cascade in one pass.
+                for step in job.steps:
+                    if step["status"] != "pending":
+                        continue
+                    deps = [job.step(d)["status"] for d in step["depends_on"]]
+                    if any(d in ("failed", "cancelled") for d in deps):
+                        step.update(status="cancelled", error="A dependency failed")
+                    elif all(d in ("completed", "skipped") for d in deps):
+                        step.update(status="running", started_at=_now().isoformat())
+                        running.add(asyncio.create_task(self._run_step(job, step)))
+                await self._changed(job)
+                if not running:
+                    break
+                done: set[asyncio.Task] = set()
+                while not done:
+                    done, running = await asyncio.wait(
+                        running, timeout=settings.provisioning_lease / 3,
+                        return_when=asyncio.FIRST_COMPLETED,
+                    )
+                    if not done and is_db_available():
+                        async with job.lock:
+                            await self._persist(job)  # renews the lease
+        except asyncio.CancelledError:
+            # Shutdown: leave the job "running" in the database so resume() picks it up.
+            for task in running:
+                task.cancel()
+            raise
+
+        failed = any(s["status"] in ("failed", "cancelled") for s in job.steps)
+        job.status = "failed" if failed else "completed"
+        await self._changed(job)
+        logger.info(f"Provisioning job {job.id} {job.status}")
+
+    async def _run_step(self, job: Job, step: dict):
+        spec = self._pipelines[job.kind][step["name"]]
+        started = _now()
+        items = len(job.parameters["items"]) if job.kind == "bulk" else 1
+        timeout = settings.provisioning_step_timeout * items
+        try:
+            if spec.backend:
+                async with backend_slot(spec.backend):
+                    output = await asyncio.wait_for(spec.run(job), timeout=timeout)
+            else:
+                output = await asyncio.wait_for(spec.run(job), timeout=timeout)
+            step.update(status="completed", output=output)
+        except StepSkipped as e:
+            step.update(status="skipped", output={"reason": str(e)})
+        except TimeoutError:
+            step.update(status="failed", error=f"Timed out after {timeout}s")
+        except Exception as e:
+            logger.error(f"Provisioning step {step['name']} of job {job.id} failed: {e}")
+            step.update(status="failed", error=str(e))
+        finished = _now()
+        duration_ms = int((finished - started).total_seconds() * 1000)
+        step.update(finished_at=finished.isoformat(), duration_ms=duration_ms)
+
+    async def _changed(self, job: Job):
+        job.updated_at = _now()
+        snapshot = job.snapshot()
+        for queue in self._listeners.get(job.id, ()):
+            queue.put_nowait(snapshot)
+        if is_db_available():
+            async with job.lock:
+                await self._persist(job)
+
+    async def _persist(self, job: Job):
+        values = {
+            "id": job.id,
+            "kind": job.kind,
+            "template_name": job.template_name,
+            "parameters": job.parameters,
+            "status": job.status,
+            "steps": job.steps,
+            "requested_by": job.requested_by,
+            "created_at": job.created_at,
+            "updated_at": job.updated_at,
+            "claimed_by": self.replica,
+            "lease_until": _lease_end(),
+        }
+        stmt = insert(ProvisioningJob).values(values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ProvisioningJob.id],
+            set_={
+                "status": stmt.excluded.status,
+                "steps": stmt.excluded.steps,
+                "updated_at": stmt.excluded.updated_at,
+                "lease_until": stmt.excluded.lease_until,
+            },
+            where=ProvisioningJob.claimed_by == self.replica,
+        )
+        try:
+            async with get_session() as session:
+                result = await session.execute(stmt)
+        except Exception as e:
+            logger.warning(f"Failed to persist provisioning job {job.id}: {e}")
+            return
+        if result.rowcount == 0 and (task := self._tasks.get(job.id)) is not None:
+            # Our lease lapsed (e.g. the database was unreachable) and another replica took the job.
+            logger.warning(f"Provisioning job {job.id} was taken over by another replica")
+            self._jobs.pop(job.id, None)
+            task.cancel()
+
+
+def _lease_end():
+    return _now() + timedelta(seconds=settings.provisioning_lease)
+
+
+def _from_row(row: ProvisioningJob) -> Job:
+    return Job(
+        id=row.id,
+        kind=row.kind,
+        template_name=row.template_name,
+        parameters=row.parameters,
+        steps=row.steps,
+        status=row.status,
+        requested_by=row.requested_by,
+        created_at=row.created_at,
+        updated_at=row.updated_at,
+    )
+
+
+provisioning_engine = ProvisioningEngine()
@@ -0,0 +1,84 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+
+TERMINAL = {"completed", "failed"}
+
+
+def _now() -> datetime:
+    return datetime.now(UTC)
+
+
+@dataclass
+class Job:
+    id: str
+    template_name: str  # "bulk" for bulk jobs, whose items carry their own templates
+    parameters: dict
+    steps: list[dict]
+    kind: str = "single"  # single | bulk
+    status: str = "pending"  # pending | running | completed | failed
+    requested_by: str = ""
+    created_at: datetime = field(default_factory=_now)
+    updated_at: datetime = field(default_factory=_now)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False)
+    on_change: Callable[["Job"], Awaitable[None]] | None = field(default=None, repr=False)
+
+    def step(self, name: str) -> dict:
+        return next(s for s in self.steps if s["name"] == name)
+
+    def output(self, name: str) -> dict | None:
+        step = self.step(name)
+        return step["output"] if step["status"] == "completed" else None
+
+    async def changed(self):
+        """Publish and persist progress made inside a running step."""
+        if self.on_change is not None:
+            await self.on_change(self)
+
+    # -- bulk jobs: each step's output holds one result per item ----------
+
+    def item_result(self, stage: str, index: int) -> dict:
+        output = self.step(stage)["output"] or {}
+        return output.get("items", {}).get(str(index), {})
+
+    def item_status(self, index: int) -> str:
+        statuses = []
+        for step in self.steps:
+            status = self.item_result(step["name"], index).get("status")
+            if status is None and step["status"] in ("failed", "cancelled"):
+                status = "failed"
+            statuses.append(status)
+        if any(s in ("failed", "cancelled") for s in statuses):
+            return "failed"
+        if all(s in ("completed", "skipped") for s in statuses):
+            return "completed"
+        return "running" if any(statuses) else "pending"
+
+    def snapshot(self) -> dict:
+        finished = [s["finished_at"] for s in self.steps if s.get("finished_at")]
+        duration_ms = None
+        if self.status in TERMINAL and finished:
+            elapsed = datetime.fromisoformat(max(finished)) - self.created_at
+            duration_ms = int(elapsed.total_seconds() * 1000)
+        snapshot = {
+            "request_id": self.id,
+            "template_name": self.template_name,
+            "status": self.status,
+            # Bulk step outputs are reported per item under "items" instead.
+            "steps": [dict(s, output=None) if self.kind == "bulk" else dict(s) for s in self.steps],
+            "created_at": self.created_at.isoformat(),
+            "updated_at": self.updated_at.isoformat(),
+            "duration_ms": duration_ms,
+        }
+        if self.kind == "bulk":
+            snapshot["items"] = [
+                {
+                    "index": index,
+                    "template_name": item["template_name"],
+                    "status": self.item_status(index),
+                    "steps": {s["name"]: self.item_result(s["name"], index) for s in self.steps},
+                }
+                for index, item in enumerate(self.parameters["items"])
+            ]
+        return snapshot
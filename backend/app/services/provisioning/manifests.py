@@ -0,0 +1,134 @@
+"""Render the policy-compliant manifests a provisioning job deploys via GitOps."""
+
+APP_TEMPLATES = {"microservice", "api-service", "worker-service"}
+
+# Template engine names -> aws_db_instance engine values.
+DB_ENGINES = {"postgresql": "postgres"}
+
+
+def service_name(params: dict) -> str:
+    for key in ("service_name", "name", "topic_name", "topicName", "db_name", "bucket_name"):
+        if params.get(key):
+            return params[key]
+    raise ValueError("Provision request is missing a service, topic, database or bucket name")
+
+
+def _param(params: dict, *keys: str, default=None):
+    """First value set under any of ``keys``: the template's camelCase or the agent's snake_case."""
+    for key in keys:
+        if params.get(key) is not None:
+            return params[key]
+    return default
+
+
+def _deployment(name: str, params: dict) -> dict:
+    return {
+        "apiVersion": "apps/v1",
+        "kind": "Deployment",
+        "metadata": {
+            "name": name, "namespace": params.get("namespace", name), "labels": {"app": name},
+        },
+        "spec": {
+            "replicas": params.get("replicas", 2),
+            "selector": {"matchLabels": {"app": name}},
+            "template": {
+                "metadata": {"labels": {"app": name}},
+                "spec": {
+                    "securityContext": {"runAsNonRoot": True, "runAsUser": 10001},
+                    "containers": [{
+                        "name": name,
+                        "image": f"ghcr.io/{params.get('org', 'platform')}/{name}:0.1.0",
+                        "ports": [{"containerPort": 8080}],
+                        "resources": {
+                            "requests": {"cpu": "100m", "memory": "128Mi"},
+                            "limits": {"cpu": "500m", "memory": "512Mi"},
+                        },
+                        "securityContext": {
+                            "allowPrivilegeEscalation": False,
+                            "readOnlyRootFilesystem": True,
+                        },
+                        "livenessProbe": {"httpGet": {"path": "/health", "port": 8080}},
+                        "readinessProbe": {"httpGet": {"path": "/ready", "port": 8080}},
+                    }],
+                },
+            },
+        },
+    }
+
+
+def _kafka_topic(name: str, params: dict) -> dict:
+    retention_ms = params.get("retention_ms", 604800000)
+    if params.get("retentionMs") is not None:
+        retention_ms = params["retentionMs"] * 3600000  # the template asks for hours
+    return {
+        "apiVersion": "kafka.strimzi.io/v1beta2",
+        "kind": "KafkaTopic",
+        "metadata": {"name": name, "namespace": "kafka", "labels": {"strimzi.io/cluster": "kafka"}},
+        "spec": {
+            "partitions": params.get("partitions", 6),
+            "replicas": params.get("replicas", 3),
+            "config": {
+                "retention.ms": str(retention_ms),
+                "cleanup.policy": _param(
+                    params, "cleanupPolicy", "cleanup_policy", default="delete"
+                ),
+            },
+        },
+    }
+
+
+def _database(name: str, params: dict) -> dict:
+    engine = _param(params, "engine", "databaseType", default="postgres")
+    return {
+        "resource_type": "aws_db_instance",
+        "name": name,
+        "values": {
+            "engine": DB_ENGINES.get(engine, engine),
+            "instance_class": _param(
+                params, "instanceClass", "instance_class", default="db.t3.medium"
+            ),
+            "allocated_storage": _param(params, "storageGb", "storage_gb", default=20),
+            "multi_az": _param(params, "multiAz", "multi_az", default=False),
+            "publicly_accessible": False,
+            "storage_encrypted": True,
+            "backup_retention_period": 7,
+        },
+    }
+
+
+def render_manifests(template_name: str, params: dict) -> list[dict]:
+    """Return [{"domain", "path", "manifest"}] for everything the template provisions."""
+    name = service_name(params)
+    manifests = []
+    if template_name in APP_TEMPLATES:
+        manifests.append({
+            "domain": "kubernetes",
+            "path": f"apps/{name}/deployment.yaml",
+            "manifest": _deployment(name, params),
+        })
+    if template_name == "kafka-topic":
+        manifests.append({
+            "domain": "kafka",
+            "path": f"kafka/topics/{name}.yaml",
+            "manifest": _kafka_topic(name, params),
+        })
+    elif params.get("needs_kafka") or params.get("enableKafka"):
+        topic = params.get("kafkaTopicName") or f"{name}.events"
+        manifests.append({
+            "domain": "kafka",
+            "path": f"kafka/topics/{topic}.yaml",
+            "manifest": _kafka_topic(topic, {}),
+        })
+    if template_name == "database":
+        manifests.append({
+            "domain": "terraform",
+            "path": f"databases/{name}.json",
+            "manifest": _database(name, params),
+        })
+    elif params.get("needs_database") or params.get("enableDatabase"):
+        manifests.append({
+            "domain": "terraform",
+            "path": f"databases/{name}.json",
+            "manifest": _database(f"{name}-db", {"engine": params.get("databaseType")}),
+        })
+    return manifests
@@ -0,0 +1,281 @@
+"""Provisioning steps and the dependency graph that orders them.
+
+Each step receives the running job and returns a JSON-serializable output that
+later steps can read through ``job.output(step_name)``. Steps must be idempotent:
+a job resumed after a restart re-runs any step that had not finished.
+"""
+
+import asyncio
+import base64
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import yaml
+
+from app.agents.policy.tools import validate_many
+from app.agents.slack.outbox import outbox
+from app.config import settings
+from app.services import resilience
+from app.services.provisioning.manifests import APP_TEMPLATES, render_manifests, service_name
+
+if TYPE_CHECKING:
+    from app.services.provisioning.job import Job
+
+GITHUB_API = "https://api.github.com"
+CATALOG_INFO_PATH = "catalog-info.yaml"
+GITOPS_COMMIT_ATTEMPTS = 5  # ref updates tried while other writers keep moving the branch
+
+# Concurrent calls allowed per backend across all provisioning jobs in this process.
+BACKEND_LIMITS = {"policy": 8, "github": 4, "argocd": 8, "backstage": 8, "slack": 4}
+_backend_slots: dict[str, asyncio.Semaphore] = {}
+_gitops_lock = asyncio.Lock()  # jobs in this process commit to the GitOps branch one at a time
+
+
+def backend_slot(backend: str) -> asyncio.Semaphore:
+    if backend not in _backend_slots:
+        _backend_slots[backend] = asyncio.Semaphore(BACKEND_LIMITS.get(backend, 4))
+    return _backend_slots[backend]
+
+
+class ProvisioningError(Exception):
+    """A step failed in a way that retrying the same request will not fix."""
+
+
+class StepSkipped(Exception):  # noqa: N818 - control flow, not an error
+    """The step does not apply to this request; the reason is recorded on the step."""
+
+
+@dataclass(frozen=True)
+class StepSpec:
+    name: str
+    depends_on: tuple[str, ...]
+    run: Callable[["Job"], Awaitable[dict]]
+    backend: str | None = None  # concurrency limit the step runs under, see BACKEND_LIMITS
+
+
+def _github_headers() -> dict:
+    return {
+        "Authorization": f"token {settings.github_token}",
+        "Accept": "application/vnd.github+json",
+        "X-GitHub-Api-Version": "2022-11-28",
+    }
+
+
+def _manifest_files(job: "Job") -> list[dict]:
+    return [
+        {**m, "content": yaml.safe_dump(m["manifest"], sort_keys=False)}
+        for m in render_manifests(job.template_name, job.parameters)
+    ]
+
+
+async def validate_policies(job: "Job") -> dict:
+    files = _manifest_files(job)
+    results = await validate_many([{"domain": f["domain"], "config": f["content"]} for f in files])
+    violations = [
+        {"path": f["path"], "violations": r.get("violations") or [r.get("error")]}
+        for f, r in zip(files, results)
+        if not r.get("valid")
+    ]
+    if violations:
+        paths = ", ".join(v["path"] for v in violations)
+        raise ProvisioningError(f"Policy violations in {paths}: {violations}")
+    return {"validated": [f["path"] for f in files]}
+
+
+async def create_repo(job: "Job") -> dict:
+    if job.template_name not in APP_TEMPLATES:
+        raise StepSkipped(f"Template '{job.template_name}' does not need a repository")
+    if not settings.github_org:
+        raise ProvisioningError("GITHUB_ORG is not configured")
+    name = service_name(job.parameters)
+    async with resilience.client("github", timeout=settings.http_timeout) as client:
+        resp = await client.post(
+            f"{GITHUB_API}/orgs/{settings.github_org}/repos",
+            headers=_github_headers(),
+            json={
+                "name": name,
+                "description": job.parameters.get("description", ""),
+                "private": True,
+                "auto_init": True,
+            },
+        )
+        if resp.status_code == 422:  # already exists, e.g. when resuming
+            resp = await client.get(
+                f"{GITHUB_API}/repos/{settings.github_org}/{name}", headers=_github_headers()
+            )
+        resp.raise_for_status()
+        data = resp.json()
+    return {
+        "url": data["html_url"],
+        "clone_url": data["clone_url"],
+        "name": data["full_name"],
+        "default_branch": data.get("default_branch", "main"),
+    }
+
+
+def _catalog_info(job: "Job") -> str:
+    """The Backstage Component entity describing the new service."""
+    name = service_name(job.parameters)
+    repo = job.output("create_repo")
+    entity = {
+        "apiVersion": "backstage.io/v1alpha1",
+        "kind": "Component",
+        "metadata": {
+            "name": name,
+            "description": job.parameters.get("description", ""),
+            "annotations": {"github.com/project-slug": repo["name"], "argocd/app-name": name},
+            "tags": [job.parameters["language"]] if job.parameters.get("language") else [],
+        },
+        "spec": {
+            "type": "service",
+            "lifecycle": "experimental",
+            "owner": job.parameters.get("owner", "unknown"),
+        },
+    }
+    return yaml.safe_dump(entity, sort_keys=False)
+
+
+async def commit_catalog_info(job: "Job") -> dict:
+    repo = job.output("create_repo")
+    if not repo:
+        raise StepSkipped("No repository to describe")
+    branch = repo["default_branch"]
+    url = f"{GITHUB_API}/repos/{repo['name']}/contents/{CATALOG_INFO_PATH}"
+    github = resilience.client("github", timeout=settings.http_timeout, headers=_github_headers())
+    async with github as client:
+        existing = await client.get(url, params={"ref": branch})
+        if existing.status_code == 200:  # committed before a restart
+            return {"path": CATALOG_INFO_PATH, "branch": branch, "sha": existing.json()["sha"]}
+        if existing.status_code != 404:
+            existing.raise_for_status()
+        resp = await client.put(url, json={
+            "message": "Add Backstage catalog entry",
+            "content": base64.b64encode(_catalog_info(job).encode()).decode(),
+            "branch": branch,
+        })
+        resp.raise_for_status()
+    return {"path": CATALOG_INFO_PATH, "branch": branch, "sha": resp.json()["content"]["sha"]}
+
+
+async def commit_files(files: list[dict], message: str) -> str:
+    """Commit several files to the GitOps repository as a single commit.
+
+    Uses the Git Data API (ref -> tree -> commit -> ref update), so the number of
+    requests does not grow with the number of files. Returns the new commit SHA.
+    If another writer moves the branch between reading it and updating it, GitHub
+    rejects the non-fast-forward update with 422 and the commit is rebuilt on the
+    new head.
+    """
+    repo = f"{GITHUB_API}/repos/{settings.gitops_repo}/git"
+    ref = f"heads/{settings.gitops_repo_branch}"
+    blobs = [
+        {"path": f["path"], "mode": "100644", "type": "blob", "content": f["content"]}
+        for f in files
+    ]
+    github = resilience.client("github", timeout=settings.http_timeout, headers=_github_headers())
+    async with _gitops_lock, github as client:
+        for _ in range(GITOPS_COMMIT_ATTEMPTS):
+            head = await client.get(f"{repo}/ref/{ref}")
+            head.raise_for_status()
+            parent = head.json()["object"]["sha"]
+            tree = await client.post(f"{repo}/trees", json={"base_tree": parent, "tree": blobs})
+            tree.raise_for_status()
+            commit = await client.post(f"{repo}/commits", json={
+                "message": message, "tree": tree.json()["sha"], "parents": [parent],
+            })
+            commit.raise_for_status()
+            sha = commit.json()["sha"]
+            update = await client.patch(f"{repo}/refs/{ref}", json={"sha": sha})
+            if update.status_code != 422:
+                update.raise_for_status()
+                return sha
+    raise ProvisioningError(
+        f"{settings.gitops_repo}@{settings.gitops_repo_branch} moved during each of "
+        f"{GITOPS_COMMIT_ATTEMPTS} commit attempts"
+    )
+
+
+async def generate_configs(job: "Job") -> dict:
+    if not settings.gitops_repo:
+        raise ProvisioningError("GITOPS_REPO is not configured")
+    files = _manifest_files(job)
+    sha = await commit_files(files, f"Provision {service_name(job.parameters)} (request {job.id})")
+    return {"repo": settings.gitops_repo, "commit": sha, "files": [f["path"] for f in files]}
+
+
+async def deploy_gitops(job: "Job") -> dict:
+    if job.parameters.get("gitops_engine", job.parameters.get("gitopsEngine", "argocd")) == "flux":
+        raise StepSkipped("Flux reconciles the GitOps repository automatically")
+    if job.template_name not in APP_TEMPLATES:
+        raise StepSkipped("Resources are synced by the existing platform applications")
+    name = service_name(job.parameters)
+    application = {
+        "metadata": {"name": name, "namespace": "argocd"},
+        "spec": {
+            "project": "default",
+            "source": {
+                "repoURL": f"https://github.com/{settings.gitops_repo}",
+                "path": f"apps/{name}",
+                "targetRevision": settings.gitops_repo_branch,
+            },
+            "destination": {
+                "server": "https://kubernetes.default.svc",
+                "namespace": job.parameters.get("namespace", name),
+            },
+            "syncPolicy": {
+                "automated": {"prune": True, "selfHeal": True},
+                "syncOptions": ["CreateNamespace=true"],
+            },
+        },
+    }
+    argocd = resilience.client(
+        "argocd", verify=settings.argocd_verify_tls, timeout=settings.http_timeout
+    )
+    async with argocd as client:
+        resp = await client.post(
+            f"{settings.argocd_server_url}/api/v1/applications",
+            headers={"Authorization": f"Bearer {settings.argocd_auth_token}"},
+            params={"upsert": "true"},
+            json=application,
+        )
+        resp.raise_for_status()
+    return {"application": name}
+
+
+async def register_catalog(job: "Job") -> dict:
+    repo, catalog_info = job.output("create_repo"), job.output("commit_catalog_info")
+    if not repo or not catalog_info:
+        raise StepSkipped("No repository to register")
+    target = f"{repo['url']}/blob/{catalog_info['branch']}/{catalog_info['path']}"
+    async with resilience.client("backstage", timeout=settings.http_timeout) as client:
+        resp = await client.post(
+            f"{settings.backstage_url}/api/catalog/locations",
+            json={"type": "url", "target": target},
+        )
+        if resp.status_code != 409:  # already registered
+            resp.raise_for_status()
+    return {"location": target}
+
+
+async def notify_team(job: "Job") -> dict:
+    channel = job.parameters.get("slack_channel") or settings.slack_default_channel
+    if not channel or not settings.slack_bot_token:
+        raise StepSkipped("No Slack channel configured")
+    name = service_name(job.parameters)
+    repo = job.output("create_repo")
+    text = f"*{name}* has been provisioned from the `{job.template_name}` template."
+    if repo:
+        text += f" <{repo['url']}|Repository>"
+    return outbox.enqueue(channel, {"text": text})
+
+
+PIPELINE: list[StepSpec] = [
+    StepSpec("validate_policies", (), validate_policies, backend="policy"),
+    StepSpec("create_repo", ("validate_policies",), create_repo, backend="github"),
+    StepSpec("commit_catalog_info", ("create_repo",), commit_catalog_info, backend="github"),
+    StepSpec("generate_configs", ("validate_policies",), generate_configs, backend="github"),
+    StepSpec("deploy_gitops", ("generate_configs",), deploy_gitops, backend="argocd"),
+    StepSpec("register_catalog", ("commit_catalog_info",), register_catalog, backend="backstage"),
+    StepSpec("notify_team", ("deploy_gitops", "register_catalog"), notify_team, backend="slack"),
+]
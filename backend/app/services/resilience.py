@@ -0,0 +1,264 @@
+"""Bulkheads, circuit breakers and retries for calls to external integrations.
+
+Each integration (jira, github, vault, ...) gets:
+
+- a bulkhead: at most ``integration_max_concurrent`` requests in flight, so a
+  slow backend holds a bounded number of connections instead of every chat's.
+  A request waits for a free slot for at most its remaining deadline
+  (``http_timeout`` outside one), then fails with IntegrationUnavailable.
+  Tools that fan out keep their own concurrency at or below the bulkhead, so
+  their requests queue briefly instead of failing,
+- a circuit breaker: after ``integration_failure_threshold`` consecutive
+  failures (connection errors, timeouts, 5xx), requests fail at once with
+  IntegrationUnavailable for ``integration_reset_timeout`` seconds. Then a single
+  probe request is let through, and its outcome closes or reopens the circuit,
+- jittered exponential retries, for idempotent requests only.
+
+Tools get all three by creating their HTTP client with ``client(name)``. A
+degraded integration then fails fast for the chats that use it, and leaves other
+chats unaffected.
+"""
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from enum import IntEnum
+
+import httpx
+from prometheus_client import Counter, Gauge
+from tenacity import (
+    AsyncRetrying,
+    RetryCallState,
+    retry_if_exception,
+    retry_if_result,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+
+from app.config import settings
+from app.services.batch import shared
+from app.services.deadline import timeout
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "LIST"})  # LIST is Vault's
+RETRY_STATUSES = frozenset({502, 503, 504})
+RETRY_BACKOFF = 0.2  # seconds, doubled per attempt with full jitter
+RETRY_BACKOFF_MAX = 2.0
+_WIRE_HEADERS = frozenset({"content-encoding", "content-length", "transfer-encoding"})
+
+CIRCUIT_STATE = Gauge(
+    "integration_circuit_state",
+    "Circuit breaker state per integration (0 closed, 1 half-open, 2 open)",
+    ["integration"],
+)
+CIRCUIT_TRANSITIONS = Counter(
+    "integration_circuit_transitions_total",
+    "Circuit breaker state changes",
+    ["integration", "state"],
+)
+REJECTED = Counter(
+    "integration_rejected_total",
+    "Requests failed fast, by reason (circuit_open, bulkhead_full)",
+    ["integration", "reason"],
+)
+RETRIES = Counter(
+    "integration_retries_total", "Idempotent requests retried after a failure", ["integration"]
+)
+
+
+class CircuitState(IntEnum):
+    CLOSED = 0
+    HALF_OPEN = 1
+    OPEN = 2
+
+
+class IntegrationUnavailable(httpx.TransportError):
+    """Failed fast, without calling the integration: its circuit is open or its bulkhead is full."""
+
+
+def _is_failure(response: httpx.Response) -> bool:
+    return response.status_code >= 500
+
+
+def _retryable(error: BaseException) -> bool:
+    return isinstance(error, httpx.TransportError) and not isinstance(error, IntegrationUnavailable)
+
+
+class Integration:
+    def __init__(
+        self, name: str, max_concurrent: int, failure_threshold: int, reset_timeout: float
+    ):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CircuitState.CLOSED
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        CIRCUIT_STATE.labels(name).set(self.state)
+
+    def _set_state(self, state: CircuitState):
+        if state is not self.state:
+            self.state = state
+            CIRCUIT_STATE.labels(self.name).set(state)
+            CIRCUIT_TRANSITIONS.labels(self.name, state.name.lower()).inc()
+
+    def _admit(self) -> bool:
+        """Let a request through the breaker, or raise IntegrationUnavailable.
+
+        Returns True if it is the half-open probe.
+        """
+        if self.state is CircuitState.OPEN:
+            wait = self._opened_at + self.reset_timeout - time.monotonic()
+            if wait > 0:
+                REJECTED.labels(self.name, "circuit_open").inc()
+                raise IntegrationUnavailable(
+                    f"{self.name} is unavailable (circuit open, retrying in {wait:.0f}s)"
+                )
+            self._set_state(CircuitState.HALF_OPEN)
+        if self.state is CircuitState.HALF_OPEN:
+            if self._probing:
+                REJECTED.labels(self.name, "circuit_open").inc()
+                raise IntegrationUnavailable(
+                    f"{self.name} is unavailable (circuit half-open, probe in flight)"
+                )
+            self._probing = True
+            return True
+        return False
+
+    def _record(self, ok: bool):
+        if ok:
+            self._failures = 0
+            self._set_state(CircuitState.CLOSED)
+            return
+        self._failures += 1
+        if self.state is CircuitState.HALF_OPEN or self._failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+            self._set_state(CircuitState.OPEN)
+
+    async def send(self, send: Callable[[], Awaitable[httpx.Response]]) -> httpx.Response:
+        """Make one request through the breaker and the bulkhead."""
+        wait = timeout(settings.http_timeout)
+        probe = self._admit()
+        try:
+            try:
+                await asyncio.wait_for(self._slots.acquire(), wait)
+            except TimeoutError:
+                REJECTED.labels(self.name, "bulkhead_full").inc()
+                raise IntegrationUnavailable(
+                    f"{self.name} is overloaded ({self.max_concurrent} requests already in flight)"
+                ) from None
+            try:
+                response = await send()
+            except httpx.TransportError:
+                self._record(False)
+                raise
+            finally:
+                self._slots.release()
+            self._record(not _is_failure(response))
+            return response
+        finally:
+            if probe:
+                self._probing = False
+
+    async def request(
+        self, send: Callable[[], Awaitable[httpx.Response]], idempotent: bool
+    ) -> httpx.Response:
+        """send(), retried with backoff on connection errors and 502/503/504 if idempotent."""
+        if not idempotent or settings.integration_retry_attempts <= 1:
+            return await self.send(send)
+        retrying = AsyncRetrying(
+            stop=stop_after_attempt(settings.integration_retry_attempts),
+            wait=wait_random_exponential(multiplier=RETRY_BACKOFF, max=RETRY_BACKOFF_MAX),
+            retry=(
+                retry_if_exception(_retryable)
+                | retry_if_result(lambda r: r.status_code in RETRY_STATUSES)
+            ),
+            before_sleep=self._before_retry,
+            # The last response, or its error.
+            retry_error_callback=lambda state: state.outcome.result(),
+        )
+        return await retrying(self.send, send)
+
+    async def _before_retry(self, state: RetryCallState):
+        RETRIES.labels(self.name).inc()
+        if not state.outcome.failed:
+            await state.outcome.result().aclose()  # hand the failed response's connection back
+
+
+_integrations: dict[str, Integration] = {}
+
+
+def integration(name: str) -> Integration:
+    if name not in _integrations:
+        _integrations[name] = Integration(
+            name,
+            max_concurrent=settings.integration_max_concurrent,
+            failure_threshold=settings.integration_failure_threshold,
+            reset_timeout=settings.integration_reset_timeout,
+        )
+    return _integrations[name]
+
+
+class ResilientTransport(httpx.AsyncBaseTransport):
+    def __init__(
+        self,
+        integration: Integration,
+        inner: httpx.AsyncBaseTransport,
+        idempotent: bool | None = None,
+    ):
+        self.integration = integration
+        self._inner = inner
+        self._idempotent = idempotent
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        idempotent = self._idempotent
+        if idempotent is None:
+            idempotent = request.method in IDEMPOTENT_METHODS
+        if request.method not in IDEMPOTENT_METHODS:
+            return await self.integration.request(
+                lambda: self._inner.handle_async_request(request), idempotent
+            )
+        # Reads can be shared between the items of a batch (a no-op outside batch_scope).
+        authorization = request.headers.get("authorization")
+        key = (self.integration.name, request.method, str(request.url), authorization)
+        status, headers, content = await shared(key, lambda: self._read(request, idempotent))
+        return httpx.Response(status, headers=headers, content=content, request=request)
+
+    async def _read(self, request: httpx.Request, idempotent: bool) -> tuple[int, list, bytes]:
+        response = await self.integration.request(
+            lambda: self._inner.handle_async_request(request), idempotent
+        )
+        try:
+            content = await response.aread()
+        finally:
+            await response.aclose()
+        # aread() decoded the body, so the headers describing the wire encoding no longer apply.
+        headers = [
+            (k, v) for k, v in response.headers.multi_items() if k.lower() not in _WIRE_HEADERS
+        ]
+        return response.status_code, headers, content
+
+    async def aclose(self):
+        await self._inner.aclose()
+
+
+def client(
+    name: str,
+    verify: bool = True,
+    idempotent: bool | None = None,
+    uds: str | None = None,
+    limits: httpx.Limits | None = None,
+    **kwargs,
+) -> httpx.AsyncClient:
+    """An httpx client for the named integration.
+
+    Requests are retried only for idempotent methods, unless idempotent=True marks
+    every request the client makes as safe to repeat (e.g. a validation POST).
+    uds connects over a Unix socket instead of TCP.
+    """
+    options = {"verify": verify, "uds": uds} | ({"limits": limits} if limits else {})
+    inner = httpx.AsyncHTTPTransport(**options)
+    transport = ResilientTransport(integration(name), inner, idempotent)
+    return httpx.AsyncClient(transport=transport, **kwargs)
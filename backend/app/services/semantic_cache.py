@@ -0,0 +1,273 @@
+"""Semantic cache of chat answers.
+
+Near-duplicate questions ("what's failing in prod?", "what is failing in
+production") would otherwise each repeat the whole supervisor and agent
+pipeline. The normalized question is embedded with ``embedding_model``. If an
+earlier answer's embedding is at least ``semantic_cache_threshold`` similar
+(cosine), in the same scope (agent set and chat model), that answer is
+returned.
+
+Each answer stays fresh as long as the data behind it: the shortest TTL among
+the agents that produced it. By default that is the agent's own cache or mirror
+interval (Backstage catalog, PagerDuty incidents), and ``semantic_cache_ttl``
+otherwise. ``semantic_cache_agent_ttls`` overrides it per agent, and a TTL of 0
+opts an agent out. A near match that has gone stale is re-validated: the
+question runs again and the fresh answer replaces it. Answers are only stored
+when every tool call was a read, and never when the run was partial or an agent
+it delegated to failed.
+
+Entries live in Postgres with pgvector (migration 0003) when the database is
+available, and in a bounded in-process store otherwise. The in-process store
+keeps unit-length vectors, so a lookup is one dot product per entry, computed
+in a worker thread. After a database error
+the in-process store stands in for ``PG_RETRY_AFTER`` seconds, so an unreachable
+database costs one failed query rather than one per chat. Expired rows are
+deleted at most every ``PRUNE_INTERVAL`` seconds, when an answer is stored.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import re
+import time
+from collections import deque
+from dataclasses import dataclass
+
+from prometheus_client import Counter
+from sqlalchemy import text
+
+from app.config import settings
+from app.services import database
+from app.services.deadline import timeout, within_deadline
+from app.services.llm import get_embeddings
+
+logger = logging.getLogger(__name__)
+
+LOOKUPS = Counter(
+    "semantic_cache_lookups_total",
+    "Semantic cache lookups by outcome (hit, stale, miss, error)",
+    ["outcome"],
+)
+STORES = Counter(
+    "semantic_cache_stores_total",
+    "Answers stored, or skipped and why (stored, opted_out, mutating, partial, failed)",
+    ["outcome"],
+)
+SAVED_TOKENS = Counter(
+    "semantic_cache_saved_tokens_total", "LLM tokens the cached answers originally cost"
+)
+
+READ_ONLY_TOOL_PREFIXES = (
+    "list_", "get_", "search_", "query_", "describe_", "traverse_", "inventory_", "validate_"
+)
+DEFAULT_OPT_OUT = {"vault": 0.0}  # answers may quote secret material
+MEMORY_ENTRIES = 1000
+PG_RETRY_AFTER = 30.0  # seconds
+PRUNE_INTERVAL = 300.0  # seconds
+
+_PUNCTUATION = re.compile(r"[^\w\s-]")
+
+
+def normalize(question: str) -> str:
+    return " ".join(_PUNCTUATION.sub(" ", question.lower()).split())
+
+
+def agent_ttls() -> dict[str, float]:
+    ttls = {
+        "backstage": float(settings.backstage_sync_interval),
+        "pagerduty": float(settings.pagerduty_sync_interval),
+        **DEFAULT_OPT_OUT,
+    }
+    for entry in filter(None, (e.strip() for e in settings.semantic_cache_agent_ttls.split(","))):
+        name, _, ttl = entry.partition("=")
+        ttls[name.strip()] = float(ttl)
+    return ttls
+
+
+def answer_ttl(agent_outputs: dict) -> tuple[float, str | None]:
+    """How long an answer built from these agent outputs stays fresh.
+
+    Also returns why the answer may not be cached at all, or None.
+    """
+    ttls = agent_ttls()
+    ttl = float(settings.semantic_cache_ttl)
+    for name, output in agent_outputs.items():
+        ttl = min(ttl, ttls.get(name, ttl))
+        tools = output.get("tools_used", [])
+        if any(not tool.startswith(READ_ONLY_TOOL_PREFIXES) for tool in tools):
+            return 0.0, "mutating"
+    return ttl, None if ttl > 0 else "opted_out"
+
+
+@dataclass
+class Entry:
+    scope: str
+    question: str
+    embedding: list[float]
+    answer: dict  # message, agent_outputs, tokens
+    expires_at: float  # unix time
+
+
+def _unit(vector: list[float]) -> list[float]:
+    norm = math.sqrt(math.sumprod(vector, vector))
+    return [x / norm for x in vector] if norm else vector
+
+
+def _most_similar(
+    candidates: list[tuple[Entry, list[float]]], unit: list[float]
+) -> tuple[Entry, float] | None:
+    # Cosine similarity of unit vectors is their dot product; sumprod computes it in C.
+    similarities = ((e, math.sumprod(v, unit)) for e, v in candidates)
+    return max(similarities, key=lambda c: c[1], default=None)
+
+
+class MemoryStore:
+    def __init__(self, max_entries: int = MEMORY_ENTRIES):
+        # (entry, its embedding scaled to unit length)
+        self._entries: deque[tuple[Entry, list[float]]] = deque(maxlen=max_entries)
+
+    async def nearest(self, scope: str, embedding: list[float]) -> tuple[Entry, float] | None:
+        candidates = [(e, v) for e, v in self._entries if e.scope == scope]
+        if not candidates:
+            return None
+        return await asyncio.to_thread(_most_similar, candidates, _unit(embedding))
+
+    async def put(self, entry: Entry):
+        key = (entry.scope, entry.question)
+        kept = ((e, v) for e, v in self._entries if (e.scope, e.question) != key)
+        self._entries = deque(kept, maxlen=self._entries.maxlen)
+        self._entries.append((entry, _unit(entry.embedding)))
+
+
+class PgVectorStore:
+    def __init__(self):
+        self._pruned_at = 0.0
+
+    async def nearest(self, scope: str, embedding: list[float]) -> tuple[Entry, float] | None:
+        async with database.async_session_factory() as session:
+            row = (await session.execute(text("""
+                SELECT question, answer, extract(epoch FROM expires_at) AS expires_at,
+                       1 - (embedding <=> CAST(:embedding AS vector)) AS similarity
+                FROM semantic_cache WHERE scope = :scope
+                ORDER BY embedding <=> CAST(:embedding AS vector) LIMIT 1
+            """), {"scope": scope, "embedding": str(embedding)})).first()
+            await session.commit()
+        if row is None:
+            return None
+        entry = Entry(scope, row.question, embedding, row.answer, float(row.expires_at))
+        return entry, float(row.similarity)
+
+    async def put(self, entry: Entry):
+        async with database.async_session_factory() as session:
+            await session.execute(text("""
+                INSERT INTO semantic_cache (scope, question, embedding, answer, expires_at)
+                VALUES (:scope, :question, CAST(:embedding AS vector), CAST(:answer AS JSONB),
+                        to_timestamp(:expires_at))
+                ON CONFLICT (scope, question) DO UPDATE
+                SET embedding = EXCLUDED.embedding, answer = EXCLUDED.answer,
+                    expires_at = EXCLUDED.expires_at
+            """), {
+                "scope": entry.scope,
+                "question": entry.question,
+                "embedding": str(entry.embedding),
+                "answer": json.dumps(entry.answer),
+                "expires_at": entry.expires_at,
+            })
+            if time.monotonic() - self._pruned_at >= PRUNE_INTERVAL:
+                self._pruned_at = time.monotonic()
+                await session.execute(text("DELETE FROM semantic_cache WHERE expires_at < now()"))
+            await session.commit()
+
+
+class SemanticCache:
+    def __init__(self):
+        self._embeddings = None
+        self._memory = MemoryStore()
+        self._pg = PgVectorStore()
+        self._pg_down_until = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return settings.semantic_cache_enabled and bool(settings.openai_api_key)
+
+    @property
+    def store(self) -> MemoryStore | PgVectorStore:
+        if database.is_db_available() and time.monotonic() >= self._pg_down_until:
+            return self._pg
+        return self._memory
+
+    async def _on_store(self, method: str, *args):
+        """Call the store's method, falling back to the in-process store if the database fails."""
+        store = self.store
+        try:
+            return await getattr(store, method)(*args)
+        except Exception as e:
+            if store is self._memory:
+                raise
+            logger.warning(
+                f"Semantic cache database unavailable, using the in-process store "
+                f"for {PG_RETRY_AFTER:.0f}s: {e}"
+            )
+            self._pg_down_until = time.monotonic() + PG_RETRY_AFTER
+            return await getattr(self._memory, method)(*args)
+
+    async def embed(self, question: str) -> list[float]:
+        if self._embeddings is None:
+            self._embeddings = get_embeddings(settings)
+        return await within_deadline(self._embeddings.aembed_query(normalize(question)))
+
+    async def lookup(self, scope: str, question: str) -> tuple[dict | None, list[float] | None]:
+        """(cached answer or None, the question's embedding for store()). Never raises."""
+        try:
+            timeout(settings.http_timeout)  # no budget left: skip the cache, don't fail the chat
+            embedding = await self.embed(question)
+            match = await self._on_store("nearest", scope, embedding)
+        except Exception as e:
+            logger.warning(f"Semantic cache lookup failed: {e}")
+            LOOKUPS.labels("error").inc()
+            return None, None
+        if match is None or match[1] < settings.semantic_cache_threshold:
+            LOOKUPS.labels("miss").inc()
+            return None, embedding
+        entry, similarity = match
+        if entry.expires_at <= time.time():
+            LOOKUPS.labels("stale").inc()  # run again; store() replaces it with the fresh answer
+            return None, embedding
+        LOOKUPS.labels("hit").inc()
+        SAVED_TOKENS.inc(entry.answer.get("tokens", 0))
+        logger.info(f"Semantic cache hit ({similarity:.3f}): {question!r} ~ {entry.question!r}")
+        return {**entry.answer, "similarity": similarity}, embedding
+
+    async def put(self, scope: str, question: str, embedding: list[float], result: dict):
+        if result.get("partial"):
+            STORES.labels("partial").inc()
+            return
+        if result.get("failed_agents"):
+            STORES.labels("failed").inc()  # the answer carries the error; the next ask may succeed
+            return
+        ttl, reason = answer_ttl(result.get("agent_outputs", {}))
+        if reason:
+            STORES.labels(reason).inc()
+            return
+        usage = result.get("usage", {})
+        answer = {
+            "message": result["messages"][-1].content if result.get("messages") else "",
+            "agent_outputs": {
+                name: {
+                    "content": str(output.get("content", "")),
+                    "tools_used": output.get("tools_used", []),
+                }
+                for name, output in result.get("agent_outputs", {}).items()
+            },
+            "tokens": usage.get("input", 0) + usage.get("output", 0),
+        }
+        try:
+            entry = Entry(scope, normalize(question), embedding, answer, time.time() + ttl)
+            await self._on_store("put", entry)
+            STORES.labels("stored").inc()
+        except Exception as e:
+            logger.warning(f"Semantic cache store failed: {e}")
+
+
+semantic_cache = SemanticCache()
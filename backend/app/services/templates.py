@@ -0,0 +1,255 @@
+"""Self-service template registry, loaded from ``templates/*/template.yaml``.
+
+Each Backstage scaffolder template is parsed once. Its parameter pages are merged
+into a single JSON schema, which is compiled into a list of plain checks per
+property, so validating a provision request does not need to re-read the schema.
+The API payloads and their ETags are built when a template is loaded. The
+directory is rescanned at most every ``RELOAD_CHECK_INTERVAL`` seconds, and only
+files whose mtime or size changed are parsed again. If an edited file fails to
+parse, the last good version of that template is kept.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import yaml
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+RELOAD_CHECK_INTERVAL = 2.0  # seconds between templates_dir mtime scans
+
+# Backstage spec.type -> portal category
+CATEGORIES = {
+    "service": "application",
+    "website": "application",
+    "library": "application",
+    "resource": "infrastructure",
+}
+
+_TYPES: dict[str, tuple[type, ...]] = {
+    "string": (str,),
+    "integer": (int,),
+    "number": (int, float),
+    "boolean": (bool,),
+    "array": (list,),
+    "object": (dict,),
+}
+
+
+class TemplateValidationError(ValueError):
+    def __init__(self, errors: list[str]):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+
+Check = Callable[[object], str | None]
+
+
+def _compile_property(name: str, prop: dict) -> list[Check]:
+    checks: list[Check] = []
+    expected = _TYPES.get(prop.get("type", ""))
+    if expected:
+        allow_bool = bool in expected
+        type_name = prop["type"]
+
+        def check_type(value, expected=expected, allow_bool=allow_bool, type_name=type_name):
+            # bool is a subclass of int, but true is not a valid integer parameter.
+            if not isinstance(value, expected) or (isinstance(value, bool) and not allow_bool):
+                return f"{name}: expected {type_name}"
+        checks.append(check_type)
+    if "enum" in prop:
+        allowed = frozenset(prop["enum"])
+        choices = sorted(map(str, allowed))
+        checks.append(lambda v: None if v in allowed else f"{name}: must be one of {choices}")
+    if "pattern" in prop:
+        pattern = re.compile(prop["pattern"])
+        checks.append(
+            lambda v: None if pattern.search(str(v)) else f"{name}: must match {pattern.pattern}"
+        )
+    if "minimum" in prop:
+        minimum = prop["minimum"]
+        checks.append(lambda v: None if v >= minimum else f"{name}: must be >= {minimum}")
+    if "maximum" in prop:
+        maximum = prop["maximum"]
+        checks.append(lambda v: None if v <= maximum else f"{name}: must be <= {maximum}")
+    if "minLength" in prop:
+        min_length = prop["minLength"]
+        too_short = f"{name}: must be at least {min_length} characters"
+        checks.append(lambda v: None if len(v) >= min_length else too_short)
+    if "maxLength" in prop:
+        max_length = prop["maxLength"]
+        too_long = f"{name}: must be at most {max_length} characters"
+        checks.append(lambda v: None if len(v) <= max_length else too_long)
+    return checks
+
+
+def compile_schema(schema: dict) -> Callable[[dict], dict]:
+    """Compile an object schema into a function that validates parameters and fills in defaults."""
+    required = tuple(schema.get("required", ()))
+    props = schema.get("properties", {})
+    properties = {name: _compile_property(name, prop) for name, prop in props.items()}
+    defaults = {name: prop["default"] for name, prop in props.items() if "default" in prop}
+
+    def validate(params: dict) -> dict:
+        values = {**defaults, **params}
+        errors = [f"{name}: required" for name in required if values.get(name) in (None, "")]
+        for name, value in params.items():
+            for check in properties.get(name, ()):
+                error = check(value)
+                if error:
+                    errors.append(error)
+                    break  # later checks assume the type check passed
+        if errors:
+            raise TemplateValidationError(errors)
+        return values
+
+    return validate
+
+
+@dataclass(frozen=True)
+class Template:
+    name: str
+    category: str
+    schema: dict
+    info: dict  # API representation
+    payload: bytes = field(repr=False)
+    etag: str
+    validate: Callable[[dict], dict] = field(repr=False)
+
+
+def etag_for(payload: bytes) -> str:
+    return f'"{hashlib.sha256(payload).hexdigest()[:32]}"'
+
+
+def _dumps(data) -> bytes:
+    return json.dumps(data, separators=(",", ":")).encode()
+
+
+def parse_template(document: dict) -> Template:
+    metadata, spec = document["metadata"], document.get("spec", {})
+    pages = spec.get("parameters", [])
+    if isinstance(pages, dict):
+        pages = [pages]
+    schema: dict = {"type": "object", "required": [], "properties": {}}
+    for page in pages:
+        schema["required"].extend(page.get("required", []))
+        schema["properties"].update(page.get("properties", {}))
+
+    required = set(schema["required"])
+    parameters = []
+    for name, prop in schema["properties"].items():
+        param = {"name": name, "type": prop.get("type", "string"), "required": name in required}
+        if "enum" in prop:
+            param["options"] = prop["enum"]
+        for key in ("title", "description", "default", "pattern", "minimum", "maximum"):
+            if key in prop:
+                param[key] = prop[key]
+        parameters.append(param)
+
+    info = {
+        "name": metadata["name"],
+        "title": metadata.get("title", metadata["name"]),
+        "description": metadata.get("description", ""),
+        "category": CATEGORIES.get(spec.get("type", ""), spec.get("type", "other")),
+        "tags": metadata.get("tags", []),
+        "owner": spec.get("owner", ""),
+        "parameters": parameters,
+    }
+    payload = _dumps(info)
+    return Template(
+        name=info["name"],
+        category=info["category"],
+        schema=schema,
+        info=info,
+        payload=payload,
+        etag=etag_for(payload),
+        validate=compile_schema(schema),
+    )
+
+
+class TemplateRegistry:
+    def __init__(self, root: str | None = None):
+        self._root = root
+        self._checked_at: float | None = None
+        self._files: dict[Path, tuple[tuple[int, int], Template]] = {}
+        self._by_name: dict[str, Template] = {}
+        self._by_category: dict[str, list[Template]] = {}
+        self._listings: dict[str | None, tuple[bytes, str]] = {}
+
+    @property
+    def root(self) -> Path:
+        return Path(self._root or settings.templates_dir)
+
+    def refresh(self, force: bool = False):
+        """Reparse template files whose mtime or size changed since the last scan."""
+        now = time.monotonic()
+        recent = self._checked_at is not None and now - self._checked_at < RELOAD_CHECK_INTERVAL
+        if not force and recent:
+            return
+        self._checked_at = now
+
+        seen, changed = set(), False
+        paths = sorted(self.root.glob("*/template.yaml")) if self.root.is_dir() else []
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            seen.add(path)
+            stamp = (st.st_mtime_ns, st.st_size)
+            if path in self._files and self._files[path][0] == stamp:
+                continue
+            try:
+                template = parse_template(yaml.safe_load(path.read_text()))
+            except Exception as e:
+                logger.warning(f"Ignoring invalid template {path}: {e}")
+                # Keep the last good version, but don't retry until it changes again.
+                if path in self._files:
+                    self._files[path] = (stamp, self._files[path][1])
+                continue
+            self._files[path] = (stamp, template)
+            changed = True
+        for path in set(self._files) - seen:
+            del self._files[path]
+            changed = True
+        if changed:
+            self._rebuild()
+
+    def _rebuild(self):
+        templates = sorted((t for _, t in self._files.values()), key=lambda t: t.name)
+        self._by_name = {t.name: t for t in templates}
+        self._by_category = {}
+        for t in templates:
+            self._by_category.setdefault(t.category, []).append(t)
+        self._listings = {}
+        logger.info(f"Loaded {len(templates)} self-service templates from {self.root}")
+
+    def get(self, name: str) -> Template | None:
+        self.refresh()
+        return self._by_name.get(name)
+
+    def templates(self, category: str | None = None) -> list[Template]:
+        self.refresh()
+        if category is None:
+            return list(self._by_name.values())
+        return list(self._by_category.get(category, []))
+
+    def listing(self, category: str | None = None) -> tuple[bytes, str]:
+        """The JSON list payload and its ETag, built once per category until templates change."""
+        self.refresh()
+        if category not in self._listings:
+            payload = _dumps({"templates": [t.info for t in self.templates(category)]})
+            self._listings[category] = (payload, etag_for(payload))
+        return self._listings[category]
+
+
+template_registry = TemplateRegistry()
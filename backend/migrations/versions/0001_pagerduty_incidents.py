@@ -0,0 +1,37 @@
+"""PagerDuty incident mirror
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "pagerduty_incidents",
+        sa.Column("id", sa.String(32), primary_key=True),
+        sa.Column("title", sa.String(1024), nullable=False),
+        sa.Column("status", sa.String(32), nullable=False),
+        sa.Column("urgency", sa.String(16), nullable=False),
+        sa.Column("service_id", sa.String(32), nullable=False),
+        sa.Column("service_name", sa.String(255), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("url", sa.String(1024), nullable=False),
+        sa.Column("raw", postgresql.JSONB(), nullable=False),
+    )
+    for column in ("status", "urgency", "service_id", "created_at"):
+        op.create_index(f"ix_pagerduty_incidents_{column}", "pagerduty_incidents", [column])
+
+
+def downgrade():
+    op.drop_table("pagerduty_incidents")
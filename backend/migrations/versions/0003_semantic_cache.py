@@ -0,0 +1,43 @@
+"""Semantic cache
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+
+Needs the pgvector extension. CREATE EXTENSION requires a privileged role; where
+the migration role lacks it, have a DBA create the extension first.
+"""
+
+from alembic import op
+
+from app.config import settings
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS vector")
+    # The column is sized for EMBEDDING_DIMENSIONS at migration time; changing the model needs a
+    # new migration.
+    op.execute(f"""
+        CREATE TABLE semantic_cache (
+            scope TEXT NOT NULL,
+            question TEXT NOT NULL,
+            embedding vector({int(settings.embedding_dimensions)}) NOT NULL,
+            answer JSONB NOT NULL,
+            expires_at TIMESTAMPTZ NOT NULL,
+            PRIMARY KEY (scope, question)
+        )
+    """)
+    op.execute(
+        "CREATE INDEX semantic_cache_embedding_idx ON semantic_cache "
+        "USING hnsw (embedding vector_cosine_ops)"
+    )
+    op.execute("CREATE INDEX semantic_cache_expires_at_idx ON semantic_cache (expires_at)")
+
+
+def downgrade():
+    op.drop_table("semantic_cache")
@@ -0,0 +1,26 @@
+"""Provisioning job leases
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("provisioning_jobs", sa.Column("claimed_by", sa.String(36), nullable=True))
+    op.add_column(
+        "provisioning_jobs", sa.Column("lease_until", sa.DateTime(timezone=True), nullable=True)
+    )
+
+
+def downgrade():
+    op.drop_column("provisioning_jobs", "lease_until")
+    op.drop_column("provisioning_jobs", "claimed_by")
@@ -0,0 +1,94 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.agents.backstage import catalog
+from app.agents.backstage.catalog import CatalogMirror, normalize_ref
+
+
+def _entity(
+    name: str, owner: str, etag: str = "1", depends_on: list[str] = (), tags: list[str] = ()
+) -> dict:
+    relations = [{"type": "ownedBy", "targetRef": f"group:default/{owner}"}]
+    relations += [{"type": "dependsOn", "targetRef": f"component:default/{d}"} for d in depends_on]
+    return {
+        "kind": "Component",
+        "metadata": {"name": name, "namespace": "default", "etag": etag, "tags": list(tags)},
+        "spec": {"owner": owner, "type": "service"},
+        "relations": relations,
+    }
+
+
+def _with_reverse_relations(entities: list[dict]) -> list[dict]:
+    """Backstage stores both directions of a relation; mimic that for dependsOn."""
+    by_ref = {f"component:default/{e['metadata']['name']}": e for e in entities}
+    for ref, e in by_ref.items():
+        for rel in list(e["relations"]):
+            if rel["type"] == "dependsOn":
+                reverse = {"type": "dependencyOf", "targetRef": ref}
+                by_ref[rel["targetRef"]]["relations"].append(reverse)
+    return entities
+
+
+def test_normalize_ref_defaults():
+    assert normalize_ref("payments") == "component:default/payments"
+    assert normalize_ref("team-a", default_kind="group") == "group:default/team-a"
+    assert normalize_ref("API:Billing/Invoices") == "api:billing/invoices"
+
+
+def test_traverse_finds_transitive_dependents_and_owners():
+    mirror = CatalogMirror()
+    for e in _with_reverse_relations([
+        _entity("db-proxy", "platform"),
+        _entity("payments", "team-pay", depends_on=["db-proxy"]),
+        _entity("checkout", "team-shop", depends_on=["payments"]),
+    ]):
+        mirror.upsert(e)
+
+    related = mirror.traverse("component:default/db-proxy", "dependencyOf")
+    assert related == [(1, "component:default/payments"), (2, "component:default/checkout")]
+    assert mirror.owners_of("checkout") == ["group:default/team-shop"]
+    assert [e["metadata"]["name"] for e in mirror.find(owner="team-pay")] == ["payments"]
+
+
+async def test_sync_applies_changes_and_removals():
+    pages = {
+        "first": {"items": [_entity("a", "x", tags=["python"]), _entity("b", "x")], "pageInfo": {}},
+        "second": {"items": [_entity("a", "y", etag="2")], "pageInfo": {}},
+    }
+    current = iter(["first", "second"])
+
+    mirror = CatalogMirror()
+    transport = httpx.MockTransport(lambda _: httpx.Response(200, json=pages[next(current)]))
+    client = httpx.AsyncClient(transport=transport)
+    await mirror.sync(client)
+    assert len(mirror.find(tag="python")) == 1
+    assert len(mirror.find(owner="x")) == 2
+
+    await mirror.sync(client)
+    assert mirror.get("b") is None
+    assert mirror.find(owner="x") == []
+    assert [e["metadata"]["name"] for e in mirror.find(owner="y")] == ["a"]
+
+
+async def test_unexpected_sync_error_keeps_the_loop_running_and_marks_stale(monkeypatch):
+    mirror = CatalogMirror()
+    mirror.ready = True
+    calls = []
+
+    async def broken_sync(client):
+        calls.append(1)
+        if len(calls) == 3:
+            raise asyncio.CancelledError
+        raise KeyError("metadata")
+
+    monkeypatch.setattr(mirror, "sync", broken_sync)
+    monkeypatch.setattr(catalog.settings, "backstage_sync_interval", 0)
+    monkeypatch.setattr(catalog, "STALE_AFTER_SYNCS", 0)
+
+    with pytest.raises(asyncio.CancelledError):
+        await mirror._run()
+
+    assert len(calls) == 3
+    assert not mirror.ready
@@ -0,0 +1,167 @@
+import json
+import time
+
+import httpx
+import pytest
+
+from app.agents.jira import tools
+
+# issue key -> (issue type id, status id); PLAT-1, 2 and 4 share a workflow state, PLAT-3 is an Epic
+ISSUES = {
+    "PLAT-1": ("10001", "1"),
+    "PLAT-2": ("10001", "1"),
+    "PLAT-3": ("10000", "1"),
+    "PLAT-4": ("10001", "1"),
+}
+TRANSITIONS = {
+    "10001": [{"id": "31", "name": "Done", "to": {"id": "3"}}],
+    "10000": [{"id": "41", "name": "Done", "to": {"id": "3"}}],
+}
+
+
+def _issue(key: str) -> dict:
+    issue_type, status = ISSUES[key]
+    return {"key": key, "fields": {"issuetype": {"id": issue_type}, "status": {"id": status}}}
+
+
+@pytest.fixture
+def jira(monkeypatch):
+    requests, rejected_ids = [], set()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        path = request.url.path.removeprefix("/rest/api/3")
+        body = json.loads(request.content) if request.content else {}
+        requests.append((request.method, path, body))
+        if path == "/search":
+            keys = body["jql"].removeprefix("key in (").removesuffix(")").split(", ")
+            return httpx.Response(200, json={"issues": [_issue(k) for k in keys if k in ISSUES]})
+        if request.method == "GET" and path.startswith("/issue/"):
+            key = path.removeprefix("/issue/")
+            if key == "PLAT-404":
+                return httpx.Response(200, json={"errorMessages": ["gone"]})  # no fields at all
+            transitions = TRANSITIONS[ISSUES[key][0]]
+            return httpx.Response(200, json={**_issue(key), "transitions": transitions})
+        if path.endswith("/transitions"):
+            return httpx.Response(400 if body["transition"]["id"] in rejected_ids else 204)
+        if path == "/issue/bulk":
+            updates = body["issueUpdates"]
+            if any(u["fields"]["summary"] == "explode" for u in updates):
+                return httpx.Response(503)
+            errors = [
+                {"failedElementNumber": n, "elementErrors": {"errors": {"summary": "too long"}}}
+                for n, u in enumerate(updates) if len(u["fields"]["summary"]) > 20
+            ]
+            issues = [
+                {"key": f"PLAT-{100 + n}"}
+                for n, u in enumerate(updates) if len(u["fields"]["summary"]) <= 20
+            ]
+            return httpx.Response(400 if errors else 201, json={"issues": issues, "errors": errors})
+        return httpx.Response(404)
+
+    transport = httpx.MockTransport(handler)
+    monkeypatch.setattr(
+        tools.resilience, "client", lambda name, **kw: httpx.AsyncClient(transport=transport)
+    )
+    monkeypatch.setattr(tools.settings, "jira_base_url", "http://jira.test")
+    monkeypatch.setattr(tools, "_transition_cache", {})
+    monkeypatch.setattr(tools, "_issue_state_cache", {})
+    return requests, rejected_ids
+
+
+def _transition_posts(requests) -> list[tuple[str, str]]:
+    return [
+        (path.split("/")[2], body["transition"]["id"])
+        for method, path, body in requests if path.endswith("/transitions")
+    ]
+
+
+async def _bulk_transition(issue_keys: list[str], transition_name: str) -> dict:
+    return await tools.bulk_transition_issues.ainvoke(
+        {"issue_keys": issue_keys, "transition_name": transition_name}
+    )
+
+
+async def test_cached_transition_ids_are_scoped_to_the_workflow_state(jira):
+    requests, _ = jira
+    await tools.update_issue_status.ainvoke({"issue_key": "PLAT-4", "transition_name": "Done"})
+    assert ("PLAT-4", "31") in _transition_posts(requests)
+
+    requests.clear()
+    result = await _bulk_transition(["PLAT-1", "PLAT-2", "PLAT-3"], "done")
+
+    assert result["transitioned"] == 3
+    # The Epic's workflow reuses neither the Task's cached ID nor its lookup.
+    expected = [("PLAT-1", "31"), ("PLAT-2", "31"), ("PLAT-3", "41")]
+    assert sorted(_transition_posts(requests)) == expected
+    assert [path for method, path, _ in requests if method == "GET"] == ["/issue/PLAT-3"]
+
+
+async def test_rejected_cached_id_is_invalidated_and_looked_up_again(jira):
+    requests, rejected_ids = jira
+    await tools.update_issue_status.ainvoke({"issue_key": "PLAT-1", "transition_name": "Done"})
+    rejected_ids.add("31")
+    TRANSITIONS["10001"] = [{"id": "32", "name": "Done", "to": {"id": "3"}}]
+    try:
+        requests.clear()
+        result = await _bulk_transition(["PLAT-2"], "Done")
+    finally:
+        TRANSITIONS["10001"] = [{"id": "31", "name": "Done", "to": {"id": "3"}}]
+
+    assert result["transitioned"] == 1
+    assert _transition_posts(requests) == [("PLAT-2", "31"), ("PLAT-2", "32")]
+    assert tools._transition_cache[("PLAT", "10001", "1")][1] == {"done": ("32", "3")}
+
+
+async def test_bulk_transition_reports_unknown_transitions_per_issue(jira):
+    result = await _bulk_transition(["PLAT-1", "PLAT-3"], "Reopen")
+
+    assert result["transitioned"] == 0
+    assert all("not found" in r["error"] and r["available"] == ["done"] for r in result["results"])
+
+
+async def test_bulk_create_reports_malformed_rejected_and_failed_chunks_per_item(jira, monkeypatch):
+    monkeypatch.setattr(tools, "BULK_CREATE_CHUNK", 2)
+    issues = [
+        {"summary": "first"},
+        {"description": "no summary"},
+        {"summary": "a summary that is far too long"},
+        {"summary": "explode"},
+        {"summary": "same chunk"},
+        {"summary": "last"},
+    ]
+
+    result = await tools.bulk_create_issues.ainvoke({"project_key": "PLAT", "issues": issues})
+
+    assert (result["created"], result["failed"]) == (2, 4)
+    first, malformed, rejected, exploded, same_chunk, last = result["results"]
+    assert first["key"] == "PLAT-100"
+    assert malformed["error"] == "Each issue needs a 'summary'"
+    assert rejected["error"] == {"errors": {"summary": "too long"}}
+    assert "503" in exploded["error"] and "503" in same_chunk["error"]
+    assert last["key"] == "PLAT-100"
+
+
+async def test_single_issue_transition_reuses_the_known_state(jira):
+    requests, _ = jira
+    await _bulk_transition(["PLAT-1", "PLAT-2"], "Done")
+    ISSUES["PLAT-1"] = ("10001", "3")  # Jira moved it; the transition's target told us so
+    tools._transition_cache[("PLAT", "10001", "3")] = (time.monotonic(), {"reopen": ("51", "1")})
+    try:
+        requests.clear()
+        result = await tools.update_issue_status.ainvoke(
+            {"issue_key": "PLAT-1", "transition_name": "Reopen"}
+        )
+    finally:
+        ISSUES["PLAT-1"] = ("10001", "1")
+
+    assert result == {"key": "PLAT-1", "new_status": "Reopen"}
+    assert [(method, path) for method, path, _ in requests] == [
+        ("POST", "/issue/PLAT-1/transitions")
+    ]
+
+
+async def test_bulk_transition_reports_unexpected_payloads_per_issue(jira):
+    result = await _bulk_transition(["PLAT-1", "PLAT-404"], "Done")
+
+    assert result["transitioned"] == 1
+    assert result["results"][1] == {"key": "PLAT-404", "error": "'fields'"}
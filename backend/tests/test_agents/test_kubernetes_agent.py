@@ -0,0 +1,41 @@
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.tools import tool
+
+from app.agents.kubernetes import KubernetesAgent
+from app.agents.kubernetes import agent as agent_module
+
+
+@tool
+async def list_pods(namespace: str) -> list[str]:
+    """List pods."""
+    return [f"{namespace}/api-0"]
+
+
+async def test_one_tool_call_message_answers_every_tool_call(monkeypatch):
+    calls = AIMessage(content="", tool_calls=[
+        {"name": "list_pods", "args": {"namespace": "prod"}, "id": "1"},
+        {"name": "list_pods", "args": {"namespace": "staging"}, "id": "2"},
+        {"name": "delete_cluster", "args": {}, "id": "3"},
+    ])
+    seen = []
+
+    class Synthesis:
+        def bind_tools(self, tools):
+            return self
+
+        async def ainvoke(self, messages):
+            seen.extend(messages)
+            return AIMessage(content="2 pods")
+
+    async def select_tools(settings, agent, tools, messages):
+        return calls
+
+    monkeypatch.setattr(agent_module, "select_tools", select_tools)
+    monkeypatch.setattr(agent_module, "get_llm", lambda *args, **kw: Synthesis())
+    monkeypatch.setattr(KubernetesAgent, "get_tools", lambda self: [list_pods])
+
+    result = await KubernetesAgent().invoke("list pods", {})
+
+    assert result == {"content": "2 pods", "tools_used": ["list_pods", "list_pods"]}
+    assert [type(m) for m in seen[2:]] == [AIMessage, ToolMessage, ToolMessage, ToolMessage]
+    assert [m.tool_call_id for m in seen if isinstance(m, ToolMessage)] == ["1", "2", "3"]
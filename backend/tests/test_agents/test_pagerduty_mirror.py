@@ -0,0 +1,105 @@
+import asyncio
+from datetime import UTC, datetime
+
+import httpx
+import pytest
+
+from app.agents.pagerduty import mirror as mirror_module
+from app.agents.pagerduty import tools
+from app.agents.pagerduty.mirror import IncidentMirror, summarize
+
+
+def _raw(incident_id: str, service: str, urgency: str, status: str, created_at: str) -> dict:
+    return {
+        "id": incident_id,
+        "title": f"{service} is down",
+        "status": status,
+        "urgency": urgency,
+        "service": {"id": f"P{service.upper()}", "summary": service},
+        "created_at": created_at,
+        "html_url": f"https://example.pagerduty.com/incidents/{incident_id}",
+    }
+
+
+def test_query_intersects_indexes_and_time_window():
+    mirror = IncidentMirror()
+    mirror.upsert(summarize(_raw("A", "payments", "high", "triggered", "2026-10-12T08:00:00Z")))
+    mirror.upsert(summarize(_raw("B", "payments", "low", "triggered", "2026-10-14T08:00:00Z")))
+    mirror.upsert(summarize(_raw("C", "payments", "high", "resolved", "2026-10-16T08:00:00Z")))
+    mirror.upsert(summarize(_raw("D", "checkout", "high", "triggered", "2026-10-17T08:00:00Z")))
+
+    since = datetime(2026, 10, 13, tzinfo=UTC)
+    results = mirror.query(urgency="high", service="Payments", since=since)
+    assert [i["id"] for i in results] == ["C"]
+
+    results = mirror.query(statuses=["triggered"], urgency="high")
+    assert [i["id"] for i in results] == ["D", "A"]
+
+
+def test_upsert_reindexes_changed_incident():
+    mirror = IncidentMirror()
+    mirror.upsert(summarize(_raw("A", "payments", "high", "triggered", "2026-10-12T08:00:00Z")))
+    resolved = _raw("A", "payments", "high", "resolved", "2026-10-12T08:00:00Z")
+    resolved["last_status_change_at"] = "2026-10-12T09:00:00Z"
+    mirror.upsert(summarize(resolved))
+
+    assert mirror.query(statuses=["triggered"]) == []
+    assert [i["id"] for i in mirror.query(statuses=["resolved"])] == ["A"]
+    assert len(mirror.query()) == 1
+
+
+def test_evict_drops_incidents_outside_the_window():
+    mirror = IncidentMirror()
+    mirror.upsert(summarize(_raw("A", "payments", "high", "triggered", "2026-09-01T08:00:00Z")))
+    mirror.upsert(summarize(_raw("B", "payments", "high", "triggered", "2026-10-14T08:00:00Z")))
+
+    assert mirror.evict(datetime(2026, 10, 1, tzinfo=UTC)) == 1
+
+    assert [i["id"] for i in mirror.query(service="payments", urgency="high")] == ["B"]
+    assert "A" not in mirror._incidents
+
+
+async def test_unexpected_sync_error_keeps_the_loop_running_and_marks_stale(monkeypatch):
+    mirror = IncidentMirror()
+    mirror.ready, mirror._cursor = True, datetime.now(UTC)
+    calls = []
+
+    async def broken_sync(client):
+        calls.append(1)
+        if len(calls) == 3:
+            raise asyncio.CancelledError
+        raise KeyError("incident")
+
+    monkeypatch.setattr(mirror, "_sync_changes", broken_sync)
+    monkeypatch.setattr(mirror_module.settings, "pagerduty_sync_interval", 0)
+    monkeypatch.setattr(mirror_module, "STALE_AFTER_SYNCS", 0)
+
+    with pytest.raises(asyncio.CancelledError):
+        await mirror._run()
+
+    assert len(calls) == 3
+    assert not mirror.ready
+
+
+async def test_list_incidents_has_one_shape_with_and_without_the_mirror(monkeypatch):
+    raw = {
+        **_raw("A", "payments", "high", "triggered", "2026-10-12T08:00:00Z"),
+        "last_status_change_at": None,
+    }
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, json={"incidents": [raw]}))
+    monkeypatch.setattr(
+        tools.resilience, "client", lambda name, **kw: httpx.AsyncClient(transport=transport)
+    )
+    mirror = IncidentMirror()
+    monkeypatch.setattr(tools, "incident_mirror", mirror)
+
+    live = await tools.list_incidents.ainvoke({})
+    mirror.upsert(summarize(raw))
+    mirror.ready = True
+    mirrored = await tools.list_incidents.ainvoke({})
+
+    assert live == mirrored
+    assert set(live[0]) == {
+        "id", "title", "status", "urgency", "service_id", "service", "created_at", "updated_at",
+        "url",
+    }
@@ -0,0 +1,84 @@
+import json
+
+import httpx
+import pytest
+
+from app.agents.policy import cache, tools
+
+
+@pytest.fixture
+def bundle(tmp_path, monkeypatch):
+    (tmp_path / "kafka").mkdir()
+    (tmp_path / "kafka" / "topic.rego").write_text("package kafka.topic\n")
+    monkeypatch.setattr(cache.settings, "policies_dir", str(tmp_path))
+    monkeypatch.setattr(cache, "BUNDLE_CHECK_INTERVAL", 0)
+    monkeypatch.setattr(cache, "_bundle", {"checked_at": 0.0, "stamp": None, "version": None})
+    monkeypatch.setattr(cache, "_results", cache.OrderedDict())
+    return tmp_path
+
+
+def test_cache_key_ignores_formatting_but_tracks_bundle(bundle):
+    a = cache.cache_key("kafka", "spec:\n  partitions: 6\n  replicas: 3\n")
+    b = cache.cache_key("kafka", "# comment\nspec: {replicas: 3, partitions: 6}\n")
+    assert a == b
+    assert cache.cache_key("kubernetes", "spec: {replicas: 3, partitions: 6}") != a
+
+    (bundle / "kafka" / "topic.rego").write_text("package kafka.topic\n\ndeny[msg] { false }\n")
+    assert cache.cache_key("kafka", "spec: {replicas: 3, partitions: 6}") != a
+
+
+async def test_validate_many_batches_and_dedupes_misses(bundle, monkeypatch):
+    batches = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        items = json.loads(request.content)["items"]
+        batches.append(items)
+        results = [{"valid": True, "violations": []} for _ in items]
+        return httpx.Response(200, json={"results": results})
+
+    real_client = httpx.AsyncClient
+    transport = httpx.MockTransport(handler)
+    monkeypatch.setattr(
+        httpx, "AsyncClient", lambda **kw: real_client(**{**kw, "transport": transport})
+    )
+    monkeypatch.setattr(tools.settings, "policy_agent_url", "http://policy-agent.test")
+
+    items = [
+        {"domain": "kafka", "config": "a: 1"},
+        {"domain": "kafka", "config": "a:  1\n"},
+        {"domain": "kubernetes", "config": "kind: Deployment"},
+    ]
+    results = await tools.validate_many(items)
+    assert len(batches) == 1 and len(batches[0]) == 2
+    assert all(r["valid"] for r in results)
+
+    results = await tools.validate_many(items)
+    assert len(batches) == 1
+    assert all(r["cached"] for r in results)
+
+
+async def test_short_batch_response_reports_the_unanswered_configs(bundle, monkeypatch):
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={"results": [{"valid": True, "violations": []}]})
+
+    real_client = httpx.AsyncClient
+    transport = httpx.MockTransport(handler)
+    monkeypatch.setattr(
+        httpx, "AsyncClient", lambda **kw: real_client(**{**kw, "transport": transport})
+    )
+    monkeypatch.setattr(tools.settings, "policy_agent_url", "http://policy-agent.test")
+
+    result = await tools.validate_configs.ainvoke({"items": [
+        {"domain": "kafka", "config": "a: 1"},
+        {"domain": "kubernetes", "config": "kind: Deployment"},
+    ]})
+
+    assert not result["all_valid"]
+    assert result["results"][0]["valid"]
+    assert result["results"][1] == {
+        "valid": False,
+        "error": "The policy agent returned 1 results for 2 configs",
+        "domain": "kubernetes",
+    }
+    retried = await tools.validate_many([{"domain": "kubernetes", "config": "kind: Deployment"}])
+    assert retried[0].get("cached") is None
@@ -0,0 +1,68 @@
+import asyncio
+import time
+
+import httpx
+
+from app.agents.rancher import tools
+from app.agents.rancher.tools import _cluster_health_score
+
+READY = {"type": "Ready", "status": "True"}
+NOT_READY = {"type": "Ready", "status": "False"}
+
+
+def test_healthy_cluster_scores_zero():
+    status = {"state": "active", "conditions": [{"type": "Ready", "status": "True"}]}
+    assert _cluster_health_score(status, [{"type": "Normal"}]) == 0
+
+
+def test_unhealthy_clusters_rank_above_warnings():
+    degraded = {"state": "active", "conditions": [{"type": "Ready", "status": "False"}]}
+    noisy = {"state": "active", "conditions": []}
+    down = {"state": "unavailable", "conditions": []}
+    warnings = [{"type": "Warning"}] * 3
+
+    assert _cluster_health_score(down, []) > _cluster_health_score(degraded, [])
+    assert _cluster_health_score(degraded, []) > _cluster_health_score(noisy, warnings)
+    assert _cluster_health_score(noisy, warnings) == 3
+
+
+async def test_fleet_health_ranks_clusters_and_reports_slow_and_failing_ones(monkeypatch):
+    clusters = [
+        {"id": "c-ok", "name": "ok", "state": "active", "conditions": [READY]},
+        {"id": "c-degraded", "name": "degraded", "state": "active", "conditions": [NOT_READY]},
+        {"id": "c-slow", "name": "slow", "state": "active"},
+        {"id": "c-broken", "name": "broken", "state": "active"},
+    ]
+    by_id = {c["id"]: c for c in clusters}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        parts = request.url.path.removeprefix("/v3/clusters").strip("/").split("/")
+        if parts == [""]:
+            return httpx.Response(200, json={"data": clusters})
+        cluster_id = parts[0]
+        if cluster_id == "c-slow":
+            await asyncio.sleep(5)
+        if cluster_id == "c-broken":
+            return httpx.Response(500, json={"message": "boom"})
+        if parts[1:] == ["events"]:
+            events = [{"eventType": "Warning"}] if cluster_id == "c-degraded" else []
+            return httpx.Response(200, json={"data": events})
+        return httpx.Response(200, json=by_id[cluster_id])
+
+    transport = httpx.MockTransport(handler)
+    monkeypatch.setattr(tools, "_client", lambda: httpx.AsyncClient(transport=transport))
+    monkeypatch.setattr(tools.settings, "rancher_server_url", "http://rancher.test")
+    monkeypatch.setattr(tools.settings, "rancher_cluster_timeout", 0.1)
+
+    started = time.monotonic()
+    result = await tools.get_fleet_health.ainvoke({})
+
+    assert time.monotonic() - started < 2  # the slow cluster did not hold up the fleet
+    assert result["total_clusters"] == 4 and result["queried"] == 2
+    assert [c["id"] for c in result["clusters"]] == ["c-degraded", "c-ok"]
+    failed = {f["id"]: f["error"] for f in result["failed"]}
+    assert failed["c-slow"] == "timed out"
+    assert "500" in failed["c-broken"]
+
+    unhealthy = await tools.get_fleet_health.ainvoke({"unhealthy_only": True})
+    assert [c["id"] for c in unhealthy["clusters"]] == ["c-degraded"]
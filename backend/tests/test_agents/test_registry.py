@@ -0,0 +1,82 @@
+import asyncio
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from app.agents import registry as registry_module
+from app.agents.manifest import MANIFEST, AgentSpec, build_manifest, render
+from app.agents.registry import AgentRegistry
+
+BACKEND = Path(__file__).parents[2]
+
+STARTUP_BENCHMARK = """
+import asyncio, json, sys, time
+started = time.perf_counter()
+from app.agents.registry import AgentRegistry
+registry = AgentRegistry()
+asyncio.run(registry.discover_and_register())
+registry.snapshot, registry.router
+lazy = time.perf_counter() - started
+imported = sorted(
+    m for m in sys.modules if m.startswith("app.agents.") and m.endswith((".agent", ".tools"))
+)
+started = time.perf_counter()
+for name in registry.list_agents():
+    registry.get_agent(name)
+print(json.dumps({"lazy": lazy, "eager": time.perf_counter() - started + lazy, "imported": imported,
+                  "failures": registry.failures}))
+"""
+
+
+def test_manifest_is_up_to_date():
+    assert MANIFEST.read_text() == render(build_manifest()), "run: python -m app.agents.manifest"
+
+
+def test_startup_benchmark_imports_no_agent_code():
+    # A fresh interpreter, as at pod start: nothing is imported yet.
+    out = subprocess.run(
+        [sys.executable, "-c", STARTUP_BENCHMARK],
+        cwd=BACKEND, capture_output=True, text=True, check=True,
+    )
+    report = json.loads(out.stdout.strip().splitlines()[-1])
+
+    assert report["imported"] == []
+    assert report["failures"] == {}
+    assert report["lazy"] < report["eager"]
+
+
+async def test_agents_load_on_first_use_and_failures_are_recorded():
+    registry = AgentRegistry()
+    await registry.discover_and_register()
+    spec = registry.specs["flux"]
+    registry._specs["broken"] = AgentSpec(
+        name="broken", module="app.agents.missing.agent", card=spec.card, tools=[]
+    )
+
+    assert "flux" not in registry._agents
+    assert (await registry.aget_agent("flux")).get_card().name == "flux"
+    assert registry.get_agent("broken") is None
+    assert "broken" in registry.failures
+
+    await registry.warm_up()
+    assert set(registry._agents) == set(registry.list_agents()) - {"broken"}
+
+
+async def test_first_use_from_async_code_imports_off_the_event_loop(monkeypatch):
+    registry = AgentRegistry()
+    await registry.discover_and_register()
+    threads = []
+    to_thread = asyncio.to_thread
+
+    async def record(fn, *args):
+        threads.append(args)
+        return await to_thread(fn, *args)
+
+    monkeypatch.setattr(registry_module.asyncio, "to_thread", record)
+    agent = await registry.aget_agent("kafka")
+
+    assert agent.get_card().name == "kafka"
+    assert threads == [(registry.specs["kafka"].module,)]
+    await registry.aget_agent("kafka")
+    assert len(threads) == 1  # loaded agents are served straight from the registry
@@ -0,0 +1,95 @@
+import asyncio
+import os
+import stat
+
+import httpx
+import pytest
+
+from app.agents.flux.agent import Agent as FluxAgent
+from app.agents.registry import AgentRegistry, parse_workers
+from app.agents.remote import A2AError, RemoteAgent
+from app.agents.worker import SOCKET_MODE, bind_unix_socket, create_app
+from app.config import settings
+from app.services.deadline import deadline_scope
+from app.services.llm import add_usage, llm_usage
+
+
+@pytest.fixture
+def flux_worker(monkeypatch):
+    seen = []
+
+    async def invoke(self, task: str, context: dict) -> dict:
+        seen.append(task)
+        if task == "explode":
+            raise RuntimeError("kubectl not found")
+        add_usage({"input": 7, "output": 3})
+        return {"content": f"reconciled: {task}", "tools_used": ["reconcile_kustomization"]}
+
+    monkeypatch.setattr(FluxAgent, "invoke", invoke)
+    monkeypatch.setattr(settings, "agent_worker_token", "s3cret")
+    return create_app("flux"), seen
+
+
+async def test_registry_dispatches_to_worker(flux_worker, monkeypatch):
+    worker, seen = flux_worker
+    monkeypatch.setattr(settings, "agent_workers", "flux=unix:/run/idp/flux.sock")
+    registry = AgentRegistry()
+    await registry.discover_and_register()
+
+    agent = registry.get_agent("flux")
+    assert isinstance(agent, RemoteAgent)
+    assert agent.endpoint == "unix:/run/idp/flux.sock"
+    agent._client = httpx.AsyncClient(transport=httpx.ASGITransport(app=worker), base_url="http://agent")
+    with llm_usage() as usage, deadline_scope(10):
+        results = await asyncio.gather(*(agent.invoke(f"platform-{i}", {}) for i in range(3)))
+    assert [r["content"] for r in results] == [f"reconciled: platform-{i}" for i in range(3)]
+    assert results[0]["tools_used"] == ["reconcile_kustomization"]
+    assert usage["input"] == 21 and usage["output"] == 9  # worker tokens count towards the chat
+    assert sorted(seen) == ["platform-0", "platform-1", "platform-2"]
+
+    with pytest.raises(A2AError, match="kubectl not found"):
+        await agent.invoke("explode", {})
+    await registry.close()
+
+
+async def test_worker_rejects_tasks_without_the_shared_secret(flux_worker):
+    worker, seen = flux_worker
+    task = {
+        "jsonrpc": "2.0",
+        "id": "1",
+        "method": "tasks/send",
+        "params": {"message": {"parts": [{"type": "text", "text": "hi"}]}},
+    }
+    transport = httpx.ASGITransport(app=worker)
+    async with httpx.AsyncClient(transport=transport, base_url="http://agent") as client:
+        for headers in ({}, {"Authorization": "Bearer wrong"}):
+            resp = await client.post("/", json=task, headers=headers)
+            assert resp.status_code == 401 and resp.json()["error"]["message"] == "Unauthorized"
+        assert (await client.get("/.well-known/agent.json")).status_code == 200
+    assert seen == []  # RemoteAgent presents the secret: test_registry_dispatches_to_worker
+
+
+def test_worker_refuses_to_start_without_a_shared_secret(monkeypatch):
+    monkeypatch.setattr(settings, "agent_worker_token", "")
+    with pytest.raises(RuntimeError, match="AGENT_WORKER_TOKEN"):
+        create_app("flux")
+
+
+def test_unix_socket_is_private_to_the_worker_user(tmp_path):
+    path = tmp_path / "flux.sock"
+    path.write_text("stale")
+    sock = bind_unix_socket(str(path))
+    try:
+        assert stat.S_ISSOCK(os.stat(path).st_mode)
+        assert stat.S_IMODE(os.stat(path).st_mode) == SOCKET_MODE
+    finally:
+        sock.close()
+
+
+def test_parse_workers():
+    assert parse_workers(" kubernetes=unix:/run/k.sock, argocd=http://argocd-agent:8100 ") == {
+        "kubernetes": "unix:/run/k.sock",
+        "argocd": "http://argocd-agent:8100",
+    }
+    with pytest.raises(ValueError):
+        parse_workers("kubernetes")
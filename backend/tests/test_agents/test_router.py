@@ -0,0 +1,19 @@
+from app.agents.registry import AgentRegistry
+from app.agents.router import IntentRouter, tokenize
+from app.agents.routing_eval import evaluate, load_cases
+
+
+def test_tokenize_splits_tool_names_and_stems():
+    tokens = tokenize("list_pods in the Payments namespace")
+    assert tokens == ["list", "pod", "payment", "namespace"]
+
+
+async def test_router_meets_offline_eval_bar():
+    registry = AgentRegistry()
+    await registry.discover_and_register()
+    report = evaluate(IntentRouter(registry.specs, threshold=0.25, margin=0.4), load_cases())
+
+    assert report["precision"] >= 0.9
+    assert report["coverage"] >= 0.75
+    assert report["false_routes"] <= 1
+    assert registry.router.route("Hello!") is None
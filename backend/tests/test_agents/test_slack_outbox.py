@@ -0,0 +1,47 @@
+import json
+
+import httpx
+
+from app.agents.slack.outbox import SlackOutbox
+
+
+async def test_incident_updates_are_coalesced_into_edits():
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append((request.url.path, json.loads(request.content)))
+        return httpx.Response(200, json={"ok": True, "channel": "C1", "ts": "1700000000.0001"})
+
+    outbox = SlackOutbox()
+    outbox._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    first = outbox.enqueue("C1", {"text": "investigating"}, coalesce_key="incident:db")
+    second = outbox.enqueue("C1", {"text": "identified"}, coalesce_key="incident:db")
+    assert second["message_id"] == first["message_id"]
+    await outbox._lanes["C1"].join()
+
+    outbox.enqueue("C1", {"text": "resolved"}, coalesce_key="incident:db")
+    await outbox._lanes["C1"].join()
+
+    assert [path for path, _ in calls] == ["/api/chat.postMessage", "/api/chat.update"]
+    assert calls[0][1]["text"] == "identified"
+    assert calls[1][1]["ts"] == "1700000000.0001"
+    assert outbox.status(first["message_id"])["status"] == "sent"
+    await outbox.drain()
+
+
+async def test_retry_after_is_honoured():
+    responses = iter([
+        httpx.Response(429, headers={"Retry-After": "0"}),
+        httpx.Response(200, json={"ok": True, "ts": "1"}),
+    ])
+    outbox = SlackOutbox()
+    outbox._client = httpx.AsyncClient(transport=httpx.MockTransport(lambda _: next(responses)))
+
+    queued = outbox.enqueue("C2", {"text": "hello"})
+    await outbox._lanes["C2"].join()
+
+    status = outbox.status(queued["message_id"])
+    assert status["status"] == "sent"
+    assert status["attempts"] == 2
+    await outbox.drain()
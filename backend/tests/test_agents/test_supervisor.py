@@ -0,0 +1,126 @@
+import asyncio
+
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+from app.agents.base import AgentCapability, AgentCard, BaseAgent
+from app.agents.registry import AgentRegistry
+from app.agents.supervisor import CHAT_CANCELLATIONS, SupervisorAgent, SupervisorDecision
+from app.config import settings
+from app.services import processes
+from app.services.deadline import deadline_scope
+from app.services.llm import LLM_ESCALATIONS
+
+
+class EchoAgent(BaseAgent):
+    def get_card(self) -> AgentCard:
+        return AgentCard(name="echo", description="Echoes tasks", capabilities=[
+            AgentCapability(name="echo", description="Echo", tools=[]),
+        ])
+
+    def get_tools(self):
+        return []
+
+    async def invoke(self, task: str, context: dict) -> dict:
+        return {"content": f"echo: {task}"}
+
+    def get_system_prompt(self) -> str:
+        return ""
+
+
+def _supervisor(decisions: list[SupervisorDecision], monkeypatch) -> SupervisorAgent:
+    monkeypatch.setattr(settings, "fast_router_enabled", False)
+    registry = AgentRegistry()
+    registry._agents["echo"] = EchoAgent()
+    supervisor = SupervisorAgent(registry, settings)
+    pending = iter(decisions)
+    supervisor.decider = RunnableLambda(
+        lambda _: {"raw": AIMessage(content=""), "parsed": next(pending), "parsing_error": None}
+    )
+    return supervisor
+
+
+async def test_structured_decisions_delegate_then_answer(monkeypatch):
+    supervisor = _supervisor([
+        SupervisorDecision(reasoning="needs echo", agent="echo", task="hello"),
+        SupervisorDecision(reasoning="done", response="All done"),
+    ], monkeypatch)
+
+    events = [e async for e in supervisor.stream("say hello")]
+
+    decisions = [e for e in events if e["type"] == "decision"]
+    assert [d["agent"] for d in decisions] == ["echo", None]
+    agent_output = next(e for e in events if e["type"] == "agent_output")
+    assert events.index(decisions[0]) < events.index(agent_output)
+    assert next(e for e in events if e["type"] == "message")["content"] == "All done"
+    assert events[-1]["type"] == "done"
+
+
+class SleepyAgent(EchoAgent):
+    def get_card(self) -> AgentCard:
+        return AgentCard(name="sleepy", description="Runs slow commands", capabilities=[])
+
+    async def invoke(self, task: str, context: dict) -> dict:
+        await processes.run(["sleep", "30"])
+        return {"content": "done"}
+
+
+async def test_closing_stream_cancels_run_and_kills_subprocess(monkeypatch):
+    started = []
+    real_exec = asyncio.create_subprocess_exec
+
+    async def spy_exec(*args, **kwargs):
+        started.append(await real_exec(*args, **kwargs))
+        return started[-1]
+
+    monkeypatch.setattr(asyncio, "create_subprocess_exec", spy_exec)
+    supervisor = _supervisor(
+        [SupervisorDecision(reasoning="slow", agent="sleepy", task="wait")], monkeypatch
+    )
+    supervisor.registry._agents["sleepy"] = SleepyAgent()
+    before = CHAT_CANCELLATIONS.labels("sleepy")._value.get()
+
+    stream = supervisor.stream("wait a while")
+    assert (await anext(stream))["type"] == "thinking"
+    assert (await anext(stream))["agent"] == "sleepy"
+    while not started:
+        await asyncio.sleep(0.01)
+    await stream.aclose()  # what sse-starlette does when the client disconnects
+
+    await asyncio.wait_for(started[0].wait(), 2)
+    assert started[0].returncode == -9
+    await asyncio.sleep(0.05)  # let the cancelled run unwind
+    assert CHAT_CANCELLATIONS.labels("sleepy")._value.get() == before + 1
+
+
+async def test_deadline_returns_partial_answer(monkeypatch):
+    supervisor = _supervisor([
+        SupervisorDecision(reasoning="needs echo", agent="echo", task="hello"),
+        SupervisorDecision(reasoning="slow", agent="sleepy", task="wait"),
+    ], monkeypatch)
+    supervisor.registry._agents["sleepy"] = SleepyAgent()
+
+    with deadline_scope(0.3):
+        result = await asyncio.wait_for(supervisor.run("hello, then wait"), 5)
+
+    assert result["partial"] is True
+    assert "echo: hello" in result["messages"][-1].content
+    assert list(result["agent_outputs"]) == ["echo"]
+
+
+async def test_unsure_fast_routing_escalates_to_strong_model(monkeypatch):
+    supervisor = _supervisor([
+        SupervisorDecision(reasoning="maybe echo?", agent="echo", task="hi", confidence=0.3),
+        SupervisorDecision(reasoning="done", response="fast answer"),
+    ], monkeypatch)
+    strong = iter([SupervisorDecision(reasoning="echo it", agent="echo", task="hello")])
+    supervisor.escalation_decider = RunnableLambda(
+        lambda _: {"raw": AIMessage(content=""), "parsed": next(strong), "parsing_error": None}
+    )
+    before = LLM_ESCALATIONS.labels("routing", "low_confidence")._value.get()
+
+    result = await supervisor.run("say hello")
+
+    assert result["agent_outputs"]["echo"]["content"] == "echo: hello"
+    assert result["messages"][-1].content == "fast answer"
+    assert LLM_ESCALATIONS.labels("routing", "low_confidence")._value.get() - before == 1
@@ -0,0 +1,70 @@
+import asyncio
+
+import httpx
+
+from app.agents.vault import metadata
+from app.services import resilience
+
+
+async def test_walk_returns_metadata_only_and_uses_cache(monkeypatch):
+    tree = {"": ["team/", "root-key"], "team/": ["db", "api/"], "team/api/": ["token"]}
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        path = request.url.path.removeprefix("/v1/secret/metadata/")
+        requests.append((request.method, path))
+        if request.method == "LIST":
+            return httpx.Response(200, json={"data": {"keys": tree[path]}})
+        return httpx.Response(200, json={"data": {
+            "current_version": 2,
+            "created_time": "2026-01-01T00:00:00Z",
+            "updated_time": "2026-02-01T00:00:00Z",
+            "versions": {"1": {}, "2": {"deletion_time": "", "destroyed": False}},
+        }})
+
+    transport = httpx.MockTransport(handler)
+    real_client = httpx.AsyncClient
+    monkeypatch.setattr(
+        metadata.httpx, "AsyncClient", lambda **kw: real_client(**{**kw, "transport": transport})
+    )
+    monkeypatch.setattr(metadata, "metadata_cache", metadata.MetadataCache())
+    monkeypatch.setattr(metadata.settings, "vault_addr", "http://vault.test")
+
+    result = await metadata.walk()
+    assert [s["path"] for s in result["secrets"]] == ["root-key", "team/api/token", "team/db"]
+    assert all(s["version"] == 2 and s["versions"] == 2 for s in result["secrets"])
+    assert len(requests) == 6
+
+    await metadata.walk("team")
+    assert len(requests) == 6
+
+    metadata.metadata_cache.invalidate("team/db")
+    await metadata.walk("team")
+    assert requests[6:] == [("LIST", "team/"), ("GET", "team/db")]
+
+
+async def test_walk_wider_than_the_bulkhead_queues_instead_of_failing(monkeypatch):
+    in_flight = peak = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, peak
+        if request.method == "LIST":
+            return httpx.Response(200, json={"data": {"keys": [f"s{i}" for i in range(12)]}})
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.05)  # 12 secrets, 2 at a time: the last waits well past 0.1s
+        in_flight -= 1
+        return httpx.Response(200, json={"data": {"current_version": 1, "versions": {"1": {}}}})
+
+    transport = httpx.MockTransport(handler)
+    monkeypatch.setattr(resilience.httpx, "AsyncHTTPTransport", lambda **kw: transport)
+    monkeypatch.setattr(resilience, "_integrations", {})
+    monkeypatch.setattr(resilience.settings, "integration_max_concurrent", 2)
+    monkeypatch.setattr(metadata.settings, "vault_walk_concurrency", 16)
+    monkeypatch.setattr(metadata, "metadata_cache", metadata.MetadataCache())
+    monkeypatch.setattr(metadata.settings, "vault_addr", "http://vault.test")
+
+    result = await metadata.walk()
+
+    assert (result["count"], result["errors"]) == (12, [])
+    assert peak == 2
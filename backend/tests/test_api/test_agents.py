@@ -0,0 +1,50 @@
+from langchain_core.tools import tool
+
+from app.agents.base import AgentCapability, AgentCard, BaseAgent
+from app.agents.registry import AgentRegistry
+from app.main import app
+
+
+@tool
+async def ping(host: str, count: int = 1) -> str:
+    """Ping a host."""
+    return "pong"
+
+
+class FakeAgent(BaseAgent):
+    calls = 0
+
+    def get_card(self) -> AgentCard:
+        FakeAgent.calls += 1
+        return AgentCard(name="fake", description="Test agent", capabilities=[
+            AgentCapability(name="ping", description="Ping", tools=["ping"]),
+        ])
+
+    def get_tools(self):
+        return [ping]
+
+    async def invoke(self, task: str, context: dict) -> dict:
+        return {"content": task}
+
+    def get_system_prompt(self) -> str:
+        return ""
+
+
+async def test_agent_endpoints_serve_snapshot_with_etags(client):
+    registry = AgentRegistry()
+    registry._agents["fake"] = FakeAgent()
+    app.state.agent_registry = registry
+
+    first = await client.get("/api/v1/agents/")
+    assert first.status_code == 200
+    assert first.json()["agents"][0]["name"] == "fake"
+    calls = FakeAgent.calls
+
+    cached = await client.get("/api/v1/agents/", headers={"If-None-Match": first.headers["etag"]})
+    assert cached.status_code == 304 and cached.content == b""
+
+    tools = await client.get("/api/v1/agents/fake/tools")
+    assert tools.json()["tools"][0]["parameters"]["required"] == ["host"]
+    assert (await client.get("/api/v1/agents/missing")).status_code == 404
+    assert FakeAgent.calls == calls  # cards are not rebuilt per request
+    assert registry.get_agent_descriptions() is registry.get_agent_descriptions()
@@ -0,0 +1,93 @@
+import asyncio
+import json
+
+from langchain_core.messages import AIMessage
+
+from app.api.deps import get_supervisor
+from app.api.v1 import chat
+from app.main import app
+from app.services.admission import AdmissionController
+from app.services.batch import shared
+
+
+class FleetSupervisor:
+    """Each prompt triggers a shared 'fleet status' sub-task plus one of its own."""
+
+    def __init__(self):
+        self.runs: list[str] = []
+        self.subtasks: list[str] = []
+        self.active: list[int] = []  # admission slots in use at each run
+
+    async def _subtask(self, name: str) -> str:
+        self.subtasks.append(name)
+        await asyncio.sleep(0.01)
+        return name
+
+    async def run(self, user_message: str, conversation_id: str = "") -> dict:
+        self.runs.append(user_message)
+        self.active.append(chat.admission._active)
+        await shared(("agent", "rancher", "fleet status"), lambda: self._subtask("fleet status"))
+        await shared(("agent", "argocd", user_message), lambda: self._subtask(user_message))
+        return {
+            "messages": [AIMessage(content=f"report: {user_message}")],
+            "agent_outputs": {},
+            "usage": {"input": 10, "output": 5},
+        }
+
+
+def _events(body: str) -> list[tuple[str, dict]]:
+    events = []
+    for block in body.replace("\r\n", "\n").strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.split("\n") if ": " in line)
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+async def test_batch_dedupes_and_reports_aggregate_usage(client):
+    supervisor = FleetSupervisor()
+    app.dependency_overrides[get_supervisor] = lambda: supervisor
+    try:
+        resp = await client.post("/api/v1/chat/batch", json={"items": [
+            {"id": "a", "message": "status of payments"},
+            {"id": "b", "message": "status of search"},
+            {"id": "c", "message": "status of payments "},
+        ]})
+    finally:
+        app.dependency_overrides.clear()
+
+    events = _events(resp.text)
+    results = {data["id"]: data for kind, data in events if kind == "result"}
+    assert set(results) == {"a", "b", "c"}
+    assert results["c"]["message"] == "report: status of payments" and results["c"]["deduplicated"]
+    assert sorted(supervisor.runs) == ["status of payments", "status of search"]
+    assert supervisor.subtasks.count("fleet status") == 1
+
+    kind, summary = events[-1]
+    assert kind == "summary"
+    assert summary["unique_prompts"] == 2 and summary["shared_calls"] == 1
+    assert summary["usage"] == {"input": 20, "output": 10}
+
+
+async def test_batch_holds_a_slot_per_concurrent_prompt_and_debits_each(client, monkeypatch):
+    controller = AdmissionController(
+        max_concurrent=10, per_user=1, max_queue=10, tokens_per_minute=6000
+    )
+    monkeypatch.setattr(chat, "admission", controller)
+    monkeypatch.setattr(chat.settings, "chat_batch_concurrency", 2)
+    supervisor = FleetSupervisor()
+    debits = []
+    monkeypatch.setattr(controller, "debit", debits.append)
+    app.dependency_overrides[get_supervisor] = lambda: supervisor
+    try:
+        resp = await client.post("/api/v1/chat/batch", json={"items": [
+            {"message": "status of payments"},
+            {"message": "status of search"},
+            {"message": "status of kafka"},
+        ]})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert [kind for kind, _ in _events(resp.text)].count("result") == 3
+    assert max(supervisor.active) == 2  # slots held while prompts ran
+    assert debits == [15, 15, 15, 0]  # each prompt as it completes; nothing left at release
+    assert controller._active == 0
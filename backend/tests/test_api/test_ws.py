@@ -0,0 +1,121 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from app.api.v1 import ws
+
+
+class ScriptedSupervisor:
+    cancelled: list[str] = []
+
+    def __init__(self, registry, settings):
+        pass
+
+    async def stream(self, user_message: str, conversation_id: str = ""):
+        yield {"type": "thinking", "content": "Analyzing your request..."}
+        try:
+            if user_message == "slow":
+                await asyncio.sleep(30)
+            reply = f"re: {user_message}"
+            yield {"type": "message", "content": reply, "conversation_id": conversation_id}
+            yield {"type": "done", "usage": {"input": 1, "output": 1}}
+        except asyncio.CancelledError:
+            self.cancelled.append(user_message)
+            raise
+
+
+class FakeSocket:
+    def __init__(self, frames: list):
+        self.frames = frames
+        self.sent = []
+
+    async def receive_json(self):
+        if not self.frames:
+            raise WebSocketDisconnect()
+        return self.frames.pop(0)
+
+    async def send_json(self, frame: dict):
+        self.sent.append(frame)
+
+
+@pytest.fixture
+def socket_client(monkeypatch):
+    monkeypatch.setattr(ws, "SupervisorAgent", ScriptedSupervisor)
+    app = FastAPI()
+    app.include_router(ws.router, prefix="/api/v1")
+    app.state.agent_registry = None
+    return TestClient(app)
+
+
+def test_multiplexes_and_cancels_by_id(socket_client):
+    with socket_client.websocket_connect("/api/v1/ws") as sock:
+        sock.send_json({"type": "auth", "token": ""})
+        assert sock.receive_json()["type"] == "ready"
+
+        sock.send_json({"type": "chat", "id": "a", "message": "slow"})
+        sock.send_json({"type": "chat", "id": "b", "message": "hello"})
+        frames = []
+        while not any(f["type"] == "done" for f in frames):
+            frames.append(sock.receive_json())
+        messages = [(f["id"], f["content"]) for f in frames if f["type"] == "message"]
+        assert messages == [("b", "re: hello")]
+        assert all(f["type"] == "thinking" for f in frames if f["id"] == "a")
+
+        sock.send_json({"type": "cancel", "id": "a"})
+        assert sock.receive_json() == {"type": "cancelled", "id": "a"}
+        sock.send_json({"type": "ping"})
+        assert sock.receive_json() == {"type": "pong"}
+    assert ScriptedSupervisor.cancelled == ["slow"]
+
+
+def test_rejects_connection_without_auth_frame(socket_client):
+    with socket_client.websocket_connect("/api/v1/ws") as sock:
+        sock.send_json({"type": "chat", "id": "a", "message": "hi"})
+        with pytest.raises(WebSocketDisconnect) as closed:
+            sock.receive_json()
+    assert closed.value.code == ws.CLOSE_UNAUTHORIZED
+
+
+async def test_cancel_is_answered_while_chat_events_are_backed_up(monkeypatch):
+    monkeypatch.setattr(ws.settings, "ws_send_queue_size", 1)
+    sock = FakeSocket([{"type": "cancel", "id": "a"}, {"type": "ping"}])
+    connection = ws.ChatConnection(sock, {"sub": "alice"})
+    await connection.send({"type": "thinking", "id": "a"})
+    producer = asyncio.create_task(connection.send({"type": "message", "id": "a"}))
+    connection.requests["a"] = producer
+
+    with pytest.raises(WebSocketDisconnect):
+        # The client never read, yet both frames were answered.
+        await asyncio.wait_for(connection.receive(), 1)
+    await asyncio.gather(producer, return_exceptions=True)
+    assert producer.cancelled()
+
+    pump = asyncio.create_task(connection.pump())
+    await asyncio.sleep(0)
+    pump.cancel()
+    assert sock.sent == [
+        {"type": "thinking", "id": "a"}, {"type": "cancelled", "id": "a"}, {"type": "pong"}
+    ]
+
+
+async def test_client_that_never_reads_its_replies_is_disconnected():
+    sock = FakeSocket([{"type": "ping"}] * (ws.REPLY_BACKLOG + 5))
+    connection = ws.ChatConnection(sock, {"sub": "alice"})
+
+    with pytest.raises(ws.SlowClientError):
+        await asyncio.wait_for(connection.receive(), 1)
+
+    assert connection.outbox.qsize() == ws.REPLY_BACKLOG
+    assert len(sock.frames) == 4  # stopped reading right after the first dropped reply
+
+
+@pytest.mark.parametrize("frame", [["auth"], "auth", 42])
+def test_rejects_non_object_auth_frame(socket_client, frame):
+    with socket_client.websocket_connect("/api/v1/ws") as sock:
+        sock.send_json(frame)
+        with pytest.raises(WebSocketDisconnect) as closed:
+            sock.receive_json()
+    assert closed.value.code == ws.CLOSE_UNAUTHORIZED
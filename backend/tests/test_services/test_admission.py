@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+from app.services.admission import AdmissionController, AdmissionRejectedError
+
+
+async def test_queue_positions_advance_and_overflow_is_shed():
+    controller = AdmissionController(max_concurrent=1, per_user=5, max_queue=2)
+    running = controller.enter("alice")
+    first, second = controller.enter("bob"), controller.enter("carol")
+
+    assert running.position == 0 and await running.wait(0)
+    assert (first.position, second.position) == (1, 2)
+    with pytest.raises(AdmissionRejectedError):
+        controller.enter("dave")
+
+    running.release()
+    assert await first.wait(0.1) and second.position == 1
+
+
+async def test_per_user_limit_rejects_immediately():
+    controller = AdmissionController(max_concurrent=10, per_user=1, max_queue=10)
+    ticket = controller.enter("alice")
+    with pytest.raises(AdmissionRejectedError):
+        controller.enter("alice")
+    ticket.release()
+    controller.enter("alice")
+
+
+async def test_overdrawn_token_budget_holds_queue_until_refilled():
+    controller = AdmissionController(
+        max_concurrent=10, per_user=10, max_queue=10, tokens_per_minute=6000
+    )
+    first = controller.enter("alice")
+    first.release(tokens_used=6010)  # 10 tokens overdrawn at 100 tokens/s
+
+    waiting = controller.enter("bob")
+    assert waiting.position == 1
+    assert await waiting.wait(0.5)
+
+
+async def test_abandoned_queued_ticket_frees_its_slot():
+    controller = AdmissionController(max_concurrent=1, per_user=5, max_queue=1)
+    running = controller.enter("alice")
+    queued = controller.enter("bob")
+    assert not await queued.wait(0.01)
+    queued.release()
+    controller.enter("carol")  # the queue has room again
+    running.release()
+    await asyncio.sleep(0)
+
+
+async def test_batch_ticket_holds_its_slots_but_counts_once_per_user():
+    controller = AdmissionController(max_concurrent=4, per_user=2, max_queue=5)
+    batch = controller.enter("alice", slots=3)
+    other = controller.enter("alice")
+    queued = controller.enter("bob", slots=2)
+
+    assert await batch.wait(0) and await other.wait(0)
+    assert queued.position == 1
+    batch.release()
+    assert await queued.wait(0.1)
+
+
+async def test_debit_overdraws_budget_before_the_request_finishes():
+    controller = AdmissionController(
+        max_concurrent=10, per_user=10, max_queue=10, tokens_per_minute=6000
+    )
+    batch = controller.enter("alice", slots=4)
+    batch.debit(6100)
+
+    assert controller.enter("bob").position == 1
+    batch.release()
@@ -0,0 +1,99 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi import HTTPException
+from jose import jwk, jwt
+
+from app.services import auth
+
+
+def _keypair(kid: str) -> tuple[str, dict]:
+    private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = private.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+    public = jwk.construct(private.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    ), "RS256").to_dict()
+    return pem.decode(), {**public, "kid": kid, "use": "sig", "alg": "RS256"}
+
+
+def _token(pem: str, kid: str, **claims) -> str:
+    claims = {"sub": "alice", "aud": "idpportal", "exp": int(time.time()) + 300, **claims}
+    return jwt.encode(claims, pem, algorithm="RS256", headers={"kid": kid})
+
+
+@pytest.fixture
+def keycloak(monkeypatch):
+    monkeypatch.setattr(auth.settings, "keycloak_url", "http://keycloak")
+    monkeypatch.setattr(auth.settings, "keycloak_client_id", "idpportal")
+    monkeypatch.setattr(auth, "jwks", auth.JWKSCache())
+    monkeypatch.setattr(auth, "verified_claims", auth.ClaimsCache(100))
+    state = {"keys": [], "fetches": 0, "status": 200}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        state["fetches"] += 1
+        await asyncio.sleep(0.01)
+        return httpx.Response(state["status"], json={"keys": state["keys"]})
+
+    real_client = httpx.AsyncClient
+    transport = httpx.MockTransport(handler)
+    monkeypatch.setattr(
+        auth.httpx, "AsyncClient", lambda **kw: real_client(transport=transport, **kw)
+    )
+    return state
+
+
+async def test_concurrent_cold_start_fetches_jwks_once_and_caches_claims(keycloak, monkeypatch):
+    pem, public = _keypair("k1")
+    keycloak["keys"] = [public]
+    tokens = [_token(pem, "k1", sub=f"user-{i}") for i in range(5)]
+
+    results = await asyncio.gather(*(auth.verify_token(t) for t in tokens))
+    assert [r["sub"] for r in results] == [f"user-{i}" for i in range(5)]
+    assert keycloak["fetches"] == 1
+
+    monkeypatch.setattr(
+        auth.jwt, "decode", lambda *a, **kw: pytest.fail("claims should come from the cache")
+    )
+    assert (await auth.verify_token(tokens[0]))["sub"] == "user-0"
+
+
+async def test_rotated_key_is_fetched_and_forged_kid_rejected(keycloak, monkeypatch):
+    monkeypatch.setattr(auth, "JWKS_MIN_REFRESH_INTERVAL", 0)
+    old_pem, old_public = _keypair("old")
+    new_pem, new_public = _keypair("new")
+    keycloak["keys"] = [old_public]
+    await auth.verify_token(_token(old_pem, "old"))
+
+    keycloak["keys"] = [new_public]
+    assert (await auth.verify_token(_token(new_pem, "new")))["sub"] == "alice"
+    assert keycloak["fetches"] == 2
+
+    with pytest.raises(HTTPException) as e:
+        await auth.verify_token(_token(old_pem, "new"))
+    assert e.value.status_code == 401
+
+
+async def test_keycloak_outage_serves_known_keys_and_throttles_retries(keycloak, monkeypatch):
+    pem, public = _keypair("k1")
+    keycloak["keys"] = [public]
+    await auth.verify_token(_token(pem, "k1"))
+    monkeypatch.setattr(auth.settings, "auth_jwks_ttl", 0)  # every lookup now wants a refresh
+    last_attempt = time.monotonic() - auth.JWKS_MIN_REFRESH_INTERVAL
+    monkeypatch.setattr(auth.jwks, "_attempted_at", last_attempt)
+    keycloak["status"] = 503
+
+    claims = await asyncio.gather(
+        *(auth.verify_token(_token(pem, "k1", sub=f"user-{i}")) for i in range(5))
+    )
+    assert [c["sub"] for c in claims] == [f"user-{i}" for i in range(5)]
+
+    with pytest.raises(HTTPException) as e:
+        await auth.verify_token(_token(pem, "unknown"))
+    assert e.value.status_code == 503
+    assert keycloak["fetches"] == 2  # the failed attempt throttles the rest of the window
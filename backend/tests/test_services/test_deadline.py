@@ -0,0 +1,55 @@
+import time
+
+import pytest
+
+from app.services import processes
+from app.services.deadline import (
+    DeadlineExceededError,
+    deadline_scope,
+    http_timeout,
+    remaining,
+    timeout,
+    within_deadline,
+)
+
+
+def test_nested_scope_only_tightens():
+    assert remaining() is None
+    with deadline_scope(10):
+        with deadline_scope(100):
+            assert remaining() <= 10
+        with deadline_scope(1):
+            assert remaining() <= 1
+    assert remaining() is None
+
+
+def test_timeouts_shrink_to_remaining_budget():
+    assert timeout(30) == 30
+    with deadline_scope(2):
+        assert timeout(30) <= 2
+        assert http_timeout() <= 2
+        assert timeout(0.5) == 0.5
+    with deadline_scope(at=time.monotonic() - 1):
+        with pytest.raises(DeadlineExceededError):
+            http_timeout()
+
+
+async def test_within_deadline_raises_when_budget_runs_out():
+    with deadline_scope(0.1):
+        with pytest.raises(DeadlineExceededError):
+            await within_deadline(processes.run(["sleep", "5"]))
+
+
+async def test_subprocess_killed_at_deadline():
+    started = time.monotonic()
+    with deadline_scope(0.2):
+        with pytest.raises(DeadlineExceededError):
+            await processes.run(["sleep", "5"])
+    assert time.monotonic() - started < 2
+
+
+async def test_subprocess_own_timeout_is_not_a_deadline():
+    with deadline_scope(30):
+        with pytest.raises(TimeoutError) as e:
+            await processes.run(["sleep", "5"], default_timeout=0.2)
+    assert not isinstance(e.value, DeadlineExceededError)
@@ -0,0 +1,129 @@
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+
+from app.config import Settings
+from app.services import llm as llm_module
+from app.services.llm import (
+    LLM_COST,
+    LLM_ESCALATIONS,
+    LLM_LATENCY,
+    LLM_TOKENS,
+    _UsageRecorder,
+    cached_system_message,
+    estimated_cost,
+    llm_usage,
+    model_route,
+    select_tools,
+)
+
+
+def test_system_prompt_marked_for_caching_only_on_anthropic():
+    anthropic = cached_system_message(Settings(llm_provider="anthropic"), "You are an agent.")
+    assert anthropic.content == [
+        {"type": "text", "text": "You are an agent.", "cache_control": {"type": "ephemeral"}},
+    ]
+    openai = cached_system_message(Settings(llm_provider="openai"), "You are an agent.")
+    assert openai.content == "You are an agent."
+
+
+async def test_usage_scope_collects_cache_tokens():
+    usage = {
+        "input_tokens": 1200,
+        "output_tokens": 40,
+        "total_tokens": 1240,
+        "input_token_details": {"cache_read": 1100},
+    }
+    llm = GenericFakeChatModel(
+        messages=iter([AIMessage(content="hi", usage_metadata=usage)] * 2),
+        callbacks=[_UsageRecorder("test-model")],
+    )
+    before = LLM_TOKENS.labels("test-model", "cache_read")._value.get()
+
+    with llm_usage() as scope:
+        await llm.ainvoke([HumanMessage(content="hello")])
+        await llm.ainvoke([HumanMessage(content="again")])
+
+    assert scope == {"input": 2400, "output": 80, "cache_read": 2200}
+    assert LLM_TOKENS.labels("test-model", "cache_read")._value.get() - before == 2200
+
+
+def test_roles_route_to_tiers_with_per_agent_overrides():
+    settings = Settings(
+        llm_provider="anthropic",
+        llm_model="strong-model",
+        llm_role_tiers="github.tools=strong",
+        llm_role_max_tokens="routing=512,github.synthesis=8192",
+    )
+
+    assert model_route(settings, "routing") == llm_module.ModelRoute(
+        "routing", "fast", "claude-3-5-haiku-20241022", 512
+    )
+    assert model_route(settings, "tools", "argocd").tier == "fast"
+    assert model_route(settings, "tools", "github").model == "strong-model"
+    assert model_route(settings, "synthesis", "github").max_tokens == 8192
+    assert model_route(settings, "synthesis", "argocd") == llm_module.ModelRoute(
+        "synthesis", "strong", "strong-model", 4096
+    )
+    openai = Settings(llm_provider="openai", llm_fast_model="tiny")
+    assert model_route(openai, "tools").model == "tiny"
+
+
+def test_cost_counts_cached_prompt_tokens_at_cache_prices():
+    usage = {"input": 1_000_000, "output": 100_000, "cache_read": 500_000, "cache_write": 100_000}
+    # 400k uncached + 500k at 10% + 100k at 125% = 575k prompt tokens at $3, plus 100k output at $15
+    cost = estimated_cost("claude-sonnet-4-20250514", usage)
+    assert round(cost, 4) == round(0.575 * 3 + 0.1 * 15, 4)
+    assert estimated_cost("unknown-model", usage) == 0
+
+
+async def test_recorder_observes_latency_and_cost_by_tier():
+    usage = {"input_tokens": 1000, "output_tokens": 100, "total_tokens": 1100}
+    llm = GenericFakeChatModel(
+        messages=iter([AIMessage(content="hi", usage_metadata=usage)]),
+        callbacks=[_UsageRecorder("gpt-4o-mini", "fast", "routing")],
+    )
+    cost_before = LLM_COST.labels("fast", "routing")._value.get()
+    count_before = _histogram_count("fast", "routing")
+
+    await llm.ainvoke([HumanMessage(content="hello")])
+
+    assert LLM_COST.labels("fast", "routing")._value.get() - cost_before == estimated_cost(
+        "gpt-4o-mini", {"input": 1000, "output": 100}
+    )
+    assert _histogram_count("fast", "routing") - count_before == 1
+
+
+def _histogram_count(tier: str, role: str) -> float:
+    for metric in LLM_LATENCY.collect():
+        for sample in metric.samples:
+            if sample.name.endswith("_count") and sample.labels == {"tier": tier, "role": role}:
+                return sample.value
+    return 0.0
+
+
+class ToolModel(GenericFakeChatModel):
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+async def test_malformed_fast_tool_calls_escalate_to_strong_tier(monkeypatch):
+    broken = AIMessage(content="", invalid_tool_calls=[
+        {"name": "list_apps", "args": "{oops", "id": "1", "error": None},
+    ])
+    fixed = AIMessage(content="", tool_calls=[{"name": "list_apps", "args": {}, "id": "2"}])
+    tiers = []
+
+    def fake_get_llm(settings, role="synthesis", agent="", tier=None):
+        tiers.append(tier or "fast")
+        return ToolModel(messages=iter([fixed if tier == "strong" else broken]))
+
+    monkeypatch.setattr(llm_module, "get_llm", fake_get_llm)
+    before = LLM_ESCALATIONS.labels("tools", "invalid_tool_call")._value.get()
+
+    response = await select_tools(
+        Settings(llm_provider="anthropic"), "argocd", [], [HumanMessage(content="list apps")]
+    )
+
+    assert tiers == ["fast", "strong"]
+    assert response.tool_calls[0]["id"] == "2"
+    assert LLM_ESCALATIONS.labels("tools", "invalid_tool_call")._value.get() - before == 1
@@ -0,0 +1,253 @@
+import asyncio
+import base64
+import json
+from contextlib import asynccontextmanager
+from datetime import UTC, datetime
+
+import httpx
+import yaml
+from sqlalchemy.dialects import postgresql
+
+from app.models import ProvisioningJob
+from app.services.provisioning import ProvisioningEngine, ProvisioningError, StepSkipped, StepSpec
+from app.services.provisioning.job import Job
+
+
+def _sleep_step(seconds: float, output: dict | None = None):
+    async def run(job):
+        await asyncio.sleep(seconds)
+        return output or {}
+
+    return run
+
+
+def _serve(monkeypatch, handler):
+    """Route the provisioning steps' integration clients to handler."""
+    from app.services.provisioning import steps
+
+    transport = httpx.MockTransport(handler)
+    monkeypatch.setattr(
+        steps.resilience, "client", lambda name, **kw: httpx.AsyncClient(transport=transport, **kw)
+    )
+
+
+async def _finish(engine: ProvisioningEngine, job_id: str) -> dict:
+    async for snapshot in engine.events(job_id):
+        last = snapshot
+    return last
+
+
+async def test_independent_steps_run_concurrently():
+    async def skip(job):
+        raise StepSkipped("not needed")
+
+    engine = ProvisioningEngine([
+        StepSpec("a", (), _sleep_step(0.01)),
+        StepSpec("b", ("a",), _sleep_step(0.2)),
+        StepSpec("c", ("a",), _sleep_step(0.2)),
+        StepSpec("d", ("b", "c"), skip),
+    ])
+    job = await engine.submit("microservice", {"service_name": "orders"})
+    result = await _finish(engine, job.id)
+
+    assert result["status"] == "completed"
+    statuses = [s["status"] for s in result["steps"]]
+    assert statuses == ["completed", "completed", "completed", "skipped"]
+    assert result["steps"][3]["output"] == {"reason": "not needed"}
+    # b and c overlap, so the job takes about one step's time, not two.
+    assert result["duration_ms"] < 350
+
+
+async def test_failure_cancels_dependents_only():
+    async def fail(job):
+        raise ProvisioningError("policy violations")
+
+    engine = ProvisioningEngine([
+        StepSpec("validate", (), fail),
+        StepSpec("independent", (), _sleep_step(0, {"ok": True})),
+        StepSpec("deploy", ("validate",), _sleep_step(0)),
+        StepSpec("notify", ("deploy", "independent"), _sleep_step(0)),
+    ])
+    job = await engine.submit("microservice", {"service_name": "orders"})
+    result = await _finish(engine, job.id)
+
+    statuses = {s["name"]: s["status"] for s in result["steps"]}
+    assert result["status"] == "failed"
+    assert statuses == {
+        "validate": "failed",
+        "independent": "completed",
+        "deploy": "cancelled",
+        "notify": "cancelled",
+    }
+    assert result["steps"][0]["error"] == "policy violations"
+    assert job.output("independent") == {"ok": True}
+
+
+async def test_bulk_item_failure_is_isolated(monkeypatch):
+    from app.services.provisioning import bulk
+
+    async def validate(job):
+        items = {
+            "0": {"status": "completed", "output": {}},
+            "1": {"status": "failed", "error": "policy violations"},
+        }
+        return {"items": items}
+
+    calls = []
+
+    async def deploy(item):
+        calls.append(item.parameters["service_name"])
+        return {"application": item.parameters["service_name"]}
+
+    async def bulk_deploy(job):
+        return await bulk._per_item(job, "deploy_gitops", "argocd", deploy)
+
+    engine = ProvisioningEngine(bulk_pipeline=[
+        StepSpec("validate_policies", (), validate),
+        StepSpec("deploy_gitops", ("validate_policies",), bulk_deploy),
+    ])
+    items = [
+        {"template_name": "microservice", "parameters": {"service_name": "orders"}},
+        {"template_name": "microservice", "parameters": {"service_name": "payments"}},
+    ]
+    job = await engine.submit_bulk(items)
+    result = await _finish(engine, job.id)
+
+    assert calls == ["orders"]
+    assert [s["status"] for s in result["steps"]] == ["completed", "completed"]
+    assert [i["status"] for i in result["items"]] == ["completed", "failed"]
+    assert result["items"][0]["steps"]["deploy_gitops"]["output"] == {"application": "orders"}
+    assert result["items"][1]["steps"]["deploy_gitops"]["status"] == "cancelled"
+
+
+async def test_events_follow_a_job_run_by_another_process(monkeypatch):
+    from app.services.provisioning import engine as engine_module
+
+    engine = ProvisioningEngine([StepSpec("a", (), _sleep_step(0))])
+    step = {
+        "name": "a", "depends_on": [], "status": "running", "started_at": None, "finished_at": None,
+    }
+    running = Job(
+        id="j1", template_name="microservice", parameters={}, steps=[step], status="running"
+    )
+    done = Job(
+        id="j1", template_name="microservice", parameters={},
+        steps=[{**step, "status": "completed"}], status="completed",
+    )
+    rows = iter([running, running, done])
+
+    async def from_db(job_id):
+        return next(rows)
+
+    monkeypatch.setattr(engine, "get", from_db)
+    monkeypatch.setattr(engine_module, "EVENTS_POLL_INTERVAL", 0)
+
+    statuses = [snapshot["status"] async for snapshot in engine.events("j1")]
+
+    assert statuses == ["running", "completed"]
+
+
+async def test_catalog_entry_is_committed_before_it_is_registered(monkeypatch):
+    from app.services.provisioning import steps
+
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append((request.method, str(request.url)))
+        if request.url.host == "api.github.com" and request.method == "GET":
+            return httpx.Response(404)
+        if request.url.host == "api.github.com":
+            content = base64.b64decode(json.loads(request.content)["content"])
+            assert yaml.safe_load(content)["spec"]["owner"] == "team-a"
+            return httpx.Response(201, json={"content": {"sha": "abc"}})
+        return httpx.Response(201)
+
+    _serve(monkeypatch, handler)
+    monkeypatch.setattr(steps.settings, "backstage_url", "http://backstage.test")
+    repo = {
+        "url": "https://github.com/acme/orders", "name": "acme/orders", "default_branch": "trunk",
+    }
+    parameters = {"name": "orders", "owner": "team-a"}
+    job = Job(id="j1", template_name="microservice", parameters=parameters, steps=[
+        {"name": "create_repo", "status": "completed", "output": repo},
+        {"name": "commit_catalog_info", "status": "pending", "output": None},
+    ])
+
+    job.steps[1].update(status="completed", output=await steps.commit_catalog_info(job))
+    registered = await steps.register_catalog(job)
+
+    assert registered == {"location": "https://github.com/acme/orders/blob/trunk/catalog-info.yaml"}
+    assert [m for m, _ in requests] == ["GET", "PUT", "POST"]
+    deps = {spec.name: spec.depends_on for spec in steps.PIPELINE}
+    assert deps["register_catalog"] == ("commit_catalog_info",)
+    assert deps["deploy_gitops"] == ("generate_configs",)
+
+
+async def test_commit_is_rebuilt_on_the_new_head_when_the_branch_moved(monkeypatch):
+    from app.services.provisioning import steps
+
+    heads = iter(["base", "moved"])
+    parents = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        if request.method == "GET":
+            return httpx.Response(200, json={"object": {"sha": next(heads)}})
+        if path.endswith("/trees"):
+            return httpx.Response(201, json={"sha": "tree"})
+        if path.endswith("/commits"):
+            parents.append(json.loads(request.content)["parents"])
+            return httpx.Response(201, json={"sha": f"commit-{len(parents)}"})
+        # Another writer moved the branch after our first read.
+        return httpx.Response(422 if len(parents) == 1 else 200, json={})
+
+    _serve(monkeypatch, handler)
+    monkeypatch.setattr(steps.settings, "gitops_repo", "acme/gitops")
+
+    files = [{"path": "apps/orders/app.yaml", "content": "kind: App"}]
+    sha = await steps.commit_files(files, "Provision orders")
+
+    assert sha == "commit-2"
+    assert parents == [["base"], ["moved"]]
+
+
+async def test_resume_claims_only_unleased_jobs_and_skips_locked_rows(monkeypatch):
+    from app.services.provisioning import engine as engine_module
+
+    now = datetime.now(UTC)
+    row = ProvisioningJob(
+        id="j1", kind="single", template_name="microservice", parameters={}, status="running",
+        steps=[{"name": "a", "depends_on": [], "status": "running", "started_at": now.isoformat()}],
+        requested_by="", created_at=now, updated_at=now,
+    )
+    statements = []
+
+    class Result:
+        def scalars(self):
+            return self
+
+        def all(self):
+            return [row]
+
+    class Session:
+        async def execute(self, statement):
+            statements.append(str(statement.compile(dialect=postgresql.dialect())))
+            return Result()
+
+    @asynccontextmanager
+    async def session():
+        yield Session()
+
+    started = []
+    engine = ProvisioningEngine([StepSpec("a", (), _sleep_step(0))])
+    monkeypatch.setattr(engine_module, "is_db_available", lambda: True)
+    monkeypatch.setattr(engine_module, "get_session", session)
+    monkeypatch.setattr(engine, "_start", started.append)
+
+    await engine.resume()
+
+    assert "FOR UPDATE SKIP LOCKED" in statements[0]
+    assert "lease_until IS NULL OR provisioning_jobs.lease_until <" in statements[0]
+    assert row.claimed_by == engine.replica and row.lease_until > now
+    assert [job.id for job in started] == ["j1"]
+    assert started[0].steps[0]["status"] == "pending"
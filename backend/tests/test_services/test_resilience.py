@@ -0,0 +1,138 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.services import resilience
+from app.services.batch import batch_scope, shared
+from app.services.deadline import deadline_scope
+from app.services.resilience import (
+    CircuitState,
+    Integration,
+    IntegrationUnavailable,
+    ResilientTransport,
+)
+
+
+def _client(integration: Integration, handler) -> httpx.AsyncClient:
+    transport = ResilientTransport(integration, httpx.MockTransport(handler))
+    return httpx.AsyncClient(transport=transport)
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(resilience, "RETRY_BACKOFF", 0)
+    monkeypatch.setattr(resilience.settings, "integration_retry_attempts", 3)
+
+
+async def test_retries_idempotent_requests_only():
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.method)
+        return httpx.Response(503 if len(calls) % 2 else 200)
+
+    async with _client(Integration("t-retry", 4, 10, 30), handler) as client:
+        assert (await client.get("http://jira.test/issue")).status_code == 200
+        assert (await client.post("http://jira.test/issue")).status_code == 503
+    assert calls == ["GET", "GET", "POST"]
+
+
+async def test_breaker_fails_fast_then_probes(monkeypatch):
+    integration = Integration("t-breaker", 4, failure_threshold=2, reset_timeout=0.1)
+    healthy = False
+    calls = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        if not healthy:
+            raise httpx.ConnectError("refused", request=request)
+        return httpx.Response(200)
+
+    async with _client(integration, handler) as client:
+        with pytest.raises(httpx.ConnectError):
+            await client.post("http://jira.test/issue")
+        with pytest.raises(httpx.ConnectError):
+            await client.post("http://jira.test/issue")
+        assert integration.state is CircuitState.OPEN
+
+        with pytest.raises(IntegrationUnavailable, match="circuit open"):
+            await client.get("http://jira.test/issue")
+        assert calls == 2  # failed fast, without touching the backend
+
+        await asyncio.sleep(0.15)
+        healthy = True
+        assert (await client.get("http://jira.test/issue")).status_code == 200
+        assert integration.state is CircuitState.CLOSED
+
+
+async def test_bulkhead_caps_concurrency():
+    integration = Integration("t-bulkhead", max_concurrent=2, failure_threshold=5, reset_timeout=30)
+    in_flight = peak = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.02)
+        in_flight -= 1
+        return httpx.Response(200)
+
+    async with _client(integration, handler) as client:
+        await asyncio.gather(*(client.get("http://vault.test/") for _ in range(6)))
+    assert peak == 2
+
+
+async def test_full_bulkhead_waits_until_the_deadline():
+    integration = Integration(
+        "t-bulkhead-full", max_concurrent=2, failure_threshold=5, reset_timeout=30
+    )
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(0.3)
+        return httpx.Response(200)
+
+    async with _client(integration, handler) as client:
+        busy = [asyncio.create_task(client.get(f"http://vault.test/{i}")) for i in range(2)]
+        await asyncio.sleep(0.01)
+        with deadline_scope(0.1), pytest.raises(IntegrationUnavailable, match="overloaded"):
+            await client.get("http://vault.test/2")  # the deadline ends before a slot frees up
+        queued = await client.get("http://vault.test/3")  # no deadline: waits for a slot
+        assert queued.status_code == 200
+        assert all(r.status_code == 200 for r in await asyncio.gather(*busy))
+    assert integration.state is CircuitState.CLOSED  # overload is not a backend failure
+
+
+async def test_batch_scope_shares_identical_reads():
+    calls = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.method)
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, json={"items": []})
+
+    async with _client(Integration("t-batch", 4, 5, 30), handler) as client:
+        with batch_scope():
+            responses = await asyncio.gather(
+                *(client.get("http://argocd.test/apps") for _ in range(3))
+            )
+        await client.get("http://argocd.test/apps")
+    assert [r.json() for r in responses] == [{"items": []}] * 3
+    assert calls == ["GET", "GET"]  # one for the batch, one outside it
+
+
+async def test_batch_scope_exit_cancels_calls_nobody_awaits():
+    started = asyncio.Event()
+
+    async def slow_read():
+        started.set()
+        await asyncio.sleep(30)
+
+    with batch_scope() as scope:
+        item = asyncio.create_task(shared("fleet", slow_read))
+        await started.wait()
+        item.cancel()  # the item gives up, but the shielded call keeps running
+        call = scope._calls["fleet"]
+    await asyncio.sleep(0)
+    assert call.cancelled()
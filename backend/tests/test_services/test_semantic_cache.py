@@ -0,0 +1,189 @@
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+from app.agents.registry import AgentRegistry
+from app.agents.supervisor import SupervisorAgent, SupervisorDecision
+from app.config import settings
+from app.services import semantic_cache as cache_module
+from app.services.semantic_cache import MemoryStore, SemanticCache, normalize
+from tests.test_agents.test_supervisor import EchoAgent
+
+
+class BrokenAgent(EchoAgent):
+    async def invoke(self, task: str, context: dict) -> dict:
+        raise ConnectionError("argocd is unreachable")
+
+
+class FakeEmbeddings:
+    """Bag-of-words vectors: questions sharing most words are close."""
+
+    VOCAB = [
+        "what", "is", "failing", "in", "prod", "production", "deploy", "rotate", "secret", "list"
+    ]
+
+    async def aembed_query(self, text: str) -> list[float]:
+        words = text.split()
+        return [float(words.count(w)) for w in self.VOCAB] + [0.01]
+
+
+def _cache(monkeypatch, **overrides) -> SemanticCache:
+    monkeypatch.setattr(settings, "openai_api_key", "sk-test")
+    monkeypatch.setattr(settings, "semantic_cache_threshold", 0.8)
+    for name, value in overrides.items():
+        monkeypatch.setattr(settings, name, value)
+    cache = SemanticCache()
+    cache._embeddings = FakeEmbeddings()
+    cache._memory = MemoryStore()
+    return cache
+
+
+def _result(message: str, agent: str = "argocd", tools: list[str] = ("list_applications",)) -> dict:
+    return {
+        "messages": [AIMessage(content=message)],
+        "agent_outputs": {agent: {"content": message, "tools_used": list(tools)}},
+        "usage": {"input": 900, "output": 100},
+    }
+
+
+def test_normalize_ignores_case_and_punctuation():
+    assert normalize("  What's failing in PROD?? ") == "what s failing in prod"
+
+
+async def test_near_duplicate_question_hits(monkeypatch):
+    cache = _cache(monkeypatch)
+    _, embedding = await cache.lookup("v1", "What is failing in prod?")
+    await cache.put("v1", "What is failing in prod?", embedding, _result("checkout is degraded"))
+
+    answer, _ = await cache.lookup("v1", "what is failing in prod")
+    assert answer["message"] == "checkout is degraded"
+    assert answer["tokens"] == 1000
+
+    # Another agent set or chat model.
+    assert (await cache.lookup("v2", "what is failing in prod"))[0] is None
+    assert (await cache.lookup("v1", "rotate the deploy secret"))[0] is None
+
+
+async def test_stale_answer_runs_again(monkeypatch):
+    cache = _cache(monkeypatch, semantic_cache_agent_ttls="argocd=30")
+    _, embedding = await cache.lookup("v1", "what is failing in prod")
+    await cache.put("v1", "what is failing in prod", embedding, _result("checkout is degraded"))
+    entry, _ = cache._memory._entries[0]
+    entry.expires_at -= 31
+
+    assert (await cache.lookup("v1", "what is failing in prod"))[0] is None
+
+
+async def test_mutations_partial_runs_and_opted_out_agents_are_not_stored(monkeypatch):
+    cache = _cache(monkeypatch, semantic_cache_agent_ttls="jira=0")
+    _, embedding = await cache.lookup("v1", "rotate secret")
+
+    for result in (
+        _result("rotated", tools=["list_applications", "sync_application"]),
+        _result("secret is ...", agent="vault", tools=["get_secret"]),
+        _result("ticket", agent="jira", tools=["search_issues"]),
+        {**_result("half"), "partial": True},
+    ):
+        await cache.put("v1", "rotate secret", embedding, result)
+
+    assert not cache._memory._entries
+
+
+async def test_answers_built_on_a_failed_agent_are_not_stored(monkeypatch):
+    cache = _cache(monkeypatch, fast_router_enabled=False)
+    monkeypatch.setattr("app.agents.supervisor.semantic_cache", cache)
+    registry = AgentRegistry()
+    registry._agents["echo"] = BrokenAgent()
+    supervisor = SupervisorAgent(registry, settings)
+    decisions = iter([
+        SupervisorDecision(reasoning="ask echo", agent="echo", task="what is failing"),
+        SupervisorDecision(reasoning="done", response="echo failed, try again later"),
+    ])
+    supervisor.decider = RunnableLambda(
+        lambda _: {"raw": AIMessage(content=""), "parsed": next(decisions), "parsing_error": None}
+    )
+
+    result = await supervisor.run("What is failing in prod?")
+
+    assert result["failed_agents"] == ["echo"]
+    assert "Error: argocd is unreachable" in result["messages"][1].content
+    assert not cache._memory._entries
+
+
+async def test_supervisor_answers_repeat_question_from_cache(monkeypatch):
+    cache = _cache(monkeypatch, fast_router_enabled=False)
+    monkeypatch.setattr(cache_module, "semantic_cache", cache)
+    monkeypatch.setattr("app.agents.supervisor.semantic_cache", cache)
+    registry = AgentRegistry()
+    registry._agents["echo"] = EchoAgent()
+    supervisor = SupervisorAgent(registry, settings)
+    calls = []
+
+    def decide(_):
+        calls.append(1)
+        decision = SupervisorDecision(reasoning="done", response="All green")
+        return {"raw": AIMessage(content=""), "parsed": decision, "parsing_error": None}
+
+    supervisor.decider = RunnableLambda(decide)
+
+    first = await supervisor.run("What is failing in prod?")
+    second = await supervisor.run("what is failing in prod")
+
+    assert len(calls) == 1
+    assert second["cached"] and second["routing"] == "cache"
+    assert second["messages"][-1].content == first["messages"][-1].content == "All green"
+
+
+class FakeSession:
+    def __init__(self, statements: list[str], fail: bool):
+        self.statements = statements
+        self.fail = fail
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement, params=None):
+        if self.fail:
+            raise ConnectionRefusedError("database is down")
+        self.statements.append(" ".join(str(statement).split()))
+
+    async def commit(self):
+        pass
+
+
+def _database(monkeypatch, fail: bool = False) -> list[str]:
+    statements = []
+    monkeypatch.setattr(cache_module.database, "is_db_available", lambda: True)
+    monkeypatch.setattr(
+        cache_module.database, "async_session_factory", lambda: FakeSession(statements, fail)
+    )
+    return statements
+
+
+async def test_store_prunes_expired_rows_at_most_once_per_interval(monkeypatch):
+    cache = _cache(monkeypatch)
+    statements = _database(monkeypatch)
+    embedding = await cache.embed("what is failing in prod")
+
+    for question in ("what is failing in prod", "list prod deploys"):
+        await cache.put("v1", question, embedding, _result("checkout is degraded"))
+
+    assert [s.split()[0] for s in statements] == ["INSERT", "DELETE", "INSERT"]
+    assert "expires_at < now()" in statements[1]
+    assert not any("CREATE" in s for s in statements)  # the schema comes from migrations
+
+
+async def test_unreachable_database_falls_back_to_memory(monkeypatch):
+    cache = _cache(monkeypatch)
+    _database(monkeypatch, fail=True)
+    _, embedding = await cache.lookup("v1", "What is failing in prod?")
+    await cache.put("v1", "What is failing in prod?", embedding, _result("checkout is degraded"))
+
+    answer, _ = await cache.lookup("v1", "what is failing in prod")
+    assert answer["message"] == "checkout is degraded"
+    assert cache.store is cache._memory
+
+    monkeypatch.setattr(cache, "_pg_down_until", 0.0)
+    assert cache.store is cache._pg  # retried once PG_RETRY_AFTER has passed
@@ -0,0 +1,109 @@
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from app.services.provisioning.manifests import render_manifests
+from app.services.templates import TemplateRegistry, TemplateValidationError
+
+REPO_TEMPLATES = Path(__file__).parents[3] / "templates"
+
+
+def test_repo_templates_validate_and_fill_defaults():
+    registry = TemplateRegistry(str(REPO_TEMPLATES))
+    template = registry.get("microservice")
+
+    params = template.validate({"name": "orders", "owner": "team-a", "language": "go"})
+    assert params["gitopsEngine"] == "argocd" and params["replicas"] == 2
+
+    with pytest.raises(TemplateValidationError) as e:
+        template.validate({"name": "Orders", "language": "cobol", "replicas": True})
+    assert sorted(e.value.errors) == [
+        "language: must be one of ['go', 'java', 'python', 'typescript']",
+        "name: must match ^[a-z][a-z0-9-]*$",
+        "owner: required",
+        "replicas: expected integer",
+    ]
+    assert {t.name for t in registry.templates("infrastructure")} == {"database", "kafka-topic"}
+
+
+# Non-default values for every template parameter the renderer consumes, and where they must land.
+USER_VALUES = {
+    "microservice": (
+        {"name": "orders", "owner": "team-a", "namespace": "shop", "replicas": 4,
+         "enableKafka": True, "kafkaTopicName": "orders.created",
+         "enableDatabase": True, "databaseType": "mysql"},
+        {
+            "apps/orders/deployment.yaml": {"metadata.namespace": "shop", "spec.replicas": 4},
+            "kafka/topics/orders.created.yaml": {"metadata.name": "orders.created"},
+            "databases/orders.json": {"values.engine": "mysql"},
+        },
+    ),
+    "kafka-topic": (
+        {"topicName": "orders.created", "owner": "team-a", "partitions": 12, "replicas": 4,
+         "retentionMs": 24, "cleanupPolicy": "compact"},
+        {"kafka/topics/orders.created.yaml": {
+            "spec.partitions": 12, "spec.replicas": 4,
+            "spec.config.retention.ms": "86400000", "spec.config.cleanup.policy": "compact",
+        }},
+    ),
+    "database": (
+        {"name": "ledger", "owner": "team-a", "engine": "postgresql",
+         "instanceClass": "db.r6g.large", "storageGb": 100, "multiAz": True},
+        {"databases/ledger.json": {
+            "values.engine": "postgres", "values.instance_class": "db.r6g.large",
+            "values.allocated_storage": 100, "values.multi_az": True,
+        }},
+    ),
+}
+
+
+def _lookup(manifest: dict, dotted: str):
+    """Resolve a dotted path; manifest keys may contain dots themselves (``retention.ms``)."""
+    while dotted not in manifest:
+        key, dotted = dotted.split(".", 1)
+        manifest = manifest[key]
+    return manifest[dotted]
+
+
+@pytest.mark.parametrize("name", sorted(USER_VALUES))
+def test_user_values_reach_rendered_manifests(name):
+    params, expected = USER_VALUES[name]
+    template = TemplateRegistry(str(REPO_TEMPLATES)).get(name)
+
+    rendered = {m["path"]: m["manifest"] for m in render_manifests(name, template.validate(params))}
+
+    assert set(rendered) == set(expected)
+    for path, fields in expected.items():
+        assert {field: _lookup(rendered[path], field) for field in fields} == fields
+
+
+def test_every_shipped_template_is_rendered():
+    assert {t.name for t in TemplateRegistry(str(REPO_TEMPLATES)).templates()} == set(USER_VALUES)
+
+
+def test_changed_templates_reload_with_new_etag(tmp_path):
+    path = tmp_path / "queue" / "template.yaml"
+    path.parent.mkdir()
+    path.write_text(
+        "metadata: {name: queue}\n"
+        "spec: {type: resource, parameters: [{properties: {size: {type: integer}}}]}\n"
+    )
+    registry = TemplateRegistry(str(tmp_path))
+    payload, etag = registry.listing()
+    assert registry.listing() == (payload, etag)
+
+    path.write_text(
+        "metadata: {name: queue}\n"
+        "spec: {type: resource, parameters: [{properties: {size: {type: integer, maximum: 5}}}]}\n"
+    )
+    os.utime(path, ns=(time.time_ns(), time.time_ns() + 1_000_000_000))
+    registry.refresh(force=True)
+    assert registry.listing()[1] != etag
+    with pytest.raises(TemplateValidationError):
+        registry.get("queue").validate({"size": 10})
+
+    path.write_text("not: [valid")
+    registry.refresh(force=True)
+    assert registry.get("queue") is not None  # last good version is kept
@@ -53,6 +53,7 @@ func main() {
 
 			// HTTP API for Python backend
 			mux.HandleFunc("/validate", handler.HandleValidate)
+			mux.HandleFunc("/validate/batch", handler.HandleValidateBatch)
 			mux.HandleFunc("/generate", handler.HandleGenerate)
 			mux.HandleFunc("/fix", handler.HandleFix)
 			mux.HandleFunc("/policies", handler.HandleListPolicies)
@@ -29,6 +29,15 @@ type validateRequest struct {
 	Config string `json:"config"`
 }
 
+type batchValidateRequest struct {
+	Items []validateRequest `json:"items"`
+}
+
+type batchValidateResult struct {
+	*policy.ValidationResult
+	Error string `json:"error,omitempty"`
+}
+
 type generateRequest struct {
 	Domain       string `json:"domain"`
 	Requirements string `json:"requirements"`
@@ -61,6 +70,34 @@ func (h *Handler) HandleValidate(w http.ResponseWriter, r *http.Request) {
 	writeJSON(w, http.StatusOK, result)
 }
 
+// HandleValidateBatch validates many domain/config pairs in one round trip.
+// Results are returned in request order; a failing item reports its error
+// without failing the rest of the batch.
+func (h *Handler) HandleValidateBatch(w http.ResponseWriter, r *http.Request) {
+	if r.Method != http.MethodPost {
+		http.Error(w, "method not allowed", http.StatusMethodNotAllowed)
+		return
+	}
+
+	var req batchValidateRequest
+	if err := json.NewDecoder(r.Body).Decode(&req); err != nil {
+		writeJSON(w, http.StatusBadRequest, map[string]string{"error": "invalid request body"})
+		return
+	}
+
+	results := make([]batchValidateResult, len(req.Items))
+	for i, item := range req.Items {
+		result, err := h.validator.Validate(r.Context(), item.Domain, item.Config)
+		if err != nil {
+			results[i] = batchValidateResult{Error: err.Error()}
+			continue
+		}
+		results[i] = batchValidateResult{ValidationResult: result}
+	}
+
+	writeJSON(w, http.StatusOK, map[string]interface{}{"results": results})
+}
+
 func (h *Handler) HandleGenerate(w http.ResponseWriter, r *http.Request) {
 	if r.Method != http.MethodPost {
 		http.Error(w, "method not allowed", http.StatusMethodNotAllowed)